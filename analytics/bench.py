@@ -0,0 +1,276 @@
+"""
+Benchmarks for the profit / cutoff pipeline behind the Model Output page.
+
+`synthetic_ranked` writes files with the person2_nn_mailable_ranked.csv
+schema (id, p_nn, p_wave2_nn, expected_profit_nn) at any size, drawing p_nn
+from the real file's quantile function so the EP > 0 share and curve shape
+match the course data. `run_benchmarks` times each stage of the page on
+those files separately:
+
+    load          pl.read_csv of the ranked file
+    ep_recompute  Sensitivity-mode expected profit from p_nn
+    sort_rank     sort by EP, rank and cumulative profit
+    cutoff        SuppressionIndex build + EP > 0 cutoff + peak
+    to_pandas     conversion handed to plotnine
+    plot          both profit charts drawn (Agg backend)
+    export        id / mailto_wave2 submission built and written as CSV
+
+Each stage keeps the best and median of `repeat` runs. Results are JSON;
+`compare` flags stages that slowed down by more than a relative threshold
+(ignoring changes below a small absolute noise floor).
+
+    python -m analytics.bench run --scales 22500,800000 --out bench_results/base.json
+    python -m analytics.bench compare bench_results/base.json bench_results/new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import polars as pl
+
+from analytics.bundle import DATA_DIR
+from analytics.profit import (
+    expected_profit,
+    mailing_list,
+    probability_column,
+    rank_by_profit,
+    wave1_probability,
+)
+from analytics.suppression import SuppressionIndex
+
+SCALES = [22_500, 800_000, 10_000_000]
+STAGES = ["load", "ep_recompute", "sort_rank", "cutoff", "to_pandas", "plot", "export"]
+RANKED_SOURCE = os.path.join(DATA_DIR, "person2_nn_mailable_ranked.csv")
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "quickbooks-bench")
+
+MAIL_COST = 1.41
+MARGIN = 60.0
+DECAY = 0.50
+
+# Beta fit to the mailable p_nn, used only if the ranked source file is missing
+FALLBACK_BETA = (1.35, 21.76)
+
+THRESHOLD = 0.20
+NOISE_FLOOR = 0.005  # seconds
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+
+def synthetic_ranked(n: int, seed: int = 0, source: str = RANKED_SOURCE) -> pl.DataFrame:
+    """Ranked frame with the person2_nn_mailable_ranked schema and `n` rows."""
+    rng = np.random.default_rng(seed)
+    u = rng.random(n)
+    if os.path.exists(source):
+        real = np.sort(pl.read_csv(source, columns=["p_nn"])["p_nn"].to_numpy())
+        p = np.interp(u, np.linspace(0, 1, len(real)), real)
+    else:
+        p = rng.beta(*FALLBACK_BETA, size=n)
+    p_wave2 = p * DECAY
+    return (
+        pl.DataFrame(
+            {
+                "id": rng.permutation(n).astype(np.int64) + 1,
+                "p_nn": p,
+                "p_wave2_nn": p_wave2,
+                "expected_profit_nn": MARGIN * p_wave2 - MAIL_COST,
+            }
+        )
+        .sort("expected_profit_nn", descending=True)
+    )
+
+
+def synthetic_file(n: int, seed: int = 0, cache_dir: str = CACHE_DIR) -> str:
+    """Path to a cached synthetic CSV (written on first use)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"ranked_{n}_{seed}.csv")
+    if not os.path.exists(path):
+        synthetic_ranked(n, seed).write_csv(path + ".tmp")
+        os.replace(path + ".tmp", path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+
+def _plot(ranked_pd, cutoff_rank: int) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from plotnine import aes, geom_hline, geom_line, geom_vline, ggplot
+
+    for y in ("expected_profit_nn", "cumulative_profit"):
+        fig = (
+            ggplot(ranked_pd, aes(x="rank", y=y))
+            + geom_line()
+            + geom_hline(yintercept=0)
+            + geom_vline(xintercept=cutoff_rank)
+        ).draw()
+        plt.close(fig)
+
+
+def time_stages(path: str, stages: list[str] = STAGES) -> dict[str, float]:
+    """One pass over the pipeline; seconds per stage (skipped stages are absent)."""
+    out: dict[str, float] = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        out[name] = time.perf_counter() - start
+        return result
+
+    df = timed("load", lambda: pl.read_csv(path))
+    prob = wave1_probability(probability_column(df.columns), DECAY)
+    df = timed("ep_recompute", lambda: df.with_columns(expected_profit(prob, MARGIN, DECAY, MAIL_COST)))
+    ranked = timed("sort_rank", lambda: rank_by_profit(df))
+
+    def cutoff():
+        index = SuppressionIndex(ranked["id"].to_numpy(), ranked["expected_profit_nn"].to_numpy())
+        index.peak()
+        return index, index.profit_cutoff_rank()
+
+    index, cutoff_rank = timed("cutoff", cutoff)
+    if "to_pandas" in stages or "plot" in stages:
+        ranked_pd = timed("to_pandas", ranked.to_pandas)
+        if "plot" in stages:
+            timed("plot", lambda: _plot(ranked_pd, cutoff_rank))
+        del ranked_pd
+    timed("export", lambda: mailing_list(df, ranked, index, cutoff_rank).write_csv())
+    return {k: v for k, v in out.items() if k in stages}
+
+
+@dataclass
+class StageResult:
+    scale: int
+    stage: str
+    best: float
+    median: float
+    repeats: int
+
+
+def run_benchmarks(
+    scales: list[int] = SCALES,
+    repeat: int = 3,
+    stages: list[str] = STAGES,
+    seed: int = 0,
+) -> dict:
+    results: list[StageResult] = []
+    for n in scales:
+        path = synthetic_file(n, seed)
+        runs = [time_stages(path, stages) for _ in range(repeat)]
+        for stage in stages:
+            times = [r[stage] for r in runs if stage in r]
+            if times:
+                results.append(StageResult(n, stage, min(times), float(np.median(times)), len(times)))
+                print(f"{n:>12,}  {stage:<13} {min(times):9.4f}s", file=sys.stderr)
+    return {"meta": environment(), "results": [asdict(r) for r in results]}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = THRESHOLD, noise_floor: float = NOISE_FLOOR
+) -> pl.DataFrame:
+    """Per (scale, stage) best-time ratio current / baseline, with a regression flag."""
+    key = ["scale", "stage"]
+    old = pl.DataFrame(baseline["results"]).select(*key, pl.col("best").alias("baseline"))
+    new = pl.DataFrame(current["results"]).select(*key, pl.col("best").alias("current"))
+    return (
+        old.join(new, on=key, how="inner")
+        .with_columns((pl.col("current") / pl.col("baseline")).alias("ratio"))
+        .with_columns(
+            (
+                (pl.col("ratio") > 1 + threshold)
+                & ((pl.col("current") - pl.col("baseline")) > noise_floor)
+            ).alias("regression")
+        )
+        .sort("scale", pl.col("stage").replace_strict(STAGES, list(range(len(STAGES)))))
+    )
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m analytics.bench")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="time every pipeline stage on synthetic ranked files")
+    run.add_argument("--scales", default=",".join(map(str, SCALES)))
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--skip", default="", help="comma-separated stages to skip, e.g. plot")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", default=None, help="JSON output path (default: stdout)")
+
+    cmp_ = sub.add_parser("compare", help="flag regressions between two result files")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=THRESHOLD)
+    cmp_.add_argument("--noise-floor", type=float, default=NOISE_FLOOR)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        skip = {s for s in args.skip.split(",") if s}
+        unknown = skip - set(STAGES)
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+        report = run_benchmarks(
+            [int(s) for s in args.scales.split(",")],
+            repeat=args.repeat,
+            stages=[s for s in STAGES if s not in skip],
+            seed=args.seed,
+        )
+        text = json.dumps(report, indent=2)
+        if args.out:
+            os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+            with open(args.out, "w") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    else:
+        table = compare(_load(args.baseline), _load(args.current), args.threshold, args.noise_floor)
+        with pl.Config(tbl_rows=-1, tbl_hide_dataframe_shape=True):
+            print(table)
+        regressions = table.filter(pl.col("regression"))
+        if regressions.height:
+            print(f"{regressions.height} stage(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions.")
@@ -0,0 +1,256 @@
+"""
+Bitmap indexes over the low-cardinality customer attributes.
+
+One bitset per (column, value) is built once from the customer table, with
+bit positions given by the customer `id`. Segment filters such as
+``version1 & owntaxprod & zip_bins in 3..7`` then resolve with word-level
+AND/OR/NOT over uint64 arrays instead of a dataframe filter.
+
+Bitsets are stored dense: at these cardinalities (2-20 values per column,
+values spread across the id range) run-length encoding would not shrink them.
+"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import polars as pl
+
+SEGMENT_COLUMNS = [
+    "sex",
+    "bizflag",
+    "version1",
+    "owntaxprod",
+    "upgraded",
+    "zip_bins",
+    "res1",
+]
+
+
+def pack_bits(flags: np.ndarray) -> np.ndarray:
+    """Pack a boolean array into little-endian uint64 words."""
+    packed = np.packbits(flags, bitorder="little")
+    pad = (-len(packed)) % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros(pad, dtype=np.uint8)])
+    return packed.view("<u8")
+
+
+def test_bits(words: np.ndarray, keys: np.ndarray, n_bits: int) -> np.ndarray:
+    """Boolean mask of which `keys` are set in `words` (out-of-range -> False)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    inside = (keys >= 0) & (keys < n_bits)
+    safe = np.where(inside, keys, 0)
+    bits = (words[safe >> 6] >> (safe & 63).astype(np.uint64)) & np.uint64(1)
+    return inside & (bits == 1)
+
+
+class BitmapIndex:
+    """Per-value bitsets for a set of columns, addressed by integer key."""
+
+    def __init__(self, n_bits: int, universe: np.ndarray, bitmaps: dict):
+        self.n_bits = n_bits
+        self.universe = universe
+        self.bitmaps = bitmaps  # {column: {value: words}}
+
+    @classmethod
+    def build(
+        cls,
+        df: pl.DataFrame,
+        columns: list[str] = SEGMENT_COLUMNS,
+        key: str = "id",
+    ) -> "BitmapIndex":
+        keys = df[key].cast(pl.Int64).to_numpy()
+        if len(keys) and keys.min() < 0:
+            raise ValueError(f"'{key}' must be non-negative to address bits.")
+        n_bits = int(keys.max()) + 1 if len(keys) else 0
+
+        flags = np.zeros(n_bits, dtype=bool)
+        flags[keys] = True
+        universe = pack_bits(flags)
+
+        bitmaps: dict[str, dict] = {}
+        for col in columns:
+            values = df[col].cast(pl.String).to_numpy()
+            per_value = {}
+            for value in np.unique(values):
+                flags = np.zeros(n_bits, dtype=bool)
+                flags[keys[values == value]] = True
+                per_value[str(value)] = pack_bits(flags)
+            bitmaps[col] = per_value
+        return cls(n_bits, universe, bitmaps)
+
+    # ------------------------------------------------------------
+    # Primitive sets
+    # ------------------------------------------------------------
+    def values(self, col: str) -> list[str]:
+        return list(self._column(col))
+
+    def _column(self, col: str) -> dict:
+        if col not in self.bitmaps:
+            raise KeyError(f"No bitmap index for column '{col}'.")
+        return self.bitmaps[col]
+
+    def empty(self) -> np.ndarray:
+        return np.zeros_like(self.universe)
+
+    def eq(self, col: str, value) -> np.ndarray:
+        words = self._column(col).get(str(value))
+        if words is None:
+            raise ValueError(
+                f"'{value}' is not a value of '{col}'; expected one of: {', '.join(self.values(col))}."
+            )
+        return words.copy()
+
+    def is_flag(self, col: str) -> bool:
+        return set(self._column(col)) <= {"0", "1"}
+
+    def isin(self, col: str, values) -> np.ndarray:
+        out = self.empty()
+        for value in values:
+            out |= self.eq(col, value)
+        return out
+
+    def between(self, col: str, lo: float, hi: float) -> np.ndarray:
+        """Values in [lo, hi] for numeric-valued columns."""
+        out = self.empty()
+        for value, words in self._column(col).items():
+            try:
+                numeric = float(value)
+            except ValueError:
+                continue
+            if lo <= numeric <= hi:
+                out |= words
+        return out
+
+    def invert(self, words: np.ndarray) -> np.ndarray:
+        return ~words & self.universe
+
+    # ------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------
+    @staticmethod
+    def count(words: np.ndarray) -> int:
+        return int(np.bitwise_count(words).sum())
+
+    def contains(self, words: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Boolean mask of which `keys` are set in `words` (out-of-range -> False)."""
+        return test_bits(words, keys, self.n_bits)
+
+    def query(self, expr: str) -> np.ndarray:
+        """Evaluate a segment filter expression (grammar below)."""
+        return _Parser(expr, self).parse()
+
+
+# ============================================================
+# Segment filter expressions
+# ============================================================
+# Grammar (case-insensitive keywords):
+#   expr   := term (("|" | "or") term)*
+#   term   := factor (("&" | "and") factor)*
+#   factor := ("~" | "not") factor | "(" expr ")" | atom
+#   atom   := col                      -> col == 1
+#           | col ("=" | "==" | "!=") value
+#           | col "in" lo ".." hi      -> inclusive numeric range
+#           | col "in" value ("," value)*
+_TOKEN = re.compile(
+    r"\s*(?:(\.\.)|(==|!=|=|&|\||~|\(|\)|,)|([A-Za-z_][A-Za-z0-9_]*)|(-?\d+(?:\.\d+)?)|\"([^\"]*)\"|'([^']*)')"
+)
+
+
+def _tokenize(expr: str) -> list[str]:
+    tokens = []
+    pos = 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"Unexpected input in segment filter at: {expr[pos:]!r}")
+        tok = next(g for g in m.groups() if g is not None)
+        tokens.append(tok)
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expr: str, index: BitmapIndex):
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+        self.index = index
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> str:
+        tok = self._peek()
+        if tok is None:
+            raise ValueError("Segment filter ended unexpectedly.")
+        self.pos += 1
+        return tok
+
+    def parse(self) -> np.ndarray:
+        if not self.tokens:
+            return self.index.universe.copy()
+        out = self._expr()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token in segment filter: {self._peek()!r}")
+        return out
+
+    def _expr(self) -> np.ndarray:
+        out = self._term()
+        while (self._peek() or "").lower() in ("|", "or"):
+            self._next()
+            out = out | self._term()
+        return out
+
+    def _term(self) -> np.ndarray:
+        out = self._factor()
+        while (self._peek() or "").lower() in ("&", "and"):
+            self._next()
+            out = out & self._factor()
+        return out
+
+    def _factor(self) -> np.ndarray:
+        tok = self._next()
+        if tok.lower() in ("~", "not"):
+            return self.index.invert(self._factor())
+        if tok == "(":
+            out = self._expr()
+            if self._next() != ")":
+                raise ValueError("Missing ')' in segment filter.")
+            return out
+        return self._atom(tok)
+
+    def _atom(self, col: str) -> np.ndarray:
+        op = (self._peek() or "").lower()
+        if op in ("=", "=="):
+            self._next()
+            return self.index.eq(col, self._value())
+        if op == "!=":
+            self._next()
+            return self.index.invert(self.index.eq(col, self._value()))
+        if op == "in":
+            self._next()
+            first = self._value()
+            if self._peek() == "..":
+                self._next()
+                return self.index.between(col, float(first), float(self._value()))
+            values = [first]
+            while self._peek() == ",":
+                self._next()
+                values.append(self._value())
+            return self.index.isin(col, values)
+        # Bare column name: only for 0/1 flags
+        if not self.index.is_flag(col):
+            raise ValueError(
+                f"'{col}' is not a 0/1 flag; compare it with a value, e.g. "
+                f"`{col} = {self.index.values(col)[0]}`."
+            )
+        return self.index.eq(col, 1)
+
+    def _value(self) -> str:
+        tok = self._next()
+        if tok in ("(", ")", "&", "|", "~", ",", "..", "=", "==", "!="):
+            raise ValueError(f"Expected a value in segment filter, got {tok!r}.")
+        return tok
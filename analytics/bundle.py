@@ -0,0 +1,140 @@
+"""
+Single id-keyed columnar bundle of every per-customer artifact.
+
+The source features and all scored outputs (logit, NN, submissions) are
+joined once into `data/bundle.parquet` (zstd, one row per customer) with a
+JSON manifest describing where each column came from. Pages read only the
+columns they need through parquet projection pushdown instead of parsing
+several CSVs that each repeat the `id` column.
+
+Rebuild after regenerating any model output:
+
+    python -m analytics.bundle
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import polars as pl
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+BUNDLE_PATH = os.path.join(DATA_DIR, "bundle.parquet")
+MANIFEST_PATH = os.path.join(DATA_DIR, "bundle_manifest.json")
+
+FEATURES_FILE = "intuit75k.parquet"
+
+# source file -> {source column: bundle column}
+SCORE_SOURCES = {
+    "person1_test_scored.csv": {
+        "p_logit": "p_logit",
+        "p_wave2": "p_wave2_logit",
+        "expected_profit": "expected_profit_logit",
+    },
+    "person1_logit_test_pred.csv": {"p_logit": "p_logit_pred"},
+    "person2_nn_test_scored.csv": {
+        "p_nn": "p_nn",
+        "p_wave2_nn": "p_wave2_nn",
+        "expected_profit_nn": "expected_profit_nn",
+    },
+    "gbt_test_scored.csv": {
+        "p_gbt": "p_gbt",
+        "p_wave2_gbt": "p_wave2_gbt",
+        "expected_profit_gbt": "expected_profit_gbt",
+    },
+    "person1_submission_template.csv": {"mailto_wave2": "mailto_wave2_logit"},
+    "submission_final.csv": {"mailto_wave2": "mailto_wave2"},
+}
+MODEL_COMPARISON_FILE = "person2_model_comparison.csv"
+
+# The *_mailable_ranked.csv outputs are the test set minus wave-1 responders
+MAILABLE = (pl.col("training") == 0) & (pl.col("res1") == "No")
+
+
+def _digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_bundle(data_dir: str = DATA_DIR) -> dict:
+    """Join all sources into the bundle and write the manifest; returns it."""
+    features_path = os.path.join(data_dir, FEATURES_FILE)
+    bundle = pl.read_parquet(features_path)
+    columns = {col: FEATURES_FILE for col in bundle.columns}
+    sources = {FEATURES_FILE: _digest(features_path)}
+
+    for file_name, rename in SCORE_SOURCES.items():
+        path = os.path.join(data_dir, file_name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Bundle source not found: {path}")
+        scores = pl.read_csv(path, columns=["id", *rename]).rename(rename)
+        bundle = bundle.join(scores, on="id", how="left", validate="1:1")
+        columns.update({col: file_name for col in rename.values()})
+        sources[file_name] = _digest(path)
+
+    bundle = bundle.with_columns(MAILABLE.alias("mailable")).sort("id")
+    columns["mailable"] = "derived: training == 0 & res1 == 'No'"
+
+    models = []
+    comparison_path = os.path.join(data_dir, MODEL_COMPARISON_FILE)
+    if os.path.exists(comparison_path):
+        models = pl.read_csv(comparison_path).to_dicts()
+        sources[MODEL_COMPARISON_FILE] = _digest(comparison_path)
+
+    bundle_path = os.path.join(data_dir, os.path.basename(BUNDLE_PATH))
+    bundle.write_parquet(bundle_path, compression="zstd", compression_level=10, statistics=True)
+
+    manifest = {
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "file": os.path.basename(bundle_path),
+        "rows": bundle.height,
+        "key": "id",
+        "columns": {
+            col: {"dtype": str(dtype), "source": columns[col]}
+            for col, dtype in bundle.schema.items()
+        },
+        "sources": sources,
+        "models": models,
+    }
+    with open(os.path.join(data_dir, os.path.basename(MANIFEST_PATH)), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_bundle(
+    columns: list[str] | None = None,
+    mailable_only: bool = False,
+    path: str = BUNDLE_PATH,
+) -> pl.DataFrame:
+    """Read selected bundle columns (projection + predicate pushdown)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Data bundle not found: {path}. Build it with `python -m analytics.bundle`."
+        )
+    lf = pl.scan_parquet(path)
+    if mailable_only:
+        lf = lf.filter(pl.col("mailable"))
+    if columns is not None:
+        lf = lf.select(columns)
+    return lf.collect()
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    manifest = build_bundle()
+    size = os.path.getsize(BUNDLE_PATH)
+    print(
+        f"Wrote {BUNDLE_PATH} ({manifest['rows']:,} rows, "
+        f"{len(manifest['columns'])} columns, {size / 1e6:.2f} MB)"
+    )
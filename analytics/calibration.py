@@ -0,0 +1,189 @@
+"""
+Probability calibration and Wave-2 decay.
+
+The pages turn model scores into expected profit as
+margin * p * WAVE2_RESPONSE_MULT - mail_cost, so the EP > 0 cutoff is only
+right if p is a calibrated probability. Two calibrators are fitted on the
+holdout (scores vs observed Wave-1 response):
+
+- isotonic: pool-adjacent-violators, vectorized by pooling every
+  decreasing run of blocks at once with `np.add.reduceat` until the block
+  means are monotone;
+- Platt: a two-parameter logit on the score's log-odds (saturated scores
+  such as 0.9999999999999469 are clipped first).
+
+Both are stored as a `PiecewiseLinear` curve (knots + `np.interp`), so
+scoring is one interpolation per customer. `estimate_segment_decay`
+optionally replaces the flat 0.5 decay with per-segment Wave-2 / Wave-1
+response ratios, shrunk toward the flat value where data is thin.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import polars as pl
+
+from analytics.logit import fit_irls
+
+CLIP = 1e-6
+
+
+@dataclass
+class PiecewiseLinear:
+    x: np.ndarray  # increasing knots
+    y: np.ndarray
+
+    def __call__(self, values) -> np.ndarray:
+        return np.interp(np.asarray(values, dtype=np.float64), self.x, self.y)
+
+
+def pav(y: np.ndarray, weights: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Isotonic (non-decreasing) fit of `y`, already ordered by score. Returns
+    (block_start, block_value): the fit is block_value[j] from block_start[j]
+    up to the next start.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    w = np.ones_like(y) if weights is None else np.asarray(weights, dtype=np.float64)
+    starts = np.arange(len(y))
+    sums, wsum = y * w, w.copy()
+
+    while len(starts) > 1:
+        means = sums / wsum
+        down = means[:-1] > means[1:]
+        if not down.any():
+            break
+        # A block opens a new group unless it continues a decreasing run
+        new_group = np.concatenate([[True], ~down])
+        group_at = np.flatnonzero(new_group)
+        starts = starts[group_at]
+        sums = np.add.reduceat(sums, group_at)
+        wsum = np.add.reduceat(wsum, group_at)
+
+    return starts, sums / wsum
+
+
+def _prepare(score: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Distinct sorted scores with their response sums and counts."""
+    score = np.asarray(score, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(score) != len(y) or len(score) == 0:
+        raise ValueError("score and y must be non-empty and the same length.")
+    xs, inverse, counts = np.unique(score, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=y, minlength=len(xs))
+    return xs, sums, counts.astype(np.float64)
+
+
+def fit_isotonic(score: np.ndarray, y: np.ndarray) -> PiecewiseLinear:
+    """Isotonic calibration curve; each pooled block spans its first..last score."""
+    xs, sums, counts = _prepare(score, y)
+    starts, values = pav(sums / counts, counts)
+    ends = np.append(starts[1:], len(xs)) - 1
+    knots_x = np.column_stack([xs[starts], xs[ends]]).ravel()
+    knots_y = np.repeat(values, 2)
+    # Single-score blocks give duplicate knots; np.interp takes the later one
+    return PiecewiseLinear(knots_x, knots_y)
+
+
+def fit_platt(score: np.ndarray, y: np.ndarray, n_knots: int = 257) -> PiecewiseLinear:
+    """Platt scaling on log-odds, tabulated on a log-odds grid."""
+    p = np.clip(np.asarray(score, dtype=np.float64), CLIP, 1 - CLIP)
+    z = np.log(p / (1 - p))
+    coef, _, _ = fit_irls(np.column_stack([np.ones_like(z), z]), y)
+    grid_z = np.linspace(np.log(CLIP / (1 - CLIP)), -np.log(CLIP / (1 - CLIP)), n_knots)
+    grid_p = 1 / (1 + np.exp(-grid_z))
+    calibrated = 1 / (1 + np.exp(-(coef[0] + coef[1] * grid_z)))
+    return PiecewiseLinear(grid_p, calibrated)
+
+
+CALIBRATORS = {"isotonic": fit_isotonic, "platt": fit_platt}
+
+
+def calibration_table(p: np.ndarray, y: np.ndarray, bins: int = 10) -> pl.DataFrame:
+    """Mean predicted vs observed response per score decile (reliability check)."""
+    order = np.argsort(p, kind="stable")
+    decile = np.empty(len(p), dtype=np.int64)
+    decile[order] = np.arange(len(p)) * bins // len(p)
+    return (
+        pl.DataFrame({"decile": decile + 1, "predicted": p, "observed": y})
+        .group_by("decile")
+        .agg(pl.col("predicted").mean(), pl.col("observed").mean(), pl.len().alias("n"))
+        .sort("decile")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Wave-2 decay
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Wave2Decay:
+    default: float = 0.50
+    by_segment: dict[str, float] = field(default_factory=dict)
+    column: str | None = None
+
+    def factors(self, segments=None) -> np.ndarray | float:
+        """Decay per row (or the flat value when no segments are given)."""
+        if not self.by_segment or segments is None:
+            return self.default
+        return (
+            pl.Series(segments)
+            .cast(pl.String)
+            .replace_strict(self.by_segment, default=self.default, return_dtype=pl.Float64)
+            .to_numpy()
+        )
+
+
+def estimate_segment_decay(
+    segments,
+    p_wave1: np.ndarray,
+    responded: np.ndarray,
+    default: float = 0.50,
+    strength: float = 20.0,
+    column: str | None = None,
+) -> tuple[Wave2Decay, pl.DataFrame]:
+    """
+    Per-segment decay = observed Wave-2 responses / calibrated Wave-1
+    expected responses among mailed customers, shrunk toward `default`:
+    (responses + strength * default) / (expected + strength).
+    """
+    stats = (
+        pl.DataFrame(
+            {
+                "segment": pl.Series(segments).cast(pl.String),
+                "expected": np.asarray(p_wave1, dtype=np.float64),
+                "responses": np.asarray(responded, dtype=np.float64),
+            }
+        )
+        .group_by("segment")
+        .agg(pl.len().alias("mailed"), pl.col("expected").sum(), pl.col("responses").sum())
+        .with_columns(
+            (
+                (pl.col("responses") + strength * default) / (pl.col("expected") + strength)
+            ).alias("decay")
+        )
+        .sort("segment")
+    )
+    decay = Wave2Decay(default, dict(zip(stats["segment"], stats["decay"])), column)
+    return decay, stats
+
+
+def read_wave2_responses(data: bytes) -> pl.DataFrame:
+    """
+    Observed Wave-2 outcomes for mailed customers: an `id` column and a 0/1
+    response column (`res2`, `responded`, or else the first other column).
+    """
+    df = pl.read_csv(data)
+    if "id" not in df.columns or df.width < 2:
+        raise ValueError("Wave-2 responses need an 'id' column and a 0/1 response column.")
+    others = [c for c in df.columns if c != "id"]
+    col = next((c for c in ("res2", "responded", "res2_yes") if c in others), others[0])
+    responded = df[col]
+    if responded.dtype == pl.String:
+        responded = responded.str.to_lowercase().is_in(["1", "yes", "true"])
+    return df.select(
+        pl.col("id").cast(pl.Int64), responded.cast(pl.Float64).alias("responded")
+    ).unique("id", keep="last")
@@ -0,0 +1,388 @@
+"""
+Memoized computation graph behind the dashboard's headline numbers.
+
+The Targeting, Strategic Recommendations, Modeling and MLP pages all quote
+numbers that come from the same ranked holdout list the Model Output page
+builds. Each number is a named node here, computed from its parent nodes
+and the parameters it reads:
+
+    holdout     bundle columns for the 22,500 test rows (read once)
+    scored      mailable rows, expected profit for one model and economics
+    ranked      sorted by expected profit, rank and cumulative profit
+    cutoff      EP > 0 cutoff, profit there, and the cumulative peak
+    projection  cutoff depth scaled to the full Wave-2 pool
+    metrics     AUC and top-decile lift on the holdout
+    breakeven   Wave-1 probability at which expected profit is zero
+    charts      the two profit curves as PNG, cut at the EP > 0 cutoff
+    segments    per-segment profit curves and peaks for one breakdown column
+    segment_chart  those curves as a faceted PNG
+
+A node's cache key is the values of the parameters it depends on
+(directly or through its parents), so changing the mail cost recomputes
+`scored` and everything below it but reuses `holdout` and `metrics`.
+`invalidate(name)` drops a node and its descendants only. One graph per
+process (`dashboard_graph`) is shared by every page and session; it drops
+`holdout` when data/bundle.parquet is rewritten.
+
+Cache misses go through a `SingleFlight` (analytics.singleflight): sessions
+missing the same node and key at once wait on one computation, and at
+most `workers` node functions run at a time. Parents are resolved before
+a slot is taken, so a full pool never waits on itself.
+
+    python -m analytics.dag
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+import polars as pl
+
+from analytics.bundle import BUNDLE_PATH, load_bundle
+from analytics.metrics import auc, top_decile_lift
+from analytics.profit import expected_profit, rank_by_profit
+from analytics.segments import segment_profit_curves
+from analytics.singleflight import WORKERS, SingleFlight
+
+MODELS = ["nn", "logit", "gbt"]
+MODEL_TAGS = {"nn": "NN", "logit": "logit", "gbt": "GBT"}  # chart title tags
+BREAKDOWN_COLUMNS = ["zip_bins", "version1", "sex"]
+COURSE_DEFAULTS = {
+    "model": "nn",
+    "mail_cost": 1.41,
+    "margin": 60.0,
+    "mult": 0.50,
+    "pool_size": 118_000,  # Wave-2 eligible businesses
+    "breakdown": "zip_bins",
+}
+MAX_ENTRIES = 16  # cached parameter combinations per node
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...]
+    params: tuple[str, ...]
+
+
+class ComputeGraph:
+    """Named nodes evaluated on demand; results memoized per node and parameter values."""
+
+    def __init__(
+        self,
+        defaults: dict[str, Any] | None = None,
+        max_entries: int = MAX_ENTRIES,
+        workers: int = WORKERS,
+    ):
+        self.defaults = dict(defaults or {})
+        self.max_entries = max_entries
+        self.flight = SingleFlight(workers)
+        self.nodes: dict[str, Node] = {}
+        self.hits = 0
+        self.misses = 0
+        self._inputs: dict[str, tuple[str, ...]] = {}
+        self._cache: dict[str, OrderedDict[tuple, Any]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def node(self, name: str, deps: list[str] = (), params: list[str] = ()):
+        """Register the decorated function as node `name` (parents must already exist)."""
+
+        def register(fn):
+            if name in self.nodes:
+                raise ValueError(f"Node already registered: {name}")
+            missing = [d for d in deps if d not in self.nodes]
+            if missing:
+                raise ValueError(f"Unknown dependencies of {name}: {', '.join(missing)}")
+            self.nodes[name] = Node(name, fn, tuple(deps), tuple(params))
+            inputs = set(params).union(*(self._inputs[d] for d in deps))
+            self._inputs[name] = tuple(sorted(inputs))
+            self._cache[name] = OrderedDict()
+            return fn
+
+        return register
+
+    def inputs(self, name: str) -> tuple[str, ...]:
+        """Parameters the node's value depends on, directly or through its parents."""
+        return self._inputs[name]
+
+    def downstream(self, name: str) -> list[str]:
+        """Nodes that depend on `name`, in registration (topological) order."""
+        affected = {name}
+        for node in self.nodes.values():
+            if affected.intersection(node.deps):
+                affected.add(node.name)
+        return [n for n in self.nodes if n in affected and n != name]
+
+    def get(self, name: str, **params) -> Any:
+        if name not in self.nodes:
+            raise ValueError(f"Unknown node: {name}")
+        params = {**self.defaults, **params}
+        missing = [p for p in self._inputs[name] if p not in params]
+        if missing:
+            raise ValueError(f"Node {name} needs parameter(s): {', '.join(missing)}")
+        return self._get(name, params)
+
+    def _get(self, name: str, params: dict[str, Any]) -> Any:
+        key = tuple(params[p] for p in self._inputs[name])
+        with self._lock:
+            entries = self._cache[name]
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits += 1
+                return entries[key]
+            generation = self._generation
+        # Callers joining after an invalidation start a fresh flight
+        return self.flight.do(
+            (name, key, generation), lambda: self._compute(name, key, params, generation), admit=False
+        )
+
+    def _compute(self, name: str, key: tuple, params: dict[str, Any], generation: int) -> Any:
+        node = self.nodes[name]
+        with self._lock:
+            # A flight that landed just before this one started already stored it
+            if generation == self._generation and key in self._cache[name]:
+                self.hits += 1
+                return self._cache[name][key]
+        values = [self._get(dep, params) for dep in node.deps]
+        with self.flight.slot():
+            value = node.fn(*values, **{p: params[p] for p in node.params})
+
+        with self._lock:
+            self.misses += 1
+            # Don't store a result computed from data invalidated meanwhile
+            if generation == self._generation:
+                entries = self._cache[name]
+                entries[key] = value
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+        return value
+
+    def invalidate(self, name: str) -> list[str]:
+        """Drop cached values of `name` and its descendants; returns the nodes cleared."""
+        cleared = [name, *self.downstream(name)]
+        with self._lock:
+            self._generation += 1
+            for n in cleared:
+                self._cache[n].clear()
+        return cleared
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            for entries in self._cache.values():
+                entries.clear()
+
+    def info(self) -> pl.DataFrame:
+        """Cached entries per node, with the parameters each one is keyed on."""
+        with self._lock:
+            return pl.DataFrame(
+                {
+                    "node": list(self.nodes),
+                    "entries": [len(self._cache[n]) for n in self.nodes],
+                    "inputs": [", ".join(self._inputs[n]) for n in self.nodes],
+                }
+            )
+
+
+# ---------------------------------------------------------------------------
+# Dashboard nodes
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Cutoff:
+    eligible: int  # customers in the ranked (mailable) list
+    mails: int  # customers with EP > 0
+    profit: float  # cumulative expected profit at that cutoff
+    peak_rank: int
+    peak_profit: float
+
+    @property
+    def depth(self) -> float:
+        return self.mails / self.eligible if self.eligible else 0.0
+
+
+@dataclass(frozen=True)
+class Projection:
+    pool_size: int
+    mails: int
+    not_mailed: int
+    avoided_cost: float  # mailing cost saved vs mailing the whole pool
+    profit: float  # test-set profit per eligible customer, scaled to the pool
+
+
+@dataclass(frozen=True)
+class ModelMetrics:
+    model: str
+    auc: float
+    lift: float  # top-decile lift
+    n_holdout: int
+
+
+def build_dashboard_graph(path: str = BUNDLE_PATH) -> ComputeGraph:
+    graph = ComputeGraph(COURSE_DEFAULTS)
+
+    @graph.node("holdout")
+    def holdout() -> pl.DataFrame:
+        columns = [
+            "id",
+            "training",
+            "mailable",
+            "res1_yes",
+            *BREAKDOWN_COLUMNS,
+            *(f"p_{m}" for m in MODELS),
+        ]
+        return load_bundle(columns, path=path).filter(pl.col("training") == 0)
+
+    @graph.node("scored", deps=["holdout"], params=["model", "margin", "mult", "mail_cost"])
+    def scored(holdout, model, margin, mult, mail_cost) -> pl.DataFrame:
+        if model not in MODELS:
+            raise ValueError(f"Unknown model {model!r}; expected one of {', '.join(MODELS)}.")
+        # Same rows and column names as the Model Output page's bundled ranking
+        p = pl.col(f"p_{model}")
+        return holdout.filter(pl.col("mailable")).select(
+            "id",
+            p.alias("p_nn"),
+            (p * mult).alias("p_wave2_nn"),
+            expected_profit(p, margin, mult, mail_cost),
+        )
+
+    @graph.node("ranked", deps=["scored"])
+    def ranked(scored) -> pl.DataFrame:
+        return rank_by_profit(scored)
+
+    @graph.node("cutoff", deps=["ranked"])
+    def cutoff(ranked) -> Cutoff:
+        ep = ranked["expected_profit_nn"].to_numpy()
+        cumulative = ranked["cumulative_profit"].to_numpy()
+        if len(ep) == 0:
+            return Cutoff(0, 0, 0.0, 0, 0.0)
+        mails = int((ep > 0).sum())
+        peak = int(np.argmax(cumulative))
+        return Cutoff(
+            eligible=len(ep),
+            mails=mails,
+            profit=float(cumulative[mails - 1]) if mails else 0.0,
+            peak_rank=peak + 1,
+            peak_profit=float(cumulative[peak]),
+        )
+
+    @graph.node("projection", deps=["cutoff"], params=["pool_size", "mail_cost"])
+    def projection(cutoff, pool_size, mail_cost) -> Projection:
+        mails = int(round(pool_size * cutoff.depth))
+        per_customer = cutoff.profit / cutoff.eligible if cutoff.eligible else 0.0
+        return Projection(
+            pool_size=pool_size,
+            mails=mails,
+            not_mailed=pool_size - mails,
+            avoided_cost=(pool_size - mails) * mail_cost,
+            profit=per_customer * pool_size,
+        )
+
+    @graph.node("metrics", deps=["holdout"], params=["model"])
+    def metrics(holdout, model) -> ModelMetrics:
+        if model not in MODELS:
+            raise ValueError(f"Unknown model {model!r}; expected one of {', '.join(MODELS)}.")
+        y = holdout["res1_yes"].to_numpy()
+        score = holdout[f"p_{model}"].to_numpy()
+        return ModelMetrics(model, auc(y, score), top_decile_lift(y, score), holdout.height)
+
+    @graph.node("breakeven", params=["margin", "mult", "mail_cost"])
+    def breakeven(margin, mult, mail_cost) -> float:
+        return mail_cost / (margin * mult)
+
+    @graph.node("charts", deps=["ranked", "cutoff"], params=["model"])
+    def charts(ranked, cutoff, model) -> tuple[bytes, bytes]:
+        from analytics.charts import cumulative_profit, profit_by_rank, render_png
+
+        df = ranked.to_pandas()
+        tag = MODEL_TAGS[model]
+        return (
+            render_png(profit_by_rank(df, cutoff.mails, tag)),
+            render_png(cumulative_profit(df, cutoff.mails, tag)),
+        )
+
+    @graph.node("segments", deps=["ranked", "holdout"], params=["breakdown"])
+    def segments(ranked, holdout, breakdown) -> tuple[pl.DataFrame, pl.DataFrame]:
+        if breakdown not in BREAKDOWN_COLUMNS:
+            raise ValueError(f"Unknown breakdown {breakdown!r}; expected one of {', '.join(BREAKDOWN_COLUMNS)}.")
+        joined = (
+            ranked.select("id", "expected_profit_nn")
+            .join(holdout.select("id", breakdown), on="id", how="left", maintain_order="left")
+            .drop_nulls(breakdown)
+        )
+        return segment_profit_curves(joined[breakdown].to_numpy(), joined["expected_profit_nn"].to_numpy())
+
+    @graph.node("segment_chart", deps=["segments"], params=["breakdown"])
+    def segment_chart(segments, breakdown) -> bytes:
+        from analytics.charts import render_png, segment_curves
+
+        curves, summary = segments
+        return render_png(segment_curves(curves.to_pandas(), breakdown, summary.height))
+
+    return graph
+
+
+_GRAPH: ComputeGraph | None = None
+_GRAPH_STAMP: tuple | None = None
+_GRAPH_LOCK = threading.Lock()
+
+
+def _bundle_stamp(path: str = BUNDLE_PATH) -> tuple | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def dashboard_graph() -> ComputeGraph:
+    """The process-wide graph; a rebuilt bundle invalidates `holdout` and below."""
+    global _GRAPH, _GRAPH_STAMP
+    stamp = _bundle_stamp()
+    with _GRAPH_LOCK:
+        if _GRAPH is None:
+            _GRAPH = build_dashboard_graph()
+        elif stamp != _GRAPH_STAMP:
+            _GRAPH.invalidate("holdout")
+        _GRAPH_STAMP = stamp
+        return _GRAPH
+
+
+if __name__ == "__main__":
+    graph = dashboard_graph()
+    for model in MODELS:
+        start = time.perf_counter()
+        c = graph.get("cutoff", model=model)
+        m = graph.get("metrics", model=model)
+        print(
+            f"{model:<6} AUC {m.auc:.4f}  lift {m.lift:.2f}  mails {c.mails:,} / {c.eligible:,} "
+            f"({c.depth:.1%})  profit ${c.profit:,.0f}  [{time.perf_counter() - start:.3f}s]"
+        )
+    p = graph.get("projection")
+    print(f"nn     full pool: {p.mails:,} of {p.pool_size:,} mailed, ${p.avoided_cost:,.0f} mailing cost avoided")
+    print(f"cache: {graph.hits} hits, {graph.misses} misses")
+
+    # A review opening: many sessions miss the same charts at once
+    graph.clear()
+    sessions = 16
+    before = dataclasses.replace(graph.flight.stats)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(lambda _: graph.get("charts"), range(sessions)))
+    s = graph.flight.stats
+    print(
+        f"{sessions} concurrent chart requests: {s.executed - before.executed} node runs, "
+        f"{s.coalesced - before.coalesced} coalesced, peak {s.peak_running}/{graph.flight.workers} "
+        f"running  [{time.perf_counter() - start:.2f}s]"
+    )
@@ -0,0 +1,244 @@
+"""
+Feature and score drift monitoring with mergeable quantile sketches.
+
+Each monitored column is summarized by a KLL sketch: a stack of
+compactors where level h holds items of weight 2^h. Incoming values are
+appended to level 0; a full level is sorted and every other item (random
+offset) is promoted. Level capacities shrink geometrically below the top,
+so a sketch holds roughly 3 * k floats no matter how many rows stream
+through, with rank error around 1.7 / k. Two sketches merge by concatenating level by level and compacting,
+so parquet files can be profiled in chunks, or in worker processes, and
+combined.
+
+PSI uses the reference deciles as bins; KS is the largest CDF gap. Both
+are computed from the sketches, never from raw rows.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+DRIFT_COLUMNS = ["dollars", "last", "numords", "sincepurch"]
+SCORE_COLUMN = "p_nn"
+CHUNK_ROWS = 250_000
+# Workers start from a fresh interpreter: forking the threaded Streamlit server can deadlock
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+PSI_MODERATE = 0.10
+PSI_MAJOR = 0.25
+
+
+@dataclass
+class KLLSketch:
+    k: int = 256
+    seed: int = 0
+    levels: list[np.ndarray] = field(default_factory=list)
+    n: int = 0
+
+    def __post_init__(self):
+        self._rng = np.random.default_rng(self.seed)
+
+    def _capacity(self, level: int) -> int:
+        # Upper levels keep k items; lower ones shrink geometrically (2/3 per level)
+        depth = len(self.levels) - 1 - level
+        return max(8, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        x = np.asarray(values, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if len(x) == 0:
+            return self
+        if not self.levels:
+            self.levels.append(np.empty(0))
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self.n += len(x)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self._capacity(h):
+                items = np.sort(items)
+                # Keep an odd leftover at this level so weights stay exact
+                keep = items[len(items) - len(items) % 2 :]
+                pairs = items[: len(items) - len(items) % 2]
+                promoted = pairs[self._rng.integers(2) :: 2]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep
+            h += 1
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted retained items and their cumulative weights."""
+        if not self.levels:
+            return np.empty(0), np.empty(0)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def cdf(self, x) -> np.ndarray:
+        """Estimated fraction of values <= x."""
+        items, cum = self._weighted()
+        if len(items) == 0:
+            return np.full(np.shape(x), np.nan)
+        at = np.searchsorted(items, np.asarray(x, dtype=np.float64), side="right")
+        return np.where(at > 0, cum[np.maximum(at - 1, 0)], 0.0) / cum[-1]
+
+    def quantile(self, q) -> np.ndarray:
+        items, cum = self._weighted()
+        if len(items) == 0:
+            return np.full(np.shape(q), np.nan)
+        at = np.searchsorted(cum / cum[-1], np.asarray(q, dtype=np.float64), side="left")
+        return items[np.minimum(at, len(items) - 1)]
+
+    @property
+    def size(self) -> int:
+        """Items retained (memory footprint in float64s)."""
+        return int(sum(len(level) for level in self.levels))
+
+
+# ---------------------------------------------------------------------------
+# Drift statistics
+# ---------------------------------------------------------------------------
+
+
+def psi(reference: KLLSketch, current: KLLSketch, bins: int = 10, eps: float = 1e-4) -> float:
+    """Population stability index over the reference quantile bins."""
+    edges = np.unique(reference.quantile(np.linspace(0, 1, bins + 1)[1:-1]))
+    expected = np.diff(np.concatenate([[0.0], reference.cdf(edges), [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], current.cdf(edges), [1.0]]))
+    expected = np.clip(expected, eps, None)
+    actual = np.clip(actual, eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(reference: KLLSketch, current: KLLSketch) -> float:
+    """Kolmogorov-Smirnov distance between the two sketched distributions."""
+    grid = np.concatenate([np.concatenate(s.levels) for s in (reference, current) if s.levels])
+    if len(grid) == 0:
+        return float("nan")
+    return float(np.max(np.abs(reference.cdf(grid) - current.cdf(grid))))
+
+
+def drift_status(value: float) -> str:
+    if value >= PSI_MAJOR:
+        return "major shift"
+    if value >= PSI_MODERATE:
+        return "moderate shift"
+    return "stable"
+
+
+def drift_report(reference: dict[str, KLLSketch], current: dict[str, KLLSketch]) -> pl.DataFrame:
+    """PSI / KS per column present in both profiles."""
+    rows = []
+    for col, ref in reference.items():
+        if col not in current or current[col].n == 0:
+            continue
+        cur = current[col]
+        value = psi(ref, cur)
+        rows.append(
+            {
+                "column": col,
+                "reference_rows": ref.n,
+                "current_rows": cur.n,
+                "reference_median": float(ref.quantile(0.5)),
+                "current_median": float(cur.quantile(0.5)),
+                "psi": value,
+                "ks": ks(ref, cur),
+                "status": drift_status(value),
+            }
+        )
+    return pl.DataFrame(rows)
+
+
+# ---------------------------------------------------------------------------
+# Profiling (streaming, optionally in worker processes)
+# ---------------------------------------------------------------------------
+
+
+def profile_frame(df: pl.DataFrame, columns: list[str], k: int = 256, seed: int = 0) -> dict[str, KLLSketch]:
+    return {
+        col: KLLSketch(k=k, seed=seed + i).update(df[col].cast(pl.Float64).to_numpy())
+        for i, col in enumerate(columns)
+        if col in df.columns
+    }
+
+
+def merge_profiles(profiles: list[dict[str, KLLSketch]]) -> dict[str, KLLSketch]:
+    merged: dict[str, KLLSketch] = {}
+    for profile in profiles:
+        for col, sketch in profile.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+    return merged
+
+
+def _profile_row_groups(path: str, row_groups: list[int], columns: list[str], k: int, seed: int):
+    pf = pq.ParquetFile(path)
+    present = [c for c in columns if c in pf.schema_arrow.names]
+    profile = {col: KLLSketch(k=k, seed=seed + i) for i, col in enumerate(present)}
+    for batch in pf.iter_batches(batch_size=CHUNK_ROWS, row_groups=row_groups, columns=present):
+        chunk = pl.from_arrow(batch)
+        for col in present:
+            profile[col].update(chunk[col].cast(pl.Float64).to_numpy())
+    return profile
+
+
+def profile_parquet(
+    path: str,
+    columns: list[str],
+    k: int = 256,
+    n_jobs: int = 1,
+    seed: int = 0,
+) -> dict[str, KLLSketch]:
+    """
+    Sketch `columns` of a parquet file in CHUNK_ROWS batches (constant
+    memory). With n_jobs > 1 the row groups are split across worker
+    processes and the resulting sketches merged.
+    """
+    n_groups = pq.ParquetFile(path).num_row_groups
+    n_jobs = max(1, min(n_jobs, n_groups))
+    if n_jobs == 1:
+        return _profile_row_groups(path, list(range(n_groups)), columns, k, seed)
+
+    shards = [list(range(n_groups))[i::n_jobs] for i in range(n_jobs)]
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=MP_CONTEXT) as pool:
+        profiles = list(
+            pool.map(
+                _profile_row_groups,
+                [path] * n_jobs,
+                shards,
+                [columns] * n_jobs,
+                [k] * n_jobs,
+                [seed + 1000 * i for i in range(n_jobs)],
+            )
+        )
+    return merge_profiles(profiles)
+
+
+def default_jobs() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
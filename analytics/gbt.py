@@ -0,0 +1,179 @@
+"""
+Gradient-boosted trees challenger on pre-binned uint8 features.
+
+Every model input is mapped once to at most 255 bins: categorical inputs
+to their sorted level index (one code past the last level for unseen
+levels), numeric inputs to quantile bins (or to their
+distinct values when there are few enough, which covers `numords`, `last`,
+`sincepurch` and the flags exactly). The boosted trees then work on a
+compact uint8 matrix (1 byte per cell instead of 8); scikit-learn's
+histogram GBT builds its per-feature histograms over those codes with
+OpenMP threads.
+
+Scored output follows the other model artifacts
+(`id, p_gbt, p_wave2_gbt, expected_profit_gbt`) so the data bundle and the
+profit page can use it like the logit/NN scores. Regenerate with:
+
+    python -m analytics.gbt && python -m analytics.bundle
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from analytics.scoring import MODEL_FEATURES
+
+MAX_BINS = 255
+SCORED_FILE = "gbt_test_scored.csv"
+
+MAIL_COST = 1.41
+MARGIN = 60.0
+DECAY = 0.50
+
+
+@dataclass
+class FeatureBins:
+    columns: list[str]
+    edges: dict[str, np.ndarray]  # numeric: upper bin edges
+    levels: dict[str, np.ndarray]  # categorical: sorted labels
+
+    @classmethod
+    def fit(
+        cls, df: pl.DataFrame, columns: list[str] = MODEL_FEATURES, max_bins: int = MAX_BINS
+    ) -> "FeatureBins":
+        edges, levels = {}, {}
+        for col in columns:
+            s = df[col]
+            if s.dtype.is_numeric() or s.dtype == pl.Boolean:
+                x = s.cast(pl.Float64).drop_nulls().to_numpy()
+                distinct = np.unique(x)
+                if len(distinct) <= max_bins:
+                    # Midpoints between distinct values: one bin per value
+                    edges[col] = (distinct[:-1] + distinct[1:]) / 2
+                else:
+                    qs = np.quantile(x, np.linspace(0, 1, max_bins + 1)[1:-1])
+                    edges[col] = np.unique(qs)
+            else:
+                labels = s.cast(pl.String).unique().drop_nulls().sort().to_numpy().astype(str)
+                if len(labels) >= max_bins:
+                    # Code len(labels) is reserved for unseen levels
+                    raise ValueError(f"'{col}' has {len(labels)} levels; at most {max_bins - 1}.")
+                levels[col] = labels
+        return cls(list(columns), edges, levels)
+
+    @property
+    def categorical_mask(self) -> np.ndarray:
+        return np.array([col in self.levels for col in self.columns])
+
+    def transform(self, df: pl.DataFrame) -> np.ndarray:
+        """
+        uint8 codes, one column per feature. Unseen (and null) levels map to
+        code len(levels), which no training row has, so the trees treat them
+        as missing instead of as the first level.
+        """
+        codes = np.empty((df.height, len(self.columns)), dtype=np.uint8)
+        for j, col in enumerate(self.columns):
+            if col in self.edges:
+                x = df[col].cast(pl.Float64).to_numpy()
+                codes[:, j] = np.searchsorted(self.edges[col], x, side="left")
+            else:
+                mapping = {label: i for i, label in enumerate(self.levels[col].tolist())}
+                codes[:, j] = (
+                    df[col]
+                    .cast(pl.String)
+                    .replace_strict(mapping, default=len(mapping), return_dtype=pl.UInt8)
+                    .to_numpy()
+                )
+        return codes
+
+
+@dataclass
+class GBTModel:
+    bins: FeatureBins
+    clf: HistGradientBoostingClassifier
+    fit_seconds: float = 0.0
+
+    def predict_proba(self, df: pl.DataFrame) -> np.ndarray:
+        return self.clf.predict_proba(self.bins.transform(df))[:, 1]
+
+
+def train_gbt(
+    df: pl.DataFrame,
+    target: str = "res1_yes",
+    columns: list[str] = MODEL_FEATURES,
+    seed: int = 1234,
+    **params,
+) -> GBTModel:
+    """Fit the binned GBT; `params` override the HistGradientBoostingClassifier defaults below."""
+    start = time.perf_counter()
+    bins = FeatureBins.fit(df, columns)
+    settings = dict(
+        learning_rate=0.05,
+        max_iter=500,
+        max_leaf_nodes=15,
+        min_samples_leaf=100,
+        l2_regularization=1.0,
+        early_stopping=True,
+        validation_fraction=0.15,
+        n_iter_no_change=30,
+        random_state=seed,
+    )
+    settings.update(params)
+    clf = HistGradientBoostingClassifier(
+        max_bins=MAX_BINS,
+        categorical_features=bins.categorical_mask,
+        **settings,
+    )
+    clf.fit(bins.transform(df), df[target].to_numpy())
+    return GBTModel(bins, clf, time.perf_counter() - start)
+
+
+def score_customers(
+    model: GBTModel,
+    df: pl.DataFrame,
+    mail_cost: float = MAIL_COST,
+    margin: float = MARGIN,
+    decay: float = DECAY,
+) -> pl.DataFrame:
+    """Scores in the same layout as person2_nn_test_scored.csv."""
+    p = model.predict_proba(df)
+    return pl.DataFrame(
+        {
+            "id": df["id"],
+            "p_gbt": p,
+            "p_wave2_gbt": p * decay,
+            "expected_profit_gbt": margin * p * decay - mail_cost,
+        }
+    )
+
+
+if __name__ == "__main__":
+    from analytics.bundle import DATA_DIR, FEATURES_FILE
+    from analytics.metrics import auc, best_profit, top_decile_lift
+
+    data = pl.read_parquet(os.path.join(DATA_DIR, FEATURES_FILE))
+    train = data.filter(pl.col("training") == 1)
+    test = data.filter(pl.col("training") == 0)
+
+    model = train_gbt(train)
+    scored = score_customers(model, test)
+    out_path = os.path.join(DATA_DIR, SCORED_FILE)
+    scored.write_csv(out_path)
+
+    y_test = test["res1_yes"].to_numpy()
+    p_test = scored["p_gbt"].to_numpy()
+    realized, n_best = best_profit(y_test, p_test, MAIL_COST, MARGIN, DECAY)
+    mailable = (test["res1"].cast(pl.String) == "No").to_numpy()
+    ep = scored["expected_profit_gbt"].to_numpy()[mailable]
+    print(
+        f"Wrote {out_path}: {model.clf.n_iter_} trees in {model.fit_seconds:.1f}s\n"
+        f"  test AUC {auc(y_test, p_test):.4f}, top-decile lift {top_decile_lift(y_test, p_test):.2f}\n"
+        f"  realized test profit at best cutoff ${realized:,.0f} (mail {n_best:,})\n"
+        f"  expected Wave-2 profit on mailable ${ep[ep > 0].sum():,.0f} (mail {(ep > 0).sum():,})"
+    )
@@ -0,0 +1,133 @@
+"""
+Direct-address index over customer ids.
+
+Customer ids in the parquet and in every scored output are dense integers
+(1..75,000), so a customer's slot is simply its id: lookups are O(1) and
+joining the logit and NN outputs is a pair of array gathers, with no hash
+table. A compact presence bitmap records which ids exist. When ids are too
+sparse for direct addressing (e.g. a full-population id space with gaps),
+the index falls back to a sorted array and binary search.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import polars as pl
+
+from analytics.bitmap_index import pack_bits, test_bits
+
+# Direct addressing while the id range is at most this many times the id count
+DENSE_MAX_SPREAD = 4
+
+
+class IdIndex:
+    """Maps customer ids to storage slots (-1 for unknown ids)."""
+
+    def __init__(self, ids: np.ndarray):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        self.n_ids = len(ids)
+        self.dense = bool(
+            self.n_ids and ids[0] >= 0 and ids[-1] + 1 <= DENSE_MAX_SPREAD * self.n_ids
+        )
+        if self.dense:
+            self.size = int(ids[-1]) + 1
+            flags = np.zeros(self.size, dtype=bool)
+            flags[ids] = True
+            self.presence = pack_bits(flags)
+            self._sorted = None
+        else:
+            self.size = self.n_ids
+            self.presence = None
+            self._sorted = ids
+
+    def slots(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.dense:
+            return np.where(test_bits(self.presence, ids, self.size), ids, -1)
+        if self.n_ids == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        at = np.clip(np.searchsorted(self._sorted, ids), 0, self.n_ids - 1)
+        return np.where(self._sorted[at] == ids, at, -1)
+
+    def slot(self, customer_id: int) -> int:
+        return int(self.slots(np.array([customer_id]))[0])
+
+    def __contains__(self, customer_id: int) -> bool:
+        return self.slot(customer_id) >= 0
+
+
+def _gather_index(positions: np.ndarray) -> pl.Series:
+    """Positions as a gather index, with nulls where a position is -1."""
+    return (
+        pl.Series("pos", positions)
+        .to_frame()
+        .select(pl.when(pl.col("pos") >= 0).then(pl.col("pos")))
+        .to_series()
+    )
+
+
+class IdTable:
+    """
+    Columns from several per-customer frames, stored in slot order.
+
+    Every column is a Series indexed by slot (nulls where a source has no
+    row for that id), so `gather` is a zero-hash join across sources.
+    """
+
+    def __init__(
+        self,
+        index: IdIndex,
+        columns: dict[str, pl.Series],
+        presence: dict[str, np.ndarray],
+    ):
+        self.index = index
+        self.columns = columns
+        self.presence = presence  # {source: packed bits over slots}
+
+    @classmethod
+    def build(cls, frames: dict[str, pl.DataFrame], key: str = "id") -> "IdTable":
+        index = IdIndex(np.concatenate([df[key].to_numpy() for df in frames.values()]))
+
+        columns: dict[str, pl.Series] = {}
+        presence: dict[str, np.ndarray] = {}
+        for source, df in frames.items():
+            slots = index.slots(df[key].to_numpy())
+            if len(np.unique(slots)) != len(slots):
+                raise ValueError(f"Source '{source}' has duplicate '{key}' values.")
+
+            rowpos = np.full(index.size, -1, dtype=np.int64)
+            rowpos[slots] = np.arange(df.height)
+            presence[source] = pack_bits(rowpos >= 0)
+
+            gather_idx = _gather_index(rowpos)
+            for col in df.columns:
+                if col == key:
+                    continue
+                if col in columns:
+                    raise ValueError(
+                        f"Column '{col}' from source '{source}' is already loaded."
+                    )
+                columns[col] = df[col].gather(gather_idx).alias(col)
+
+        return cls(index, columns, presence)
+
+    def has(self, source: str, ids) -> np.ndarray:
+        """Which ids have a row in `source`."""
+        slots = self.index.slots(ids)
+        return test_bits(self.presence[source], slots, self.index.size)
+
+    def row(self, customer_id: int) -> dict | None:
+        """All stored values for one customer, or None if the id is unknown."""
+        slot = self.index.slot(customer_id)
+        if slot < 0:
+            return None
+        return {name: series[slot] for name, series in self.columns.items()}
+
+    def gather(self, ids, columns: list[str] | None = None, key: str = "id") -> pl.DataFrame:
+        """Columns for `ids` in the given order (nulls for missing ids/sources)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        idx = _gather_index(self.index.slots(ids))
+        names = list(self.columns) if columns is None else columns
+        return pl.DataFrame(
+            [pl.Series(key, ids)] + [self.columns[name].gather(idx) for name in names]
+        )
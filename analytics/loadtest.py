@@ -0,0 +1,336 @@
+"""
+Concurrent-session load test for the dashboard, without a browser.
+
+Each simulated user is a Streamlit `AppTest` session on app.py. It opens
+every page in the app's navigation (read from the `st.Page(...)` calls in
+app.py), then works the Model Output page in Sensitivity mode: moves the
+mail cost / margin / multiplier inputs, switches the cutoff rule, drags
+Top-N and toggles the cutoff line, uploads a synthetic NN results file and a suppression list, and
+downloads the Wave-2 export. `sessions` users run at once on a thread pool,
+as a Streamlit server runs session scripts on threads of one process, so
+st.cache_data / st.cache_resource are shared the way they are in a pod.
+
+Every rerun is timed; the report gives p50 / p95 / p99 latency overall and
+per action (page opens per page), errors, and process RSS (sampled in the
+background) for each concurrency level.
+
+AppTest gives every run its own in-memory media store, so a session could
+not read back its own download while others are running. The harness
+points AppTest at a single shared store for the duration of the test.
+
+    python -m analytics.loadtest --sessions 1,4,8 --actions 20 --out bench_results/load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import polars as pl
+
+from analytics.bench import environment, synthetic_ranked
+from analytics.bundle import BASE_DIR
+
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+SENSITIVITY_PAGE = "pages/Model Output Visualization.py"
+ACTIONS = [
+    "mail_cost",
+    "margin",
+    "multiplier",
+    "top_n",
+    "cutoff_line",
+    "upload_results",
+    "upload_suppression",
+    "download",
+]
+TIMEOUT = 300
+RSS_INTERVAL = 0.2
+UPLOAD_ROWS = 22_500
+
+
+def navigation_pages(app_path: str = APP_PATH) -> list[str]:
+    """Script paths of the `st.Page(...)` entries in app.py, in order."""
+    with open(app_path) as f:
+        tree = ast.parse(f.read())
+    return [
+        node.args[0].value
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Call)
+        and getattr(node.func, "attr", None) == "Page"
+        and node.args
+        and isinstance(node.args[0], ast.Constant)
+    ]
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RssSampler:
+    """Background thread recording RSS every `interval` seconds."""
+
+    def __init__(self, interval: float = RSS_INTERVAL):
+        self.interval = interval
+        self.samples: list[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.samples.append(rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(rss_bytes())
+
+
+@contextmanager
+def shared_media_storage():
+    """Make every AppTest run use one in-memory media store (so downloads can be read)."""
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    storage = MemoryMediaFileStorage("/mock/media")
+    original = app_test.MemoryMediaFileStorage
+    app_test.MemoryMediaFileStorage = lambda endpoint: storage
+    try:
+        yield storage
+    finally:
+        app_test.MemoryMediaFileStorage = original
+
+
+# ---------------------------------------------------------------------------
+# One simulated user
+# ---------------------------------------------------------------------------
+
+
+def _open_action(page: str) -> str:
+    return "open " + os.path.splitext(os.path.basename(page))[0]
+
+
+@dataclass
+class Rerun:
+    session: int
+    page: str
+    action: str
+    seconds: float
+    error: str | None = None
+
+
+class Session:
+    def __init__(self, number: int, storage, upload_rows: int = UPLOAD_ROWS, seed: int = 0):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.storage = storage
+        self.rng = np.random.default_rng(seed + number)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=TIMEOUT)
+        self.upload_rows = upload_rows
+        self.page = "app.py"
+        self.reruns: list[Rerun] = []
+
+    def _timed(self, action: str, prepare=None) -> None:
+        start = time.perf_counter()
+        error = None
+        try:
+            if prepare is not None:
+                prepare()
+            self.app.run()
+            if self.app.exception:
+                error = self.app.exception[0].message
+        except Exception as exc:  # a failed rerun is a data point, not a crash
+            error = f"{type(exc).__name__}: {exc}"
+        self.reruns.append(Rerun(self.number, self.page, action, time.perf_counter() - start, error))
+
+    def _sidebar(self, kind: str, label: str):
+        return next(w for w in getattr(self.app.sidebar, kind) if w.label == label)
+
+    def open_pages(self, pages: list[str]) -> None:
+        self._timed("load")
+        for page in pages:
+            self.page = page
+            self._timed(_open_action(page), lambda: self.app.switch_page(page))
+
+    def sensitivity(self, n_actions: int) -> None:
+        self.page = SENSITIVITY_PAGE
+        self._timed(_open_action(SENSITIVITY_PAGE), lambda: self.app.switch_page(SENSITIVITY_PAGE))
+        self._timed("mode", lambda: self._sidebar("radio", "Mode").set_value("Sensitivity (interactive)"))
+        for action in self.rng.choice(ACTIONS, size=n_actions):
+            getattr(self, f"_{action}")()
+
+    # -- Sensitivity actions -------------------------------------------------
+    def _mail_cost(self) -> None:
+        value = round(float(self.rng.uniform(0.8, 2.5)), 2)
+        self._timed("mail_cost", lambda: self.app.number_input(key="mail_cost").set_value(value))
+
+    def _margin(self) -> None:
+        value = float(self.rng.integers(40, 90))
+        self._timed("margin", lambda: self.app.number_input(key="margin").set_value(value))
+
+    def _multiplier(self) -> None:
+        value = round(float(self.rng.integers(2, 21)) * 0.05, 2)
+        self._timed("multiplier", lambda: self.app.slider(key="mult").set_value(value))
+
+    def _top_n(self) -> None:
+        rule = self.app.radio(key="cutoff_rule")
+        if rule.value != "Mail Top-N customers":
+            self._timed("cutoff_rule", lambda: rule.set_value("Mail Top-N customers"))
+        value = int(self.rng.integers(1, 226)) * 100
+        self._timed("top_n", lambda: self.app.slider(key="top_n").set_value(value))
+
+    def _cutoff_line(self) -> None:
+        toggle = self.app.checkbox(key="show_cutoff_line")
+        self._timed("cutoff_line", lambda: toggle.set_value(not toggle.value))
+
+    def _upload_results(self) -> None:
+        data = synthetic_ranked(self.upload_rows, seed=int(self.rng.integers(1 << 31))).write_csv().encode()
+        uploader = self._sidebar("file_uploader", "Upload NN results CSV (optional)")
+        self._timed("upload_results", lambda: uploader.upload("nn_results.csv", data, "text/csv"))
+
+    def _upload_suppression(self) -> None:
+        ids = self.rng.choice(75_000, size=500, replace=False) + 1
+        data = pl.DataFrame({"id": ids}).write_csv().encode()
+        uploader = self._sidebar("file_uploader", "Upload suppression list CSV (optional)")
+        self._timed("upload_suppression", lambda: uploader.upload("suppression.csv", data, "text/csv"))
+
+    def _download(self) -> None:
+        button = next(
+            (b for b in self.app.get("download_button") if b.label.startswith("Download Wave-2")), None
+        )
+        if button is None:
+            self.reruns.append(Rerun(self.number, self.page, "download", 0.0, "download button not found"))
+            return
+        self._timed("download", button.click)
+        name = button.proto.url.rsplit("/", 1)[-1]
+        try:
+            content = self.storage.get_file(name).content
+            ok = content.startswith(b"id,mailto_wave2")
+        except Exception:
+            ok = False
+        if not ok:
+            self.reruns[-1].error = self.reruns[-1].error or "export not readable"
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+
+def _session(number: int, storage, pages: list[str], n_actions: int, upload_rows: int, seed: int):
+    session = Session(number, storage, upload_rows, seed)
+    session.open_pages(pages)
+    session.sensitivity(n_actions)
+    return session.reruns
+
+
+def _percentiles(seconds: list[float]) -> dict:
+    values = np.asarray(seconds)
+    return {
+        "count": len(values),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def run_load_test(
+    sessions: int,
+    n_actions: int = 20,
+    upload_rows: int = UPLOAD_ROWS,
+    seed: int = 0,
+    storage=None,
+) -> dict:
+    """Run `sessions` simulated users at once; latency and RSS summary."""
+    pages = navigation_pages()
+    start = time.perf_counter()
+    with RssSampler() as rss, ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(_session, i, storage, pages, n_actions, upload_rows, seed) for i in range(sessions)
+        ]
+        reruns = [r for f in futures for r in f.result()]
+    wall = time.perf_counter() - start
+
+    frame = pl.DataFrame([asdict(r) for r in reruns])
+    by_action = {
+        action: _percentiles(group["seconds"].to_list())
+        for (action,), group in frame.group_by("action", maintain_order=True)
+    }
+    errors = frame.filter(pl.col("error").is_not_null())
+    return {
+        "sessions": sessions,
+        "wall_seconds": wall,
+        "reruns": _percentiles(frame["seconds"].to_list()),
+        "by_action": by_action,
+        "errors": errors.height,
+        "error_samples": errors.select("page", "action", "error").head(5).to_dicts(),
+        "rss_start_mb": rss.samples[0] / 1e6,
+        "rss_peak_mb": max(rss.samples) / 1e6,
+        "rss_end_mb": rss.samples[-1] / 1e6,
+    }
+
+
+def run_levels(levels: list[int], n_actions: int, upload_rows: int, seed: int, warmup: bool = True) -> dict:
+    with shared_media_storage() as storage:
+        if warmup:
+            # Fill the shared caches first so levels measure steady-state reruns
+            run_load_test(1, n_actions=len(ACTIONS), upload_rows=upload_rows, seed=seed, storage=storage)
+        results = []
+        for sessions in levels:
+            result = run_load_test(sessions, n_actions, upload_rows, seed, storage)
+            r = result["reruns"]
+            print(
+                f"{sessions:>3} sessions  p50 {r['p50']:.2f}s  p95 {r['p95']:.2f}s  p99 {r['p99']:.2f}s  "
+                f"peak RSS {result['rss_peak_mb']:.0f} MB  errors {result['errors']}",
+                file=sys.stderr,
+            )
+            results.append(result)
+    return {"meta": environment(), "levels": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m analytics.loadtest")
+    parser.add_argument("--sessions", default="1,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--actions", type=int, default=20, help="Sensitivity interactions per session")
+    parser.add_argument("--upload-rows", type=int, default=UPLOAD_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--out", default=None, help="JSON output path (default: stdout)")
+    args = parser.parse_args()
+
+    report = run_levels(
+        [int(s) for s in args.sessions.split(",")],
+        args.actions,
+        args.upload_rows,
+        args.seed,
+        warmup=not args.no_warmup,
+    )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,181 @@
+"""
+Logistic regression baseline: design matrix, IRLS fit and fitted-model container.
+
+The design follows the Logistic Regression page: one-hot `zip_bins` and
+`sex` (first level is the baseline) plus the flags and numeric inputs
+entered linearly. `fit_logit` solves it with vectorized Newton/IRLS steps in
+NumPy (no statsmodels/pyrsm needed at dashboard startup) and caches fitted
+models by a digest of the training data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import polars as pl
+
+LOGIT_CATEGORICAL = ["zip_bins", "sex"]
+LOGIT_NUMERIC = [
+    "bizflag",
+    "numords",
+    "dollars",
+    "last",
+    "sincepurch",
+    "version1",
+    "owntaxprod",
+    "upgraded",
+]
+LOGIT_TARGET = "res1_yes"
+
+
+def design_levels(df: pl.DataFrame, categorical: list[str] = LOGIT_CATEGORICAL) -> dict:
+    """Sorted levels per categorical column (the first one is the baseline)."""
+    return {
+        col: sorted(df[col].cast(pl.String).unique().drop_nulls().to_list(), key=_level_key)
+        for col in categorical
+    }
+
+
+def _level_key(level: str):
+    # Numeric-looking levels (zip_bins) sort numerically, others alphabetically
+    try:
+        return (0, float(level), "")
+    except ValueError:
+        return (1, 0.0, level)
+
+
+def design_matrix(
+    df: pl.DataFrame,
+    levels: dict,
+    numeric: list[str] = LOGIT_NUMERIC,
+) -> tuple[np.ndarray, list[str]]:
+    """Intercept + dummies (all but the baseline level) + numeric columns."""
+    names = ["Intercept"]
+    blocks = [np.ones((df.height, 1))]
+    for col, col_levels in levels.items():
+        values = df[col].cast(pl.String).to_numpy()
+        for level in col_levels[1:]:
+            names.append(f"{col}[{level}]")
+            blocks.append((values == level).astype(np.float64)[:, None])
+    for col in numeric:
+        names.append(col)
+        blocks.append(df[col].cast(pl.Float64).to_numpy()[:, None])
+    return np.hstack(blocks), names
+
+
+@dataclass
+class LogitModel:
+    names: list[str]
+    coef: np.ndarray
+    levels: dict
+    numeric: list[str] = field(default_factory=lambda: list(LOGIT_NUMERIC))
+    se: np.ndarray | None = None
+    n_obs: int = 0
+    n_iter: int = 0
+    fit_seconds: float = 0.0
+
+    def linear_predictor(self, df: pl.DataFrame) -> np.ndarray:
+        X, _ = design_matrix(df, self.levels, self.numeric)
+        return X @ self.coef
+
+    def predict_proba(self, df: pl.DataFrame) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-self.linear_predictor(df)))
+
+    def term(self, name: str) -> float:
+        return float(self.coef[self.names.index(name)])
+
+    def coefficient_table(self) -> pl.DataFrame:
+        """Coefficients, standard errors, Wald z / p-values and odds ratios (95% CI)."""
+        se = self.se if self.se is not None else np.full(len(self.coef), np.nan)
+        z = self.coef / se
+        p_value = np.array([math.erfc(abs(v) / math.sqrt(2.0)) for v in z])
+        return pl.DataFrame(
+            {
+                "term": self.names,
+                "coefficient": self.coef,
+                "std_error": se,
+                "z": z,
+                "p_value": p_value,
+                "odds_ratio": np.exp(self.coef),
+                "or_low": np.exp(self.coef - 1.959964 * se),
+                "or_high": np.exp(self.coef + 1.959964 * se),
+            }
+        )
+
+
+def fit_irls(
+    X: np.ndarray,
+    y: np.ndarray,
+    tol: float = 1e-8,
+    max_iter: int = 50,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Newton/IRLS for the logit likelihood. Returns (coef, std_error, iterations).
+    Stops when the relative change in deviance falls below `tol`.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    beta = np.zeros(X.shape[1])
+    deviance = np.inf
+    for it in range(1, max_iter + 1):
+        eta = X @ beta
+        p = 1.0 / (1.0 + np.exp(-eta))
+        w = p * (1.0 - p)
+        hessian = X.T @ (X * w[:, None])
+        beta = beta + np.linalg.solve(hessian, X.T @ (y - p))
+
+        eta = X @ beta
+        # -2 log-likelihood, written to stay finite for large |eta|
+        new_deviance = 2.0 * np.sum(np.logaddexp(0.0, eta) - y * eta)
+        if abs(deviance - new_deviance) <= tol * (abs(new_deviance) + 0.1):
+            deviance = new_deviance
+            break
+        deviance = new_deviance
+    else:
+        raise RuntimeError(f"IRLS did not converge in {max_iter} iterations.")
+
+    p = 1.0 / (1.0 + np.exp(-(X @ beta)))
+    hessian = X.T @ (X * (p * (1.0 - p))[:, None])
+    se = np.sqrt(np.diag(np.linalg.inv(hessian)))
+    return beta, se, it
+
+
+def data_digest(df: pl.DataFrame, columns: list[str]) -> str:
+    """Content hash of the given columns (used as the in-process fit cache key)."""
+    h = hashlib.sha256("\x1f".join(columns).encode())
+    h.update(df.select(columns).hash_rows(seed=0).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+_FIT_CACHE: dict[str, LogitModel] = {}
+_FIT_CACHE_SIZE = 8
+
+
+def fit_logit(df: pl.DataFrame, target: str = LOGIT_TARGET) -> LogitModel:
+    """Fit the baseline design on `df`, reusing a cached fit for identical data."""
+    columns = [*LOGIT_CATEGORICAL, *LOGIT_NUMERIC, target]
+    digest = data_digest(df, columns)
+    if digest in _FIT_CACHE:
+        return _FIT_CACHE[digest]
+
+    start = time.perf_counter()
+    levels = design_levels(df)
+    X, names = design_matrix(df, levels)
+    coef, se, n_iter = fit_irls(X, df[target].to_numpy())
+    model = LogitModel(
+        names=names,
+        coef=coef,
+        levels=levels,
+        se=se,
+        n_obs=df.height,
+        n_iter=n_iter,
+        fit_seconds=time.perf_counter() - start,
+    )
+
+    if len(_FIT_CACHE) >= _FIT_CACHE_SIZE:
+        _FIT_CACHE.pop(next(iter(_FIT_CACHE)))
+    _FIT_CACHE[digest] = model
+    return model
@@ -0,0 +1,148 @@
+"""
+Lookup-table scorer compiled from a fitted logistic model.
+
+A logit is additive in its inputs, so each categorical feature's
+contribution to the log-odds can be precomputed as one table per level
+set. Numeric terms are linear and stay exact as `coef * x`, whatever the
+value's range. Scoring is then one gather per categorical feature, one
+multiply per numeric one, a sum and a sigmoid, with no design matrix.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import polars as pl
+
+from analytics.logit import LogitModel
+
+@dataclass
+class FeatureTable:
+    column: str
+    values: np.ndarray  # log-odds contribution per slot
+    levels: np.ndarray  # sorted level labels
+
+    def __post_init__(self):
+        self._numeric_levels = None
+        try:
+            numeric = self.levels.astype(np.float64)
+        except ValueError:
+            return
+        order = np.argsort(numeric)
+        self._numeric_levels = (numeric[order], order + 1)
+
+    def slots(self, x) -> np.ndarray:
+        """Table slot per value; unseen levels map to slot 0 (the baseline)."""
+        if isinstance(x, pl.Series) and not x.dtype.is_numeric():
+            mapping = {label: i + 1 for i, label in enumerate(self.levels.tolist())}
+            return (
+                x.cast(pl.String)
+                .replace_strict(mapping, default=0, return_dtype=pl.Int64)
+                .to_numpy()
+            )
+
+        x = x.to_numpy() if isinstance(x, pl.Series) else np.asarray(x)
+        if self._numeric_levels is not None and np.issubdtype(x.dtype, np.number):
+            keys, slot_of = self._numeric_levels
+            at = np.clip(np.searchsorted(keys, x), 0, len(keys) - 1)
+            return np.where(keys[at] == x, slot_of[at], 0)
+
+        x = x.astype(str)
+        at = np.clip(np.searchsorted(self.levels, x), 0, len(self.levels) - 1)
+        return np.where(self.levels[at] == x, at + 1, 0)
+
+    def contribution(self, x: np.ndarray) -> np.ndarray:
+        return self.values[self.slots(x)]
+
+
+@dataclass
+class LookupScorer:
+    intercept: float
+    tables: list[FeatureTable]  # categorical terms
+    linear: dict[str, float] = field(default_factory=dict)  # numeric column -> coefficient
+
+    def log_odds(self, data) -> np.ndarray:
+        """`data` is anything indexable by column name (DataFrame or dict of arrays)."""
+        z = None
+        for table in self.tables:
+            part = table.contribution(_column(data, table.column))
+            z = part if z is None else z + part
+        for col, coef in self.linear.items():
+            part = coef * _numeric(data, col)
+            z = part if z is None else z + part
+        return self.intercept + (0.0 if z is None else z)
+
+    def score(self, data) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-self.log_odds(data)))
+
+    @property
+    def n_entries(self) -> int:
+        return sum(len(t.values) for t in self.tables) + len(self.linear)
+
+    def save(self, path: str) -> None:
+        arrays = {
+            "intercept": np.array([self.intercept]),
+            "linear_columns": np.array(list(self.linear), dtype=str),
+            "linear_coefs": np.array(list(self.linear.values()), dtype=np.float64),
+        }
+        for i, t in enumerate(self.tables):
+            arrays[f"t{i}_column"] = np.array(t.column)
+            arrays[f"t{i}_values"] = t.values
+            arrays[f"t{i}_levels"] = t.levels
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LookupScorer":
+        with np.load(path) as f:
+            tables = []
+            i = 0
+            while f"t{i}_values" in f:
+                tables.append(
+                    FeatureTable(
+                        column=str(f[f"t{i}_column"]),
+                        values=f[f"t{i}_values"],
+                        levels=f[f"t{i}_levels"],
+                    )
+                )
+                i += 1
+            linear = {
+                str(col): float(coef)
+                for col, coef in zip(f["linear_columns"], f["linear_coefs"])
+            }
+            return cls(intercept=float(f["intercept"][0]), tables=tables, linear=linear)
+
+
+def _column(data, name: str):
+    col = data[name]
+    return col if isinstance(col, pl.Series) else np.asarray(col)
+
+
+def _numeric(data, name: str) -> np.ndarray:
+    col = _column(data, name)
+    if isinstance(col, pl.Series):
+        return col.cast(pl.Float64).to_numpy()
+    return col.astype(np.float64)
+
+
+def compile_logit(model: LogitModel) -> LookupScorer:
+    """Turn `model` into per-level tables for its categorical terms and exact numeric coefficients."""
+    tables = []
+
+    for col, col_levels in model.levels.items():
+        labels = np.array([str(level) for level in col_levels])
+        coefs = np.array(
+            [0.0] + [model.term(f"{col}[{level}]") for level in col_levels[1:]]
+        )
+        order = np.argsort(labels)
+        # slot 0 = unseen level (baseline), slots 1.. follow the sorted labels
+        tables.append(
+            FeatureTable(
+                column=col,
+                values=np.concatenate([[0.0], coefs[order]]),
+                levels=labels[order],
+            )
+        )
+
+    linear = {col: model.term(col) for col in model.numeric}
+    return LookupScorer(intercept=model.term("Intercept"), tables=tables, linear=linear)
@@ -0,0 +1,51 @@
+"""
+Model evaluation metrics computed directly in NumPy.
+
+`auc` uses the rank-sum (Mann-Whitney) identity with average ranks for ties,
+so it needs one sort instead of building the ROC curve. Lift and profit
+work off a single descending sort of the scores and a cumulative sum.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.stats import rankdata
+
+
+def auc(y: np.ndarray, score: np.ndarray) -> float:
+    """Area under the ROC curve for binary labels `y` (1 = responder)."""
+    y = np.asarray(y).astype(bool)
+    n_pos = int(y.sum())
+    n_neg = len(y) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("AUC needs at least one positive and one negative label.")
+    ranks = rankdata(score)
+    return float((ranks[y].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def top_decile_lift(y: np.ndarray, score: np.ndarray, fraction: float = 0.10) -> float:
+    """Response rate in the top `fraction` by score divided by the overall rate."""
+    y = np.asarray(y, dtype=np.float64)
+    n_top = max(1, int(round(fraction * len(y))))
+    top = np.argsort(-np.asarray(score), kind="stable")[:n_top]
+    overall = y.mean()
+    return float(y[top].mean() / overall) if overall > 0 else float("nan")
+
+
+def best_profit(
+    y: np.ndarray,
+    score: np.ndarray,
+    mail_cost: float,
+    margin: float,
+    decay: float = 1.0,
+) -> tuple[float, int]:
+    """
+    Realized profit when mailing the top-k by score, at the k that maximizes it:
+    margin * decay * responders(k) - mail_cost * k. Returns (profit, k).
+    """
+    order = np.argsort(-np.asarray(score), kind="stable")
+    cum = np.cumsum(margin * decay * np.asarray(y, dtype=np.float64)[order] - mail_cost)
+    k = int(np.argmax(cum))
+    if cum[k] <= 0:
+        return 0.0, 0
+    return float(cum[k]), k + 1
@@ -0,0 +1,210 @@
+"""
+Incremental model updates from Wave-2 response events.
+
+Responses trickle in for weeks after the Wave-2 drop; retraining offline
+and regenerating every scored file for each batch is wasteful. This
+module updates the fitted logit in place instead:
+
+- `OnlineLogit` keeps the logit's coefficients and its Fisher information
+  (a Laplace approximation of everything seen so far) and folds each
+  response batch in with warm-started Newton steps, so an update costs
+  O(batch) and needs no training history. Wave-2 outcomes enter with an
+  offset of log(decay): the model stays on the Wave-1 scale the pages
+  already multiply by the Wave-2 decay.
+- `IncrementalScores` keeps every customer's log-odds as a sum of
+  lookup-table and numeric-term contributions (analytics.logit_lookup)
+  and, after an update, re-gathers only the table slots whose contribution
+  moved by more than `tol`, i.e. only the affected segments; a numeric
+  term is reapplied once its coefficient change moves some customer by
+  more than `tol`. Smaller moves stay pending until they accumulate, so
+  each term is always within `tol` of exact.
+
+`OnlineScoring` ties these to the append-only event log for the dashboard.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+import polars as pl
+
+from analytics.events import EventLog
+from analytics.logit import LogitModel, design_matrix
+from analytics.logit_lookup import LookupScorer, compile_logit
+
+WAVE2_DECAY = 0.50
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def logit_precision(X: np.ndarray, coef: np.ndarray) -> np.ndarray:
+    """Fisher information X'WX of a logit at `coef`."""
+    p = _sigmoid(X @ coef)
+    return X.T @ (X * (p * (1.0 - p))[:, None])
+
+
+@dataclass
+class OnlineLogit:
+    model: LogitModel
+    precision: np.ndarray
+    offset: float = float(np.log(WAVE2_DECAY))
+    n_seen: int = 0
+    n_updates: int = 0
+
+    @classmethod
+    def from_training(
+        cls, model: LogitModel, train: pl.DataFrame, decay: float = WAVE2_DECAY
+    ) -> "OnlineLogit":
+        X, _ = design_matrix(train, model.levels, model.numeric)
+        return cls(model, logit_precision(X, model.coef), float(np.log(decay)))
+
+    def update(
+        self, batch: pl.DataFrame, y: np.ndarray, max_steps: int = 10, tol: float = 1e-8
+    ) -> "OnlineLogit":
+        """
+        Posterior mode given the previous fit (as a Gaussian prior) and the
+        batch: minimizes 0.5 (b - b0)' H0 (b - b0) + batch negative log-likelihood.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        X, _ = design_matrix(batch, self.model.levels, self.model.numeric)
+        b0, H0 = self.model.coef, self.precision
+        b = b0.copy()
+        for _ in range(max_steps):
+            p = _sigmoid(X @ b + self.offset)
+            grad = H0 @ (b - b0) - X.T @ (y - p)
+            hessian = H0 + X.T @ (X * (p * (1.0 - p))[:, None])
+            step = np.linalg.solve(hessian, grad)
+            b = b - step
+            if np.max(np.abs(step)) < tol:
+                break
+
+        p = _sigmoid(X @ b + self.offset)
+        precision = H0 + X.T @ (X * (p * (1.0 - p))[:, None])
+        model = replace(
+            self.model,
+            coef=b,
+            se=np.sqrt(np.diag(np.linalg.inv(precision))),
+            n_obs=self.model.n_obs + len(y),
+        )
+        return replace(
+            self,
+            model=model,
+            precision=precision,
+            n_seen=self.n_seen + len(y),
+            n_updates=self.n_updates + 1,
+        )
+
+
+class IncrementalScores:
+    """Per-customer log-odds kept as lookup-table contributions, refreshed lazily."""
+
+    def __init__(self, scorer: LookupScorer, data: pl.DataFrame, tol: float = 1e-3):
+        self.tol = tol
+        self.intercept = scorer.intercept
+        self.slots = [t.slots(data[t.column]) for t in scorer.tables]
+        self.applied = [t.values.copy() for t in scorer.tables]
+        self.x = {col: data[col].cast(pl.Float64).to_numpy() for col in scorer.linear}
+        self.coefs = dict(scorer.linear)
+        self.log_odds = np.zeros(data.height)
+        for values, slots in zip(self.applied, self.slots):
+            self.log_odds += values[slots]
+        for col, coef in self.coefs.items():
+            self.log_odds += coef * self.x[col]
+
+    def refresh(self, scorer: LookupScorer) -> int:
+        """Apply a recompiled scorer; returns how many customers were rescored."""
+        if len(scorer.tables) != len(self.applied) or scorer.linear.keys() != self.coefs.keys():
+            raise ValueError("Scorer terms do not match the cached contributions.")
+        # The intercept shifts everyone equally (ranking unchanged), so it stays a scalar
+        self.intercept = scorer.intercept
+        touched = np.zeros(len(self.log_odds), dtype=bool)
+        for table, applied, slots in zip(scorer.tables, self.applied, self.slots):
+            if len(table.values) != len(applied):
+                raise ValueError(f"Table '{table.column}' changed shape; rebuild the scores.")
+            diff = table.values - applied
+            moved = np.abs(diff) > self.tol
+            if not moved.any():
+                continue
+            rows = np.flatnonzero(moved[slots])
+            self.log_odds[rows] += diff[slots[rows]]
+            applied[moved] = table.values[moved]
+            touched[rows] = True
+        for col, coef in scorer.linear.items():
+            # A numeric term moves every customer by (coef change) * x
+            x = self.x[col]
+            diff = coef - self.coefs[col]
+            if np.abs(diff * x).max(initial=0.0) <= self.tol:
+                continue
+            rows = np.flatnonzero(x)
+            self.log_odds[rows] += diff * x[rows]
+            self.coefs[col] = coef
+            touched[rows] = True
+        return int(touched.sum())
+
+    def probabilities(self) -> np.ndarray:
+        return _sigmoid(self.intercept + self.log_odds)
+
+
+class OnlineScoring:
+    """
+    An online logit over a fixed customer population (e.g. the mailable
+    list) fed by the event log. `sync()` is cheap when nothing is new and
+    safe to call from concurrent dashboard sessions.
+    """
+
+    LABELS = {"responded": 1.0, "no_response": 0.0}
+
+    def __init__(
+        self,
+        learner: OnlineLogit,
+        population: pl.DataFrame,
+        log: EventLog | None = None,
+        tol: float = 1e-3,
+    ):
+        self.learner = learner
+        self.population = population.sort("id")
+        self.ids = self.population["id"].to_numpy()
+        self.log = log or EventLog()
+        self.offset = 0
+        self.version = 0
+        self.history: list[dict] = []
+        self.scores = IncrementalScores(self._compile(), self.population, tol)
+        self._lock = threading.Lock()
+
+    def _compile(self) -> LookupScorer:
+        return compile_logit(self.learner.model)
+
+    def sync(self) -> dict | None:
+        """Fold any new response events into the model; returns the update summary."""
+        with self._lock:
+            events, self.offset = self.log.read_since(self.offset)
+            labeled = events.filter(pl.col("event").is_in(list(self.LABELS)))
+            if labeled.height == 0:
+                return None
+
+            start = time.perf_counter()
+            batch = labeled.join(self.population, on="id", how="inner")
+            if batch.height == 0:
+                return None
+            y = batch["event"].replace_strict(self.LABELS, return_dtype=pl.Float64).to_numpy()
+            self.learner = self.learner.update(batch, y)
+            rescored = self.scores.refresh(self._compile())
+            self.version += 1
+            summary = {
+                "version": self.version,
+                "events": batch.height,
+                "responses": int(y.sum()),
+                "rescored": rescored,
+                "seconds": time.perf_counter() - start,
+            }
+            self.history.append(summary)
+            return summary
+
+    def probabilities(self) -> np.ndarray:
+        """Current Wave-1-scale response probability per customer, in `ids` order."""
+        return self.scores.probabilities()
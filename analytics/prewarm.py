@@ -0,0 +1,271 @@
+"""
+Background cache warm-up at server start.
+
+The first visitor after a deploy would otherwise pay for reading the
+bundle, building the ranked profit tables, the KPIs and the Report-mode
+charts. `start_prewarm()` starts one daemon thread per process that fills
+the shared computation graph (analytics.dag) step by step:
+
+    data           holdout columns of data/bundle.parquet
+    profit_tables  ranked tables for every model under course economics
+    kpis           cutoff, projection, AUC / lift and breakeven
+    figures        Report-mode profit and segment charts of the selectable models
+
+Streamlit has no server-start hook: `streamlit run app.py` only executes
+app.py when a browser session connects, so warming from app.py alone
+starts with the first visitor. Launch the server through this module
+instead to warm up before any traffic (arguments after `serve` go to
+`streamlit run`):
+
+    python -m analytics.prewarm serve --server.port 8501
+
+app.py still calls `start_prewarm()` (a no-op once started), which covers
+plain `streamlit run` deployments from the first session on.
+
+Later calls return the same `Prewarmer`, whose `status()` says which steps
+are done. The status is also written as JSON after every step, to a file
+named after the server's pid, so a readiness probe can check it from
+outside the process; files of processes that are gone are ignored and
+cleared at the next start:
+
+    python -m analytics.prewarm status [PID]   # exit 0 once a live server is ready
+    python -m analytics.prewarm run            # warm up in-process and time it
+"""
+
+from __future__ import annotations
+
+import atexit
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from analytics.dag import MODELS, ComputeGraph, dashboard_graph
+
+STEPS = ["data", "profit_tables", "kpis", "figures"]
+FIGURE_MODELS = ["nn", "gbt"]  # score sources the Model Output page can chart
+STATUS_DIR = tempfile.gettempdir()
+STATUS_PREFIX = "quickbooks-prewarm-"
+
+
+def status_path(pid: int | None = None, directory: str = STATUS_DIR) -> str:
+    """Status file of the server process `pid` (this process by default)."""
+    return os.path.join(directory, f"{STATUS_PREFIX}{pid or os.getpid()}.json")
+
+
+STATUS_PATH = status_path()
+
+
+@dataclass
+class StepStatus:
+    name: str
+    state: str = "pending"  # pending | running | done | failed
+    seconds: float | None = None
+    error: str | None = None
+
+
+def _data(graph: ComputeGraph) -> None:
+    graph.get("holdout")
+
+
+def _profit_tables(graph: ComputeGraph) -> None:
+    for model in MODELS:
+        graph.get("ranked", model=model)
+
+
+def _kpis(graph: ComputeGraph) -> None:
+    for model in MODELS:
+        graph.get("cutoff", model=model)
+        graph.get("metrics", model=model)
+    graph.get("projection")
+    graph.get("breakeven")
+
+
+def _figures(graph: ComputeGraph) -> None:
+    for model in FIGURE_MODELS:
+        graph.get("charts", model=model)
+        graph.get("segment_chart", model=model)
+
+
+STEP_FUNCTIONS = {
+    "data": _data,
+    "profit_tables": _profit_tables,
+    "kpis": _kpis,
+    "figures": _figures,
+}
+
+
+class Prewarmer:
+    def __init__(self, graph: ComputeGraph | None = None, status_path: str | None = STATUS_PATH):
+        self.graph = graph
+        self.status_path = status_path
+        self.steps = [StepStatus(name) for name in STEPS]
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "Prewarmer":
+        with self._lock:
+            if self._thread is None:
+                self.started = time.time()
+                if self.status_path is not None:
+                    remove_stale_status(os.path.dirname(self.status_path))
+                    self._write()  # "not ready" before the first step runs
+                    atexit.register(self._remove)
+                self._thread = threading.Thread(target=self.run, name="prewarm", daemon=True)
+                self._thread.start()
+        return self
+
+    def run(self) -> None:
+        graph = self.graph or dashboard_graph()
+        self._write()
+        for step in self.steps:
+            step.state = "running"
+            self._write()
+            start = time.perf_counter()
+            try:
+                STEP_FUNCTIONS[step.name](graph)
+                step.state = "done"
+            except Exception as exc:  # a failed step leaves the cache cold, not the app down
+                step.state = "failed"
+                step.error = f"{type(exc).__name__}: {exc}"
+            step.seconds = time.perf_counter() - start
+            self._write()
+        self.finished = time.time()
+        self._done.set()
+        self._write()
+
+    @property
+    def ready(self) -> bool:
+        return all(step.state == "done" for step in self.steps)
+
+    @property
+    def finished_steps(self) -> int:
+        return sum(step.state in ("done", "failed") for step in self.steps)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the warm-up finished (or `timeout`); returns readiness."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "finished": self._done.is_set(),
+            "pid": os.getpid(),
+            "started": self.started,
+            "seconds": (self.finished or time.time()) - self.started if self.started else None,
+            "steps": [asdict(step) for step in self.steps],
+        }
+
+    def _write(self) -> None:
+        if self.status_path is None:
+            return
+        tmp = f"{self.status_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.status(), f, indent=2)
+            os.replace(tmp, self.status_path)
+        except OSError:
+            pass  # status file is best effort; status() is authoritative
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.status_path)
+        except OSError:
+            pass
+
+
+_PREWARMER: Prewarmer | None = None
+_PREWARMER_LOCK = threading.Lock()
+
+
+def start_prewarm() -> Prewarmer:
+    """Start the process-wide warm-up once; later calls return the same instance."""
+    global _PREWARMER
+    with _PREWARMER_LOCK:
+        if _PREWARMER is None:
+            _PREWARMER = Prewarmer().start()
+        return _PREWARMER
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def _load(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_stale_status(directory: str = STATUS_DIR) -> list[str]:
+    """Delete status files whose server process is gone; returns the paths removed."""
+    removed = []
+    for path in glob.glob(os.path.join(directory, f"{STATUS_PREFIX}*.json")):
+        status = _load(path)
+        if status is None or not _alive(status.get("pid", 0)):
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+    return removed
+
+
+def read_status(pid: int | None = None, directory: str = STATUS_DIR) -> dict | None:
+    """
+    Status written by the live server process `pid`; without a pid, the most
+    recently started live one. Files left by dead processes are ignored.
+    """
+    paths = (
+        [status_path(pid, directory)]
+        if pid is not None
+        else glob.glob(os.path.join(directory, f"{STATUS_PREFIX}*.json"))
+    )
+    live = [
+        status
+        for status in map(_load, paths)
+        if status is not None and status.get("pid") and _alive(status["pid"])
+    ]
+    return max(live, key=lambda status: status["started"] or 0, default=None)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "run":
+        prewarmer = Prewarmer(status_path=None)
+        prewarmer.run()
+        for step in prewarmer.steps:
+            print(f"{step.name:<14} {step.state:<7} {step.seconds:7.2f}s  {step.error or ''}")
+        sys.exit(0 if prewarmer.ready else 1)
+    elif command == "status":
+        pid = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        status = read_status(pid)
+        print(json.dumps(status, indent=2) if status else f"No live warm-up status in {STATUS_DIR}")
+        sys.exit(0 if status and status["ready"] else 1)
+    elif command == "serve":
+        from streamlit.web import cli
+
+        from analytics import prewarm  # this file runs as __main__; app.py uses the package module
+        from analytics.bundle import BASE_DIR
+
+        prewarm.start_prewarm()
+        sys.argv = ["streamlit", "run", os.path.join(BASE_DIR, "app.py"), *sys.argv[2:]]
+        sys.exit(cli.main())
+    else:
+        sys.exit("usage: python -m analytics.prewarm [status [PID]|run|serve [STREAMLIT ARGS]]")
@@ -0,0 +1,67 @@
+"""
+Expected-profit ranking for the Wave-2 mailing decision.
+
+The Model Output page turns a scored file into a ranked list:
+EP = margin * p_wave1 * mult - mail_cost, sorted descending, with a running
+cumulative profit, and exports the customers above the cutoff as the
+`id, mailto_wave2` submission. These steps live here rather than in the page
+so they can be benchmarked and reused without a Streamlit session.
+"""
+
+from __future__ import annotations
+
+import polars as pl
+
+from analytics.suppression import SuppressionIndex
+
+# Raw Wave-1 probabilities first; Wave-2 columns already carry the decay
+PROB_CANDIDATES = [
+    "p_nn",
+    "pred_prob_nn",
+    "predicted_prob_nn",
+    "prob",
+    "proba",
+    "p_wave2_nn",
+    "p_wave2",
+    "pred_prob_wave2_nn",
+]
+
+
+def probability_column(columns: list[str]) -> str | None:
+    return next((c for c in PROB_CANDIDATES if c in columns), None)
+
+
+def wave1_probability(prob_col: str, wave2_decay: float) -> pl.Expr:
+    """Wave-1 probability expression; Wave-2 columns are divided back by their decay."""
+    prob = pl.col(prob_col).cast(pl.Float64)
+    return prob / wave2_decay if "wave2" in prob_col else prob
+
+
+def expected_profit(prob: pl.Expr, margin: float, mult: pl.Expr | float, mail_cost: float) -> pl.Expr:
+    if not isinstance(mult, pl.Expr):
+        mult = pl.lit(mult)
+    return (pl.lit(margin) * (prob * mult) - pl.lit(mail_cost)).alias("expected_profit_nn")
+
+
+def rank_by_profit(df: pl.DataFrame) -> pl.DataFrame:
+    """Sort by expected_profit_nn (best first), add 1-based rank and cumulative profit."""
+    return (
+        df.sort("expected_profit_nn", descending=True)
+        .with_row_index(name="rank", offset=1)
+        .with_columns(pl.col("expected_profit_nn").cum_sum().alias("cumulative_profit"))
+    )
+
+
+def mailing_list(
+    ids: pl.DataFrame, ranked: pl.DataFrame, index: SuppressionIndex, cutoff_rank: int
+) -> pl.DataFrame:
+    """
+    Submission frame (`id`, `mailto_wave2`) over every id in `ids`: True for
+    active customers ranked at or above `cutoff_rank` in `ranked`.
+    """
+    # Ranks in `ranked` are pre-suppression; map the cutoff back to that order
+    cutoff_position = index.position_of_rank(cutoff_rank)
+    mailed_ids = ranked.filter(
+        (pl.col("rank") <= pl.lit(cutoff_position + 1)) & pl.Series(index.active)
+    )["id"]
+    return ids.select("id").with_columns(pl.col("id").is_in(mailed_ids.implode()).alias("mailto_wave2"))
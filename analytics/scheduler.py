@@ -0,0 +1,169 @@
+"""
+Debounced, cancellable recomputation for Sensitivity-mode what-ifs.
+
+Every widget event reruns the page, and a burst of events (stepping the
+mail cost, typing a margin) used to rebuild the ranked table and charts
+once per intermediate value. A `Recomputer` (one per session) runs that
+work on a worker thread instead:
+
+- `submit(key, job)` records the latest request. The worker waits until no
+  newer request arrived for `debounce` seconds, so a burst costs one run;
+- a newer request cancels the job in flight: the job receives a
+  `CancelToken` and calls `token.check()` between stages, which raises
+  `Cancelled` and frees the worker for the newest inputs;
+- `last_good` keeps the most recent completed result, which the page
+  shows (marked as stale) until the result for the current inputs lands;
+- `last_error` keeps the most recent failure until its key is submitted
+  again, so a retry runs the job instead of replaying the error.
+
+The worker thread exits when idle, so abandoned sessions hold no threads.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+DEBOUNCE_SECONDS = 0.25
+
+
+class Cancelled(Exception):
+    """Raised by `CancelToken.check` once newer inputs superseded the job."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise Cancelled
+
+
+@dataclass
+class Result:
+    key: Hashable
+    value: Any
+    seconds: float
+    error: str | None = None
+
+
+@dataclass
+class _Request:
+    key: Hashable
+    job: Callable[[CancelToken], Any]
+    submitted: float
+
+
+class Recomputer:
+    def __init__(self, debounce: float = DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.last_good: Result | None = None
+        self.last_error: Result | None = None
+        self.completed = 0
+        self.superseded = 0  # requests replaced before or while running
+        self._pending: _Request | None = None
+        self._running: tuple[Hashable, CancelToken] | None = None
+        self._worker: threading.Thread | None = None
+        self._cond = threading.Condition()
+
+    def submit(self, key: Hashable, job: Callable[[CancelToken], Any]) -> None:
+        """Ask for `job`'s result under `key`; supersedes any other pending or running key."""
+        with self._cond:
+            if self.last_good is not None and self.last_good.key == key:
+                return
+            if self.last_error is not None and self.last_error.key == key:
+                self.last_error = None
+            if self._pending is not None:
+                if self._pending.key == key:
+                    return  # resubmitted by a rerun: keep the debounce clock
+                self.superseded += 1
+            if self._running is not None:
+                running_key, token = self._running
+                if running_key == key and self._pending is None:
+                    return
+                if running_key != key and not token.cancelled:
+                    token.cancel()
+                    self.superseded += 1
+            self._pending = _Request(key, job, time.monotonic())
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="recompute", daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending is None:
+                        self._worker = None
+                        return
+                    wait = self._pending.submitted + self.debounce - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                request, self._pending = self._pending, None
+                token = CancelToken()
+                self._running = (request.key, token)
+
+            start = time.perf_counter()
+            result = None
+            try:
+                value = request.job(token)
+                token.check()
+                result = Result(request.key, value, time.perf_counter() - start)
+            except Cancelled:
+                pass
+            except Exception as exc:  # reported to the page through last_error
+                result = Result(request.key, None, time.perf_counter() - start, f"{type(exc).__name__}: {exc}")
+
+            with self._cond:
+                self._running = None
+                if result is not None and result.error is None:
+                    self.last_good = result
+                    self.completed += 1
+                elif result is not None:
+                    self.last_error = result
+                self._cond.notify_all()
+
+    def result(self, key: Hashable) -> Any | None:
+        last = self.last_good
+        return last.value if last is not None and last.key == key else None
+
+    def error(self, key: Hashable) -> str | None:
+        last = self.last_error
+        return last.error if last is not None and last.key == key else None
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._pending is not None or self._running is not None
+
+    def wait(self, key: Hashable, timeout: float | None = None) -> bool:
+        """
+        Block until `key` has a result or an error, `timeout` passes, or `key`
+        was superseded; True if it finished.
+        """
+
+        def finished():
+            return (self.last_good is not None and self.last_good.key == key) or (
+                self.last_error is not None and self.last_error.key == key
+            )
+
+        def queued():
+            return (self._pending is not None and self._pending.key == key) or (
+                self._running is not None and self._running[0] == key
+            )
+
+        with self._cond:
+            self._cond.wait_for(lambda: finished() or not queued(), timeout)
+            return finished()
@@ -0,0 +1,21 @@
+"""
+Scoring helpers shared by the model pages.
+
+`MODEL_FEATURES` are the inputs of the logit / MLP / GBT models.
+"""
+
+from __future__ import annotations
+
+# Inputs used by the logit / MLP models
+MODEL_FEATURES = [
+    "zip_bins",
+    "sex",
+    "bizflag",
+    "numords",
+    "dollars",
+    "last",
+    "sincepurch",
+    "version1",
+    "owntaxprod",
+    "upgraded",
+]
@@ -0,0 +1,104 @@
+"""
+Per-segment profit curves computed in one grouped pass.
+
+Customers are sorted once by (segment, expected profit desc). A single global
+cumulative sum, minus each group's starting offset, gives every segment's
+cumulative profit curve; peaks and break-even ranks come from `reduceat` over
+the group boundaries. Twenty segments cost about the same as one global curve.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import polars as pl
+
+
+def segment_profit_curves(
+    segments: np.ndarray, expected_profit: np.ndarray
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Returns (curves, summary).
+
+    - curves: one row per customer with `segment`, `rank` (within segment),
+      `expected_profit` and `cumulative_profit`.
+    - summary: one row per segment with its size, break-even rank (customers
+      with EP > 0), peak rank and peak cumulative profit. A segment whose
+      curve never rises above $0 gets an optimal depth of 0.
+    """
+    ep = np.asarray(expected_profit, dtype=np.float64)
+    labels, codes = np.unique(np.asarray(segments), return_inverse=True)
+    n = len(ep)
+    if n == 0:
+        none = np.zeros(0, dtype=np.int64)
+        curves = pl.DataFrame(
+            schema={
+                "segment": pl.Enum([]),
+                "rank": pl.Int64,
+                "expected_profit": pl.Float64,
+                "cumulative_profit": pl.Float64,
+            }
+        )
+        return curves, _summary_frame(labels, none, none, none, none.astype(float))
+
+    # One comparison sort on EP, then a stable (radix) sort on the small codes
+    order = np.argsort(-ep)
+    order = order[np.argsort(codes[order].astype(np.uint16), kind="stable")]
+    codes = codes[order]
+    ep = ep[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+
+    running = np.cumsum(ep)
+    offsets = np.r_[0.0, running[starts[1:] - 1]]
+    cumulative = running - np.repeat(offsets, sizes)
+    rank = np.arange(1, n + 1) - np.repeat(starts, sizes)
+
+    peak_profit = np.maximum.reduceat(cumulative, starts)
+    at_peak = cumulative == np.repeat(peak_profit, sizes)
+    peak_rank = np.minimum.reduceat(np.where(at_peak, rank, n + 1), starts)
+    breakeven_rank = np.add.reduceat((ep > 0).astype(np.int64), starts)
+
+    unprofitable = peak_profit <= 0
+    peak_rank = np.where(unprofitable, 0, peak_rank)
+    peak_profit = np.where(unprofitable, 0.0, peak_profit)
+
+    # Enum keeps segments in label order (numeric order for zip_bins) and
+    # avoids materialising one string per customer
+    names = [str(label) for label in labels]
+    segment_col = pl.Series("segment", names).cast(pl.Enum(names)).gather(codes)
+    curves = pl.DataFrame(
+        {
+            "segment": segment_col,
+            "rank": rank,
+            "expected_profit": ep,
+            "cumulative_profit": cumulative,
+        }
+    )
+    present = labels[codes[starts]]
+    return curves, _summary_frame(present, sizes, breakeven_rank, peak_rank, peak_profit)
+
+
+def _summary_frame(
+    labels: np.ndarray,
+    sizes: np.ndarray,
+    breakeven_rank: np.ndarray,
+    peak_rank: np.ndarray,
+    peak_profit: np.ndarray,
+) -> pl.DataFrame:
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return pl.DataFrame(
+        {
+            "segment": np.asarray(labels).astype(str),
+            "customers": sizes,
+            "breakeven_rank": np.asarray(breakeven_rank, dtype=np.int64),
+            "peak_rank": np.asarray(peak_rank, dtype=np.int64),
+            "peak_profit": np.asarray(peak_profit, dtype=np.float64),
+            "depth_pct": np.divide(
+                100.0 * np.asarray(peak_rank),
+                sizes,
+                out=np.zeros(len(sizes)),
+                where=sizes > 0,
+            ),
+        }
+    )
@@ -0,0 +1,114 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+When a campaign review starts, many sessions open the Model Output page
+at once, all miss the cache together and would each build the same
+ranked table and charts. `SingleFlight.do(key, fn)` runs `fn` once per
+key at a time: the first caller (the leader) computes, callers arriving
+with the same key while it runs wait for and share its result (or its
+exception). Nothing is cached here; once the flight lands the next call
+computes again, so memoization stays with the caller (analytics.dag).
+
+Leaders also take one of `workers` admission slots while computing, so a
+burst of *different* keys queues instead of oversubscribing the pod's
+CPUs. Hold a slot only around the expensive step itself, never while
+waiting on another flight, or a full pool can deadlock.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+WORKERS = os.cpu_count() or 1
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executed: int = 0  # leaders: computations actually run
+    coalesced: int = 0  # callers that shared a leader's result
+    queued: int = 0  # leaders that waited for an admission slot
+    queue_seconds: float = 0.0
+    peak_running: int = 0
+
+
+class SingleFlight:
+    def __init__(self, workers: int = WORKERS):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.stats = FlightStats()
+        self._flights: dict[Hashable, Future] = {}
+        self._running = 0
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], admit: bool = True) -> Any:
+        """
+        `fn()`, shared with every concurrent caller passing the same `key`.
+        With `admit=False` the leader runs `fn` without a slot; `fn` then takes
+        `slot()` itself around its own expensive step.
+        """
+        with self._lock:
+            self.stats.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+            else:
+                self.stats.coalesced += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            if admit:
+                with self.slot():
+                    value = fn()
+            else:
+                value = fn()
+        except BaseException as exc:
+            flight.set_exception(exc)
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def slot(self) -> "_Slot":
+        """Context manager holding one admission slot (for work outside `do`)."""
+        return _Slot(self)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+class _Slot:
+    def __init__(self, owner: SingleFlight):
+        self.owner = owner
+
+    def __enter__(self) -> None:
+        owner = self.owner
+        if not owner._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            owner._slots.acquire()
+            with owner._lock:
+                owner.stats.queued += 1
+                owner.stats.queue_seconds += time.perf_counter() - start
+        with owner._lock:
+            owner._running += 1
+            owner.stats.executed += 1
+            owner.stats.peak_running = max(owner.stats.peak_running, owner._running)
+
+    def __exit__(self, *exc) -> None:
+        with self.owner._lock:
+            self.owner._running -= 1
+        self.owner._slots.release()
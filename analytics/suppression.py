@@ -0,0 +1,238 @@
+"""
+Do-not-mail suppression over an already-ranked mailing list.
+
+The ranked list is sorted once by expected profit. Suppressing a customer
+zeroes its contribution in a segment tree (cumulative profit + peak) and in a
+Fenwick tree (active counts), so k removals cost O(k log n) and never trigger
+a re-sort or a fresh cumulative sum.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+import polars as pl
+
+
+class FenwickTree:
+    """Binary indexed tree over integer counts (0-based positions)."""
+
+    def __init__(self, values: np.ndarray):
+        n = len(values)
+        prefix = np.concatenate([[0], np.cumsum(values, dtype=np.int64)])
+        idx = np.arange(1, n + 1)
+        # tree[i] covers (i - lowbit(i), i]; built in O(n) from the prefix sums
+        self.tree = np.zeros(n + 1, dtype=np.int64)
+        self.tree[1:] = prefix[idx] - prefix[idx - (idx & -idx)]
+        self.n = n
+        self._top = 1 << max(n.bit_length() - 1, 0) if n else 0
+
+    def add(self, pos: int, delta: int) -> None:
+        i = pos + 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, pos: int) -> int:
+        """Sum of values at positions [0, pos]."""
+        total = 0
+        i = pos + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return int(total)
+
+    def search(self, k: int) -> int:
+        """Smallest position whose prefix sum reaches k (k >= 1)."""
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        # `pos` is the last 1-based index with prefix < k, i.e. the 0-based answer
+        return pos
+
+
+class ProfitSegmentTree:
+    """
+    Segment tree over per-row expected profit.
+
+    Each node keeps its total and its best (leftmost) prefix sum, which gives
+    cumulative profit at any position and the global profit peak in O(log n).
+    """
+
+    def __init__(self, values: np.ndarray):
+        n = len(values)
+        size = 1
+        while size < max(n, 1):
+            size <<= 1
+        self.n = n
+        self.size = size
+        self.total = np.zeros(2 * size, dtype=np.float64)
+        self.best = np.full(2 * size, -np.inf, dtype=np.float64)
+        self.best_pos = np.full(2 * size, n, dtype=np.int64)
+
+        self.total[size : size + n] = values
+        self.best[size : size + n] = values
+        self.best_pos[size : size + n] = np.arange(n)
+
+        # Build bottom-up one level at a time (vectorized per level)
+        lo = size
+        while lo > 1:
+            parents = np.arange(lo // 2, lo)
+            self._pull(parents)
+            lo //= 2
+
+    def _pull(self, nodes: np.ndarray | int) -> None:
+        left = 2 * nodes
+        right = left + 1
+        carried = self.total[left] + self.best[right]
+        take_left = self.best[left] >= carried
+        self.total[nodes] = self.total[left] + self.total[right]
+        self.best[nodes] = np.where(take_left, self.best[left], carried)
+        self.best_pos[nodes] = np.where(
+            take_left, self.best_pos[left], self.best_pos[right]
+        )
+
+    def set(self, pos: int, value: float, selectable: bool = True) -> None:
+        """
+        Overwrite one leaf. A non-selectable leaf still contributes `value` to
+        sums but can never be where the best prefix ends.
+        """
+        node = self.size + pos
+        self.total[node] = value
+        self.best[node] = value if selectable else -np.inf
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    def prefix(self, pos: int) -> float:
+        """Sum of values at positions [0, pos]."""
+        total = 0.0
+        lo = self.size
+        hi = self.size + pos + 1
+        while lo < hi:
+            if lo & 1:
+                total += self.total[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                total += self.total[hi]
+            lo //= 2
+            hi //= 2
+        return float(total)
+
+    def peak(self) -> tuple[int, float]:
+        """(position, value) of the leftmost maximum prefix sum."""
+        return int(self.best_pos[1]), float(self.best[1])
+
+
+class SuppressionIndex:
+    """
+    Ranked-list view that supports removing and restoring customers.
+
+    `expected_profit` must already be sorted descending (rank order) and `ids`
+    aligned with it. Positions are 0-based offsets into that order.
+    """
+
+    def __init__(self, ids: np.ndarray, expected_profit: np.ndarray):
+        self.ids = np.asarray(ids)
+        self.expected_profit = np.asarray(expected_profit, dtype=np.float64)
+        self.n = len(self.ids)
+        self.n_positive = int(np.count_nonzero(self.expected_profit > 0))
+
+        self._id_order = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[self._id_order]
+
+        self.active = np.ones(self.n, dtype=bool)
+        self._counts = FenwickTree(self.active.astype(np.int64))
+        self._profit = ProfitSegmentTree(self.expected_profit)
+
+    # ------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------
+    def positions_of(self, ids: np.ndarray) -> np.ndarray:
+        """Rank positions for the given ids (unknown ids are dropped)."""
+        ids = np.asarray(ids)
+        if len(ids) == 0 or self.n == 0:
+            return np.empty(0, dtype=np.int64)
+        at = np.searchsorted(self._sorted_ids, ids)
+        at = np.clip(at, 0, self.n - 1)
+        found = self._sorted_ids[at] == ids
+        return self._id_order[at[found]]
+
+    def suppress(self, ids: np.ndarray) -> int:
+        """Remove customers from the ranked list; returns how many changed."""
+        changed = 0
+        for pos in self.positions_of(ids):
+            if self.active[pos]:
+                self.active[pos] = False
+                self._counts.add(int(pos), -1)
+                self._profit.set(int(pos), 0.0, selectable=False)
+                changed += 1
+        return changed
+
+    def restore(self, ids: np.ndarray) -> int:
+        """Put previously suppressed customers back; returns how many changed."""
+        changed = 0
+        for pos in self.positions_of(ids):
+            if not self.active[pos]:
+                self.active[pos] = True
+                self._counts.add(int(pos), 1)
+                self._profit.set(int(pos), self.expected_profit[pos])
+                changed += 1
+        return changed
+
+    def sync(self, ids: np.ndarray) -> None:
+        """Make the suppressed set equal to `ids`, touching only the difference."""
+        target = np.unique(self.ids[self.positions_of(ids)])
+        current = self.ids[~self.active]
+        self.restore(np.setdiff1d(current, target, assume_unique=True))
+        self.suppress(np.setdiff1d(target, current, assume_unique=True))
+
+    # ------------------------------------------------------------
+    # Queries (ranks are 1-based over the active customers)
+    # ------------------------------------------------------------
+    @property
+    def n_active(self) -> int:
+        return self._counts.prefix(self.n - 1) if self.n else 0
+
+    @property
+    def n_suppressed(self) -> int:
+        return self.n - self.n_active
+
+    def rank_of_position(self, pos: int) -> int:
+        return self._counts.prefix(pos)
+
+    def position_of_rank(self, rank: int) -> int:
+        return self._counts.search(rank)
+
+    def cumulative_at_rank(self, rank: int) -> float:
+        if rank <= 0:
+            return 0.0
+        return self._profit.prefix(self.position_of_rank(rank))
+
+    def peak(self) -> tuple[int, float]:
+        """(rank, cumulative profit) at the peak of the active curve."""
+        if self.n_active == 0:
+            return 0, 0.0
+        pos, value = self._profit.peak()
+        return max(1, self.rank_of_position(pos)), value
+
+    def profit_cutoff_rank(self) -> int:
+        """Last active rank with EP > 0 (rows are sorted, so EP > 0 is a prefix)."""
+        if self.n_positive == 0:
+            return 1
+        return max(1, self.rank_of_position(self.n_positive - 1))
+
+
+def read_suppression_ids(data: bytes) -> np.ndarray:
+    """Customer ids from an uploaded do-not-mail CSV (`id` column, else first column)."""
+    df = pl.read_csv(io.BytesIO(data), infer_schema_length=10000)
+    col = "id" if "id" in df.columns else df.columns[0]
+    return df[col].drop_nulls().cast(pl.Int64, strict=False).drop_nulls().to_numpy()
@@ -0,0 +1,247 @@
+"""
+Synthetic intuit75k-style customers for load tests.
+
+`CustomerSynthesizer.fit` learns from data/intuit75k.parquet:
+
+- product state: version1 and upgraded are mutually exclusive, and
+  sincepurch lives in different ranges per state (1-19 for customers on the
+  current version, 15-36 otherwise). The data is split into the observed
+  (version1, upgraded) strata and each one gets its own model, mixed by the
+  observed state shares;
+- marginals, per stratum: the sorted observed values of each feature
+  (empirical quantile functions), so discrete columns keep their level
+  shares;
+- dependencies, per stratum: a Gaussian copula. Its latent correlation
+  starts at the correlation of the features' normal scores and is then
+  calibrated (NORTA-style, on a fixed set of draws) until the generated
+  columns reproduce the observed Pearson correlations, which ties in the
+  discrete columns would otherwise shrink;
+- the response: the baseline logit of res1 on all features, which also
+  carries the non-monotone zip_bins effect a copula cannot.
+
+`sample` draws a chunk: stratum counts from the state shares, then
+correlated normals -> uniforms -> empirical quantiles, zip5 drawn from the observed zips within each zip_bins, res1
+from the logit, training as a 70/30 split. `write_parquet` streams any
+number of rows to one parquet file, one row group per chunk, with each
+chunk seeded from `np.random.SeedSequence(seed)` so output is reproducible
+and memory is bounded by the chunk size. The schema matches
+intuit75k.parquet, so the file can stand in for it.
+
+    python -m analytics.synthetic 1000000 data/synthetic_1m.parquet
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+from scipy.special import ndtr, ndtri
+from scipy.stats import rankdata
+
+from analytics.bundle import DATA_DIR, FEATURES_FILE
+from analytics.logit import LOGIT_TARGET, LogitModel, fit_logit
+
+FEATURES = [
+    "zip_bins",
+    "sex",
+    "bizflag",
+    "numords",
+    "dollars",
+    "last",
+    "sincepurch",
+    "version1",
+    "owntaxprod",
+    "upgraded",
+]
+CATEGORICAL = {"sex": ["Female", "Male", "Unknown"]}
+STRATA = ["version1", "upgraded"]
+TRAINING_SHARE = 0.70
+CHUNK_ROWS = 500_000
+CALIBRATION_DRAWS = 100_000
+CALIBRATION_STEPS = 8
+
+# Output dtypes, as in intuit75k.parquet
+SCHEMA = {
+    "id": pl.Int32,
+    "zip5": pl.String,
+    "zip_bins": pl.Int32,
+    "sex": pl.Categorical,
+    "bizflag": pl.Int32,
+    "numords": pl.Int32,
+    "dollars": pl.Float64,
+    "last": pl.Int32,
+    "sincepurch": pl.Int32,
+    "version1": pl.Int32,
+    "owntaxprod": pl.Int32,
+    "upgraded": pl.Int32,
+    "res1": pl.Categorical,
+    "training": pl.Int32,
+    "res1_yes": pl.Int64,
+}
+
+
+def _codes(df: pl.DataFrame, col: str) -> np.ndarray:
+    if col in CATEGORICAL:
+        return df[col].cast(pl.String).replace_strict(
+            CATEGORICAL[col], list(range(len(CATEGORICAL[col]))), return_dtype=pl.Int64
+        ).to_numpy().astype(np.float64)
+    return df[col].cast(pl.Float64).to_numpy()
+
+
+def normal_scores(values: np.ndarray) -> np.ndarray:
+    """Mid-rank normal scores (ties share a score)."""
+    return ndtri((rankdata(values, method="average") - 0.5) / len(values))
+
+
+def _nearest_correlation(m: np.ndarray, floor: float = 1e-6) -> np.ndarray:
+    """Symmetric positive-definite matrix with unit diagonal close to `m`."""
+    w, v = np.linalg.eigh((m + m.T) / 2)
+    m = (v * np.maximum(w, floor)) @ v.T
+    d = np.sqrt(np.diag(m))
+    return m / np.outer(d, d)
+
+
+def _from_uniforms(u: np.ndarray, quantiles: list[np.ndarray]) -> np.ndarray:
+    """Map uniforms column-wise through the empirical quantile functions."""
+    out = np.empty_like(u)
+    for j, observed in enumerate(quantiles):
+        at = np.minimum((u[:, j] * len(observed)).astype(np.int64), len(observed) - 1)
+        out[:, j] = observed[at]
+    return out
+
+
+def calibrate_copula(
+    target: np.ndarray, start: np.ndarray, quantiles: list[np.ndarray], seed: int = 0
+) -> np.ndarray:
+    """Latent correlation whose generated columns have Pearson correlation ~ `target`."""
+    z = np.random.default_rng(seed).standard_normal((CALIBRATION_DRAWS, len(quantiles)))
+    latent = start
+    for _ in range(CALIBRATION_STEPS):
+        values = _from_uniforms(ndtr(z @ np.linalg.cholesky(latent).T), quantiles)
+        latent = _nearest_correlation(latent + target - np.corrcoef(values, rowvar=False))
+    return latent
+
+
+@dataclass
+class _Copula:
+    """Gaussian copula over the non-constant columns of one stratum."""
+
+    columns: list[str]
+    quantiles: list[np.ndarray]
+    cholesky: np.ndarray
+    fixed: dict[str, float]
+
+    @classmethod
+    def fit(cls, codes: dict[str, np.ndarray]) -> "_Copula":
+        fixed = {col: float(v[0]) for col, v in codes.items() if np.all(v == v[0])}
+        columns = [col for col in codes if col not in fixed]
+        values = np.column_stack([codes[col] for col in columns])
+        scores = np.column_stack([normal_scores(codes[col]) for col in columns])
+        quantiles = [np.sort(values[:, j]) for j in range(len(columns))]
+        latent = calibrate_copula(
+            np.corrcoef(values, rowvar=False), np.corrcoef(scores, rowvar=False), quantiles
+        )
+        return cls(columns, quantiles, np.linalg.cholesky(latent), fixed)
+
+    def sample(self, n: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+        u = ndtr(rng.standard_normal((n, len(self.columns))) @ self.cholesky.T)
+        values = _from_uniforms(u, self.quantiles)
+        out = {col: values[:, j] for j, col in enumerate(self.columns)}
+        out.update({col: np.full(n, v) for col, v in self.fixed.items()})
+        return out
+
+
+@dataclass
+class CustomerSynthesizer:
+    strata: list[_Copula]
+    shares: np.ndarray  # observed share of each stratum
+    response: LogitModel
+    zips: dict[int, np.ndarray]  # observed zip5 per zip_bins
+
+    @classmethod
+    def fit(cls, df: pl.DataFrame) -> "CustomerSynthesizer":
+        missing = [c for c in [*FEATURES, "zip5", "res1"] if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        if LOGIT_TARGET not in df.columns:
+            df = df.with_columns((pl.col("res1").cast(pl.String) == "Yes").cast(pl.Int64).alias(LOGIT_TARGET))
+
+        strata, counts = [], []
+        for _, part in df.group_by(STRATA, maintain_order=True):
+            strata.append(_Copula.fit({col: _codes(part, col) for col in FEATURES}))
+            counts.append(part.height)
+        zips = df.group_by("zip_bins").agg(pl.col("zip5"))
+        return cls(
+            strata=strata,
+            shares=np.asarray(counts, dtype=np.float64) / df.height,
+            response=fit_logit(df),
+            zips={int(b): np.asarray(z) for b, z in zip(zips["zip_bins"], zips["zip5"])},
+        )
+
+    def sample(self, n: int, rng: np.random.Generator, id_start: int = 1) -> pl.DataFrame:
+        sizes = rng.multinomial(n, self.shares)
+        parts = [copula.sample(size, rng) for copula, size in zip(self.strata, sizes)]
+        order = rng.permutation(n)
+        columns = {col: np.concatenate([p[col] for p in parts])[order] for col in FEATURES}
+        df = pl.DataFrame(columns).with_columns(
+            pl.col("sex").cast(pl.Int64).replace_strict(
+                list(range(len(CATEGORICAL["sex"]))), CATEGORICAL["sex"], return_dtype=pl.String
+            ),
+            *[pl.col(c).cast(SCHEMA[c]) for c in FEATURES if c not in CATEGORICAL],
+        )
+
+        zip5 = np.empty(n, dtype=object)
+        bins = columns["zip_bins"].astype(np.int64)
+        for b, pool in self.zips.items():
+            rows = np.flatnonzero(bins == b)
+            zip5[rows] = pool[rng.integers(len(pool), size=len(rows))]
+
+        responded = rng.random(n) < self.response.predict_proba(df)
+        return df.with_columns(
+            pl.Series("id", np.arange(id_start, id_start + n)),
+            pl.Series("zip5", zip5, dtype=pl.String),
+            pl.Series("res1", np.where(responded, "Yes", "No")),
+            pl.Series("training", (rng.random(n) < TRAINING_SHARE).astype(np.int64)),
+            pl.Series(LOGIT_TARGET, responded.astype(np.int64)),
+        ).select([pl.col(c).cast(t) for c, t in SCHEMA.items()])
+
+    def write_parquet(
+        self, path: str, n_rows: int, chunk_rows: int = CHUNK_ROWS, seed: int = 0
+    ) -> int:
+        """Stream `n_rows` synthetic customers to `path`; returns rows written."""
+        if n_rows <= 0:
+            raise ValueError("n_rows must be positive.")
+        n_chunks = -(-n_rows // chunk_rows)
+        seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+        writer = None
+        try:
+            for i, chunk_seed in enumerate(seeds):
+                size = min(chunk_rows, n_rows - i * chunk_rows)
+                table = self.sample(size, np.random.default_rng(chunk_seed), i * chunk_rows + 1).to_arrow()
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return n_rows
+
+
+def load_synthesizer(path: str = os.path.join(DATA_DIR, FEATURES_FILE)) -> CustomerSynthesizer:
+    return CustomerSynthesizer.fit(pl.read_parquet(path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m analytics.synthetic N_ROWS OUT.parquet [SEED]")
+    n_rows, out = int(sys.argv[1]), sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    start = time.perf_counter()
+    load_synthesizer().write_parquet(out, n_rows, seed=seed)
+    size = os.path.getsize(out)
+    print(f"Wrote {n_rows:,} rows to {out} ({size / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,181 @@
+"""
+Realized-vs-expected tracking for the Wave-2 campaign.
+
+`CampaignTracker` follows the campaign event log (analytics.events) over a
+ranked mailing list. Per-customer flags (mailed / responded / closed) and
+running counts per rank decile and per segment level are updated only from
+new events: each event is one id -> rank-position lookup plus a few
+counter increments, applied to a whole batch with `np.bincount`. A rerun
+with no new events does no aggregation at all.
+
+Realized profit per mailed customer is margin * responded - mail cost; the
+expected side is the model's expected profit for the same customers.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+
+from analytics.events import EventLog
+from analytics.id_index import IdIndex
+
+N_DECILES = 10
+FLAGS = ("mailed", "responded", "closed")
+
+
+@dataclass
+class _Counts:
+    """Running counts and sums for one grouping (deciles or a segment column)."""
+
+    labels: list[str]
+    codes: np.ndarray  # group code per rank position
+    mailed: np.ndarray
+    responded: np.ndarray
+    closed: np.ndarray
+    expected_responses: np.ndarray
+    expected_profit: np.ndarray
+
+    @classmethod
+    def empty(cls, labels: list[str], codes: np.ndarray) -> "_Counts":
+        n = len(labels)
+        return cls(labels, codes, *(np.zeros(n) for _ in range(5)))
+
+    def add(self, name: str, positions: np.ndarray, weights: np.ndarray | None = None) -> None:
+        counts = getattr(self, name)
+        counts += np.bincount(self.codes[positions], weights=weights, minlength=len(counts))
+
+
+class CampaignTracker:
+    def __init__(
+        self,
+        ranked: pl.DataFrame,
+        segments: pl.DataFrame | None = None,
+        margin: float = 60.0,
+        mail_cost: float = 1.41,
+        log: EventLog | None = None,
+        n_deciles: int = N_DECILES,
+    ):
+        """
+        `ranked`: id, p_wave2 and expected_profit, best customer first.
+        `segments`: id plus one column per segment dimension.
+        """
+        self.ids = ranked["id"].to_numpy()
+        self.p_wave2 = ranked["p_wave2"].cast(pl.Float64).to_numpy()
+        self.expected = ranked["expected_profit"].cast(pl.Float64).to_numpy()
+        self.margin = margin
+        self.mail_cost = mail_cost
+        self.log = log or EventLog()
+        self.offset = 0
+        self.n_events = 0
+
+        n = len(self.ids)
+        self.index = IdIndex(self.ids)
+        self.position_of_slot = np.full(self.index.size, -1, dtype=np.int64)
+        self.position_of_slot[self.index.slots(self.ids)] = np.arange(n)
+        self.flags = {name: np.zeros(n, dtype=bool) for name in FLAGS}
+
+        deciles = np.arange(n) * n_deciles // max(n, 1)
+        self.groups = {"decile": _Counts.empty([str(d + 1) for d in range(n_deciles)], deciles)}
+        if segments is not None:
+            aligned = pl.DataFrame({"id": self.ids}).join(segments, on="id", how="left")
+            for col in segments.columns:
+                if col == "id":
+                    continue
+                values = aligned[col].cast(pl.String).fill_null("missing").to_numpy()
+                labels, codes = np.unique(values, return_inverse=True)
+                self.groups[col] = _Counts.empty(labels.tolist(), codes)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def _first_time(self, flag: str, ids: np.ndarray) -> np.ndarray:
+        """Rank positions of ids on the list whose `flag` is not set yet (set it)."""
+        slots = self.index.slots(ids)
+        positions = np.unique(self.position_of_slot[slots[slots >= 0]])
+        positions = positions[positions >= 0]
+        positions = positions[~self.flags[flag][positions]]
+        self.flags[flag][positions] = True
+        return positions
+
+    def ingest(self, events: pl.DataFrame) -> int:
+        """Apply a batch of events; returns how many were new customer-level facts."""
+        by_type = {
+            event: events.filter(pl.col("event") == event)["id"].to_numpy()
+            for event in ("mailed", "responded", "no_response")
+        }
+        # An outcome (response or not) implies the piece was mailed
+        mailed = self._first_time(
+            "mailed",
+            np.concatenate([by_type["mailed"], by_type["responded"], by_type["no_response"]]),
+        )
+        responded = self._first_time("responded", by_type["responded"])
+        closed = self._first_time(
+            "closed", np.concatenate([by_type["responded"], by_type["no_response"]])
+        )
+        for counts in self.groups.values():
+            counts.add("mailed", mailed)
+            counts.add("expected_responses", mailed, self.p_wave2[mailed])
+            counts.add("expected_profit", mailed, self.expected[mailed])
+            counts.add("responded", responded)
+            counts.add("closed", closed)
+        self.n_events += events.height
+        return len(mailed) + len(responded) + len(closed)
+
+    def sync(self) -> int:
+        """Ingest events appended to the log since the last call."""
+        with self._lock:
+            events, self.offset = self.log.read_since(self.offset)
+            return self.ingest(events) if events.height else 0
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+    @property
+    def n_mailed(self) -> int:
+        return int(self.groups["decile"].mailed.sum())
+
+    @property
+    def n_responded(self) -> int:
+        return int(self.groups["decile"].responded.sum())
+
+    def realized_profit(self) -> float:
+        return self.margin * self.n_responded - self.mail_cost * self.n_mailed
+
+    def expected_profit(self) -> float:
+        return float(self.groups["decile"].expected_profit.sum())
+
+    def table(self, group: str = "decile") -> pl.DataFrame:
+        """Counts and realized vs expected response / profit per group."""
+        c = self.groups[group]
+        realized = self.margin * c.responded - self.mail_cost * c.mailed
+        return pl.DataFrame(
+            {
+                group: c.labels,
+                "mailed": c.mailed.astype(np.int64),
+                "responded": c.responded.astype(np.int64),
+                "pending": (c.mailed - c.closed).astype(np.int64),
+                "expected_responses": c.expected_responses,
+                "realized_profit": realized,
+                "expected_profit": c.expected_profit,
+            }
+        ).with_columns(
+            (pl.col("responded") / pl.col("mailed")).fill_nan(None).alias("response_rate"),
+        )
+
+    def cumulative_curves(self) -> pl.DataFrame:
+        """Realized and expected cumulative profit along the ranked list (mailed customers)."""
+        mailed = self.flags["mailed"]
+        realized = np.where(mailed, self.margin * self.flags["responded"] - self.mail_cost, 0.0)
+        expected = np.where(mailed, self.expected, 0.0)
+        return pl.DataFrame(
+            {
+                "rank": np.arange(1, len(self.ids) + 1),
+                "realized": np.cumsum(realized),
+                "expected": np.cumsum(expected),
+            }
+        )
@@ -0,0 +1,173 @@
+"""
+Sparse and target-encoded `zip5` features.
+
+`zip_bins` collapses ~7k ZIP codes into 20 coarse bins. These encoders keep
+ZIP-level geography without densifying:
+
+- `ZipVocabulary.onehot` / `hashed_onehot` build CSR matrices with exactly
+  one non-zero per row, so memory grows with rows, not with distinct zips.
+  Rare or unseen zips share column 0.
+- `target_encode_oof` gives each row the smoothed response rate of its zip
+  computed on the *other* folds (no target leakage into training rows);
+  `ZipTargetEncoder` carries the full-data mapping to score new customers.
+
+Both come from one polars group-by. `with_zip_block` appends a block to a
+dense design as CSR, which scikit-learn's logit and MLP accept directly.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+import scipy.sparse as sp
+
+ZIP_COLUMN = "zip5"
+DEFAULT_HASH_FEATURES = 1 << 12
+DEFAULT_SMOOTHING = 20.0
+
+
+def _codes_csr(codes: np.ndarray, n_cols: int) -> sp.csr_matrix:
+    n = len(codes)
+    return sp.csr_matrix(
+        (np.ones(n, dtype=np.float32), codes.astype(np.int32), np.arange(n + 1)),
+        shape=(n, n_cols),
+    )
+
+
+@dataclass
+class ZipVocabulary:
+    levels: np.ndarray  # sorted zip strings with at least `min_count` rows
+    min_count: int = 1
+
+    @classmethod
+    def fit(cls, zip5: pl.Series, min_count: int = 1) -> "ZipVocabulary":
+        counts = zip5.cast(pl.String).value_counts(name="n")
+        kept = counts.filter(pl.col("n") >= min_count)[zip5.name].drop_nulls().sort()
+        return cls(levels=kept.to_numpy().astype(str), min_count=min_count)
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.levels) + 1
+
+    def codes(self, zip5: pl.Series) -> np.ndarray:
+        """Column per row: 1.. for known zips, 0 for rare / unseen / null."""
+        mapping = {z: i + 1 for i, z in enumerate(self.levels.tolist())}
+        return (
+            zip5.cast(pl.String)
+            .replace_strict(mapping, default=0, return_dtype=pl.Int64)
+            .to_numpy()
+        )
+
+    def onehot(self, zip5: pl.Series) -> sp.csr_matrix:
+        return _codes_csr(self.codes(zip5), self.n_columns)
+
+
+def hashed_onehot(zip5: pl.Series, n_features: int = DEFAULT_HASH_FEATURES) -> sp.csr_matrix:
+    """
+    One-hot into `n_features` hashed columns (no vocabulary to store). ZIP
+    codes are digit strings, so the hash is a fixed multiplicative hash of the
+    integer value and is stable across processes; non-numeric values use 0.
+    """
+    z = zip5.cast(pl.String).str.to_integer(strict=False).fill_null(-1).to_numpy()
+    h = (z.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)
+    codes = np.where(z < 0, 0, h % np.uint64(n_features)).astype(np.int64)
+    return _codes_csr(codes, n_features)
+
+
+# ---------------------------------------------------------------------------
+# Target encoding
+# ---------------------------------------------------------------------------
+
+
+def fold_ids(n: int, n_folds: int = 5, seed: int = 1234) -> np.ndarray:
+    """Random, balanced fold assignment (0..n_folds-1)."""
+    rng = np.random.default_rng(seed)
+    return rng.permutation(n) % n_folds
+
+
+def target_encode_oof(
+    zip5: pl.Series,
+    y: np.ndarray,
+    folds: np.ndarray | None = None,
+    n_folds: int = 5,
+    smoothing: float = DEFAULT_SMOOTHING,
+    seed: int = 1234,
+) -> np.ndarray:
+    """
+    Out-of-fold smoothed response rate per row:
+    (sum_y + m * prior) / (count + m), with sums, counts and the prior all
+    taken from the rows outside the row's own fold.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if folds is None:
+        folds = fold_ids(len(y), n_folds, seed)
+    df = pl.DataFrame(
+        {"zip": zip5.cast(pl.String), "fold": np.asarray(folds), "y": y}
+    ).with_row_index("row")
+
+    by_fold = df.group_by(["zip", "fold"]).agg(
+        pl.col("y").sum().alias("fold_sum"), pl.len().alias("fold_n")
+    )
+    by_zip = by_fold.group_by("zip").agg(
+        pl.col("fold_sum").sum().alias("zip_sum"), pl.col("fold_n").sum().alias("zip_n")
+    )
+    fold_tot = df.group_by("fold").agg(
+        pl.col("y").sum().alias("f_sum"), pl.len().alias("f_n")
+    )
+
+    out = (
+        df.join(by_fold, on=["zip", "fold"], how="left", nulls_equal=True)
+        .join(by_zip, on="zip", how="left", nulls_equal=True)
+        .join(fold_tot, on="fold", how="left")
+        .with_columns(
+            ((y.sum() - pl.col("f_sum")) / (len(y) - pl.col("f_n"))).alias("prior")
+        )
+        .with_columns(
+            (
+                (pl.col("zip_sum") - pl.col("fold_sum") + smoothing * pl.col("prior"))
+                / (pl.col("zip_n") - pl.col("fold_n") + smoothing)
+            ).alias("te")
+        )
+        .sort("row")
+    )
+    return out["te"].to_numpy()
+
+
+@dataclass
+class ZipTargetEncoder:
+    levels: np.ndarray
+    values: np.ndarray
+    prior: float
+    smoothing: float = DEFAULT_SMOOTHING
+
+    @classmethod
+    def fit(
+        cls, zip5: pl.Series, y: np.ndarray, smoothing: float = DEFAULT_SMOOTHING
+    ) -> "ZipTargetEncoder":
+        y = np.asarray(y, dtype=np.float64)
+        prior = float(y.mean())
+        stats = (
+            pl.DataFrame({"zip": zip5.cast(pl.String), "y": y})
+            .drop_nulls("zip")
+            .group_by("zip")
+            .agg(pl.col("y").sum().alias("s"), pl.len().alias("n"))
+            .sort("zip")
+        )
+        values = (stats["s"].to_numpy() + smoothing * prior) / (stats["n"].to_numpy() + smoothing)
+        return cls(stats["zip"].to_numpy().astype(str), values, prior, smoothing)
+
+    def transform(self, zip5: pl.Series) -> np.ndarray:
+        """Encoded value per row; unseen zips get the prior."""
+        mapping = dict(zip(self.levels.tolist(), self.values.tolist()))
+        return (
+            zip5.cast(pl.String)
+            .replace_strict(mapping, default=self.prior, return_dtype=pl.Float64)
+            .to_numpy()
+        )
+
+
+def with_zip_block(X: np.ndarray | sp.spmatrix, block: sp.spmatrix) -> sp.csr_matrix:
+    """Append a sparse zip block to a (dense or sparse) design matrix as CSR."""
+    return sp.hstack([sp.csr_matrix(X), block], format="csr")
@@ -1,6 +1,8 @@
 import streamlit as st
 import textwrap
 
+from analytics.prewarm import start_prewarm
+
 # ============================================================
 # Global App Config (FINAL, STABLE)
 # ============================================================
@@ -70,6 +72,19 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# ============================================================
+# Cache warm-up (one background thread per server process)
+# ============================================================
+# Already running when launched with `python -m analytics.prewarm serve`;
+# under plain `streamlit run` it starts with the first session.
+prewarm = start_prewarm()
+if not prewarm.ready:
+    failed = [step.name for step in prewarm.steps if step.state == "failed"]
+    st.sidebar.caption(
+        f"Warming caches: {prewarm.finished_steps}/{len(prewarm.steps)} steps finished"
+        + (f" ({', '.join(failed)} failed)" if failed else "")
+    )
+
 # ============================================================
 # Navigation (OFFICIAL Streamlit only)
 # ============================================================
@@ -1,6 +1,28 @@
 import streamlit as st
 import textwrap
 
+import numpy as np
+import polars as pl
+from sklearn.linear_model import LogisticRegression
+
+from analytics.bundle import load_bundle
+from analytics.logit import (
+    LOGIT_CATEGORICAL,
+    LOGIT_NUMERIC,
+    LOGIT_TARGET,
+    design_levels,
+    design_matrix,
+    fit_irls,
+)
+from analytics.metrics import auc
+from analytics.zip_features import (
+    ZipTargetEncoder,
+    ZipVocabulary,
+    hashed_onehot,
+    target_encode_oof,
+    with_zip_block,
+)
+
 st.set_page_config(
     page_title="Data Engineering & Feature Selection",
     page_icon="",
@@ -225,5 +247,77 @@ with right:
         icon="✅",
     )
 
+
+
+# ----------------------------
+# ZIP-level geography (live holdout check)
+# ----------------------------
+@st.cache_data(show_spinner="Comparing ZIP encodings...")
+def compare_zip_encodings() -> pl.DataFrame:
+    df = load_bundle(["training", "zip5", *LOGIT_CATEGORICAL, *LOGIT_NUMERIC, LOGIT_TARGET])
+    train = df.filter(pl.col("training") == 1)
+    test = df.filter(pl.col("training") == 0)
+    y, y_test = train[LOGIT_TARGET].to_numpy(), test[LOGIT_TARGET].to_numpy()
+
+    levels = design_levels(train)
+    X, _ = design_matrix(train, levels)
+    X_test, _ = design_matrix(test, levels)
+    rows = []
+
+    coef, _, _ = fit_irls(X, y)
+    rows.append(("zip_bins (20 bins)", 0, 0, auc(y_test, X_test @ coef)))
+
+    # One dense column: logit of the out-of-fold smoothed zip response rate
+    def logit(p: np.ndarray) -> np.ndarray:
+        return np.log(p / (1 - p))
+
+    oof = target_encode_oof(train["zip5"], y)
+    encoder = ZipTargetEncoder.fit(train["zip5"], y)
+    coef, _, _ = fit_irls(np.column_stack([X, logit(oof)]), y)
+    te_test = np.column_stack([X_test, logit(encoder.transform(test["zip5"]))])
+    rows.append(("+ zip5 target encoding (OOF)", 1, train.height, auc(y_test, te_test @ coef)))
+
+    # Sparse blocks go to an L2 logit on standardized dense inputs + CSR zip columns
+    mu, sd = X[:, 1:].mean(axis=0), X[:, 1:].std(axis=0)
+
+    def scale(A: np.ndarray) -> np.ndarray:
+        return (A[:, 1:] - mu) / sd
+
+    vocab = ZipVocabulary.fit(train["zip5"], min_count=5)
+    for name, block, block_test in [
+        ("+ zip5 one-hot (CSR, ≥5 rows)", vocab.onehot(train["zip5"]), vocab.onehot(test["zip5"])),
+        ("+ zip5 hashed one-hot (CSR, 4,096)", hashed_onehot(train["zip5"]), hashed_onehot(test["zip5"])),
+    ]:
+        clf = LogisticRegression(C=0.2, max_iter=3000).fit(with_zip_block(scale(X), block), y)
+        p_test = clf.predict_proba(with_zip_block(scale(X_test), block_test))[:, 1]
+        rows.append((name, block.shape[1], block.nnz, auc(y_test, p_test)))
+
+    return pl.DataFrame(
+        rows, schema=["encoding", "zip_columns", "non_zeros", "holdout_auc"], orient="row"
+    )
+
+
+with st.expander("ZIP-level geography: finer encodings (holdout check)", expanded=False):
+    st.markdown(
+        """
+        Beyond <code>zip_bins</code>, <code>analytics.zip_features</code> encodes raw <code>zip5</code> as a sparse
+        one-hot / hashed matrix (one non-zero per customer, so memory tracks rows rather than distinct ZIPs)
+        or as an out-of-fold smoothed response rate. All variants share the baseline logit inputs.
+        """,
+        unsafe_allow_html=True,
+    )
+    # Four model fits: only on request, then cached for every session
+    if st.button("Compare encodings", help="Fits four holdout models; takes a few seconds."):
+        st.session_state["zip_comparison"] = True
+
+    if st.session_state.get("zip_comparison"):
+        st.dataframe(
+            compare_zip_encodings().to_pandas().style.format(
+                {"zip_columns": "{:,}", "non_zeros": "{:,}", "holdout_auc": "{:.3f}"}
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
 st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
 st.caption("Section 2 — Data Engineering & Feature Selection")
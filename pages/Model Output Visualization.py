@@ -2,17 +2,33 @@ import os
 import streamlit as st
 import textwrap
 import polars as pl
-from plotnine import (
-    ggplot,
-    aes,
-    geom_line,
-    labs,
-    theme_minimal,
-    theme,
-    geom_hline,
-    geom_vline,
-    element_text,
+from analytics.allocation import allocate
+from analytics.bitmap_index import SEGMENT_COLUMNS, BitmapIndex
+from analytics.bundle import load_bundle
+from analytics.calibration import (
+    CALIBRATORS,
+    PiecewiseLinear,
+    calibration_table,
+    estimate_segment_decay,
+    read_wave2_responses,
 )
+from analytics.charts import cumulative_profit, profit_by_rank, render_png, segment_curves
+from analytics.dag import MODELS as DAG_MODELS, dashboard_graph
+from analytics.events import EVENTS_PATH
+from analytics.id_index import IdTable
+from analytics.logit import LOGIT_CATEGORICAL, LOGIT_NUMERIC, fit_logit
+from analytics.online import OnlineLogit, OnlineScoring
+from analytics.preview import profit_preview, sample_indices
+from analytics.profit import (
+    expected_profit,
+    mailing_list,
+    probability_column,
+    rank_by_profit,
+    wave1_probability,
+)
+from analytics.scheduler import CancelToken, Recomputer
+from analytics.segments import segment_profit_curves
+from analytics.suppression import SuppressionIndex, read_suppression_ids
 
 st.set_page_config(
     page_title="Model Output Visualization (NN)",
@@ -143,6 +159,29 @@ COURSE_MAIL_COST = 1.41
 COURSE_MARGIN = 60.0
 COURSE_MULT = 0.50
 COURSE_RULE = "Mail while Expected Profit > 0"
+# Sensitivity recomputes: how long a rerun waits before showing the previous
+# table, and how often the page checks for the new one
+STALE_AFTER_SECONDS = 0.6
+POLL_SECONDS = 0.3
+# Uploaded lists this long show a sampled preview first (in either mode)
+PREVIEW_MIN_ROWS = 50_000
+CUTOFF_RULES = [
+    COURSE_RULE,
+    "Mail until Peak Cumulative Profit",
+    "Mail Top-N customers",
+]
+
+# Score sources in the data bundle: label -> (column suffix, short tag)
+SCORE_MODELS = {
+    "Neural network (MLP)": ("nn", "NN"),
+    "Gradient-boosted trees (challenger)": ("gbt", "GBT"),
+    "Logit, updated from Wave-2 responses": ("online", "logit online"),
+}
+CALIBRATION_METHODS = {
+    "None (raw scores)": None,
+    "Isotonic (holdout)": "isotonic",
+    "Platt (holdout)": "platt",
+}
 
 
 # ============================================================
@@ -162,7 +201,28 @@ st.sidebar.subheader("Data")
 uploaded_csv = st.sidebar.file_uploader(
     "Upload NN results CSV (optional)",
     type=["csv"],
-    help="If uploaded, this file is used instead of data/person2_nn_mailable_ranked.csv",
+    help="If uploaded, this file is used instead of the mailable ranking in data/bundle.parquet",
+)
+score_model = st.sidebar.radio(
+    "Scores",
+    list(SCORE_MODELS),
+    index=0,
+    help="Which model's bundled test scores to rank (ignored when a CSV is uploaded). "
+    "The NN is the reported model; the others are challengers.",
+)
+suppression_csv = st.sidebar.file_uploader(
+    "Upload suppression list CSV (optional)",
+    type=["csv"],
+    help="Do-not-mail customers (complaints, bad addresses, already contacted). "
+    "Uses the 'id' column, or the first column if there is none.",
+)
+segment_filter = st.sidebar.text_input(
+    "Segment filter (optional)",
+    value="",
+    placeholder="version1 & owntaxprod & zip_bins in 3..7",
+    help="Restrict the ranked list to one customer segment. "
+    f"Columns: {', '.join(SEGMENT_COLUMNS)}. "
+    "Combine with &, |, ~ and parentheses; use `col = value` or `col in 3..7`.",
 )
 
 st.sidebar.divider()
@@ -170,6 +230,7 @@ st.sidebar.subheader("Assumptions")
 
 MAIL_COST = st.sidebar.number_input(
     "Mail cost ($/piece)",
+    min_value=0.01,
     value=COURSE_MAIL_COST,
     step=0.01,
     format="%.2f",
@@ -193,33 +254,39 @@ WAVE2_RESPONSE_MULT = st.sidebar.slider(
     disabled=lock,
     key="mult",
 )
-
-st.sidebar.subheader("Cutoff rule")
-cutoff_rule = st.sidebar.radio(
-    "Cutoff rule",
-    options=[
-        "Mail while Expected Profit > 0",
-        "Mail until Peak Cumulative Profit",
-        "Mail Top-N customers",
-    ],
+calibration = st.sidebar.selectbox(
+    "Probability calibration",
+    list(CALIBRATION_METHODS),
     index=0,
     disabled=lock,
+    help="Map scores to calibrated Wave-1 probabilities (fitted on the 22,500-row holdout) "
+    "before applying the Wave-2 multiplier.",
+)
+wave2_csv = st.sidebar.file_uploader(
+    "Observed Wave-2 responses CSV (optional)",
+    type=["csv"],
+    disabled=lock,
+    help="Mailed customers' outcomes: 'id' plus a 0/1 column (res2 / responded). "
+    "Replaces the flat multiplier with a decay estimated per segment.",
+)
+decay_column = st.sidebar.selectbox(
+    "Decay segments",
+    SEGMENT_COLUMNS,
+    index=SEGMENT_COLUMNS.index("zip_bins"),
+    disabled=lock or wave2_csv is None,
 )
-
-top_n = None
-if cutoff_rule == "Mail Top-N customers":
-    top_n = st.sidebar.slider(
-        "Top N to mail", min_value=100, max_value=22500, value=3500, step=100
-    )
-
-show_cutoff_line = st.sidebar.checkbox("Show cutoff line on charts", value=True)
 
 # Force report defaults if locked
 if lock:
     MAIL_COST = COURSE_MAIL_COST
     MARGIN_PER_RESPONDER = COURSE_MARGIN
     WAVE2_RESPONSE_MULT = COURSE_MULT
-    cutoff_rule = COURSE_RULE
+    calibration = "None (raw scores)"
+    wave2_csv = None
+
+MODEL_SUFFIX, MODEL_TAG = SCORE_MODELS[score_model]
+if uploaded_csv:
+    MODEL_TAG = "uploaded"
 
 # Helper banner (this is the thing you問的藍色提示)
 if lock:
@@ -239,7 +306,7 @@ st.markdown(
         <div class="tag">📈 Section 7</div>
         <div style="height:.45rem"></div>
         <h1>Model Output Visualization (Neural Network)</h1>
-        <div class="subtle">Turning NN scores into a profit-based Wave-2 mailing decision.</div>
+        <div class="subtle">Turning model scores into a profit-based Wave-2 mailing decision.</div>
       </div>
     </div>
     <hr class="hr"/>
@@ -252,237 +319,754 @@ st.markdown(
 # Load CSV (polars)
 # ============================================================
 @st.cache_data
-def load_nn_results(uploaded_bytes: bytes | None) -> pl.DataFrame:
+def load_nn_results(uploaded_bytes: bytes | None, suffix: str = "nn") -> pl.DataFrame:
     if uploaded_bytes is not None:
         return pl.read_csv(uploaded_bytes)
 
-    base_dir = os.path.dirname(os.path.dirname(__file__))  # app.py level
-    csv_path = os.path.join(base_dir, "data", "person2_nn_mailable_ranked.csv")
-
-    if not os.path.exists(csv_path):
-        st.error(f"File not found: {csv_path}")
+    # Same rows as person2_nn_mailable_ranked.csv, read from the data bundle.
+    # Other models' scores are renamed to the *_nn columns the page works on.
+    try:
+        ranked = load_bundle(
+            ["id", f"p_{suffix}", f"p_wave2_{suffix}", f"expected_profit_{suffix}"],
+            mailable_only=True,
+        ).rename(
+            {
+                f"p_{suffix}": "p_nn",
+                f"p_wave2_{suffix}": "p_wave2_nn",
+                f"expected_profit_{suffix}": "expected_profit_nn",
+            }
+        )
+    except FileNotFoundError as exc:
+        st.error(str(exc))
         st.stop()
+    return ranked.sort("expected_profit_nn", descending=True)
+
+
+@st.cache_resource
+def load_calibrator(suffix: str, method: str) -> tuple[PiecewiseLinear, pl.DataFrame]:
+    """Calibration curve fitted on the holdout, plus a raw vs calibrated reliability table."""
+    holdout = load_bundle([f"p_{suffix}", "res1_yes", "training"]).filter(pl.col("training") == 0)
+    p = holdout[f"p_{suffix}"].to_numpy()
+    y = holdout["res1_yes"].to_numpy()
+    curve = CALIBRATORS[method](p, y)
+    reliability = calibration_table(p, y).join(
+        calibration_table(curve(p), y).select("decile", pl.col("predicted").alias("calibrated")),
+        on="decile",
+    )
+    return curve, reliability
+
+
+@st.cache_resource(show_spinner="Fitting the online logit...")
+def load_online_scoring() -> OnlineScoring:
+    """Logit fitted on the training rows, then fed by data/wave2_events.csv (shared by all sessions)."""
+    features = load_bundle(["id", "training", "mailable", *LOGIT_CATEGORICAL, *LOGIT_NUMERIC, "res1_yes"])
+    train = features.filter(pl.col("training") == 1)
+    learner = OnlineLogit.from_training(fit_logit(train), train, decay=COURSE_MULT)
+    population = features.filter(pl.col("mailable")).select("id", *LOGIT_CATEGORICAL, *LOGIT_NUMERIC)
+    return OnlineScoring(learner, population)
+
+
+def load_online_results() -> pl.DataFrame:
+    """Current online-logit scores for the mailable list, after ingesting any new events."""
+    online = load_online_scoring()
+    online.sync()
+    p = online.probabilities()
+    st.caption(
+        f"Online logit: {online.learner.n_seen:,} Wave-2 outcomes ingested from "
+        f"`{os.path.relpath(EVENTS_PATH)}` in {online.learner.n_updates} update(s)"
+        + (
+            f"; last update rescored {online.history[-1]['rescored']:,} of {len(p):,} customers."
+            if online.history
+            else "."
+        )
+    )
+    return pl.DataFrame(
+        {
+            "id": online.ids,
+            "p_nn": p,
+            "p_wave2_nn": p * COURSE_MULT,
+            "expected_profit_nn": COURSE_MARGIN * p * COURSE_MULT - COURSE_MAIL_COST,
+        }
+    ).sort("expected_profit_nn", descending=True)
+
+
+@st.cache_data
+def load_customer_attributes() -> pl.DataFrame:
+    return load_bundle(["id", *SEGMENT_COLUMNS])
+
+
+@st.cache_resource
+def load_customer_table() -> IdTable:
+    """Features + logit / NN / GBT test scores, addressed directly by customer id."""
+    return IdTable.build(
+        {
+            "bundle": load_bundle(
+                [
+                    "id",
+                    *SEGMENT_COLUMNS,
+                    "numords",
+                    "dollars",
+                    "last",
+                    "sincepurch",
+                    "training",
+                    "p_logit",
+                    "expected_profit_logit",
+                    "p_nn",
+                    "expected_profit_nn",
+                    "p_gbt",
+                    "expected_profit_gbt",
+                ]
+            )
+        }
+    )
+
 
-    return pl.read_csv(csv_path)
+@st.cache_resource
+def load_segment_index() -> BitmapIndex:
+    """Bitmaps over the customer attributes, built once per server process."""
+    return BitmapIndex.build(load_customer_attributes())
 
 
-def compute_profit_table(df_raw: pl.DataFrame, lock_report: bool) -> pl.DataFrame:
+def profit_expression(columns: list[str], lock_report: bool) -> pl.Expr:
     """
     - Report mode (lock_report=True): prefer CSV expected_profit_nn if present (consistency).
     - Sensitivity mode: recompute expected_profit_nn from probability if possible (so charts move).
-    """
-    df = df_raw
 
+    Checks the columns here, in the script; applying the expression and ranking
+    may then run off the script thread.
+    """
     # Find a probability column (so we can recompute EP in Sensitivity mode)
-    prob_candidates = [
-        "p_wave2_nn",
-        "p_wave2",
-        "pred_prob_wave2_nn",
-        "pred_prob_nn",
-        "predicted_prob_nn",
-        "prob",
-        "proba",
-    ]
-    prob_col = next((c for c in prob_candidates if c in df.columns), None)
+    prob_col = probability_column(columns)
+    wave1_prob = wave1_probability(prob_col, COURSE_MULT) if prob_col else None
+    # Per-customer decay (segment estimates) when present, else the flat multiplier
+    mult = pl.col("wave2_mult") if "wave2_mult" in columns else pl.lit(WAVE2_RESPONSE_MULT)
+    given_ep = pl.col("expected_profit_nn").cast(pl.Float64)
 
     if lock_report:
         # Keep slide/submission consistent
-        if "expected_profit_nn" in df.columns:
-            df = df.with_columns(pl.col("expected_profit_nn").cast(pl.Float64))
-        else:
-            # If file doesn't have EP, compute once using defaults
-            if prob_col is None:
-                st.error(
-                    "Report mode requires either 'expected_profit_nn' or a probability column."
-                )
-                st.write("Columns found:", df.columns)
-                st.stop()
-            df = df.with_columns(
-                (
-                    pl.lit(MARGIN_PER_RESPONDER)
-                    * (pl.col(prob_col).cast(pl.Float64) * pl.lit(WAVE2_RESPONSE_MULT))
-                    - pl.lit(MAIL_COST)
-                ).alias("expected_profit_nn")
-            )
-    else:
-        # Sensitivity mode: recompute EP so the chart updates when sliders change
+        if "expected_profit_nn" in columns:
+            return given_ep
+        # If file doesn't have EP, compute once using defaults
         if prob_col is None:
-            # Can't move without probability; fall back but warn
-            if "expected_profit_nn" not in df.columns:
-                st.error("Sensitivity mode needs a probability column to recompute EP.")
-                st.write("Columns found:", df.columns)
-                st.stop()
-            st.warning(
-                "No probability column found, so expected_profit_nn cannot be recomputed. "
-                "Charts will not respond to assumption changes unless your CSV includes p̂ (probability)."
+            st.error(
+                "Report mode requires either 'expected_profit_nn' or a probability column."
             )
-            df = df.with_columns(pl.col("expected_profit_nn").cast(pl.Float64))
-        else:
-            df = df.with_columns(
-                (
-                    pl.lit(MARGIN_PER_RESPONDER)
-                    * (pl.col(prob_col).cast(pl.Float64) * pl.lit(WAVE2_RESPONSE_MULT))
-                    - pl.lit(MAIL_COST)
-                ).alias("expected_profit_nn")
-            )
-
-    df = (
-        df.sort("expected_profit_nn", descending=True)
-        .with_row_index(name="rank", offset=1)
-        .with_columns(pl.col("expected_profit_nn").cum_sum().alias("cumulative_profit"))
-    )
-    return df
+            st.write("Columns found:", columns)
+            st.stop()
+        return expected_profit(wave1_prob, MARGIN_PER_RESPONDER, WAVE2_RESPONSE_MULT, MAIL_COST)
+
+    # Sensitivity mode: recompute EP so the chart updates when sliders change
+    if prob_col is None:
+        # Can't move without probability; fall back but warn
+        if "expected_profit_nn" not in columns:
+            st.error("Sensitivity mode needs a probability column to recompute EP.")
+            st.write("Columns found:", columns)
+            st.stop()
+        st.warning(
+            "No probability column found, so expected_profit_nn cannot be recomputed. "
+            "Charts will not respond to assumption changes unless your CSV includes p̂ (probability)."
+        )
+        return given_ep
+    return expected_profit(wave1_prob, MARGIN_PER_RESPONDER, mult, MAIL_COST)
 
 
-df_raw = load_nn_results(uploaded_csv.getvalue() if uploaded_csv else None)
-df_pl = compute_profit_table(df_raw, lock_report=lock)
-df = df_pl.to_pandas()
+if MODEL_SUFFIX == "online" and not uploaded_csv:
+    df_raw = load_online_results()
+else:
+    df_raw = load_nn_results(uploaded_csv.getvalue() if uploaded_csv else None, MODEL_SUFFIX)
 
+if "id" not in df_raw.columns:
+    st.error("The results file must contain an 'id' column.")
+    st.write("Columns found:", df_raw.columns)
+    st.stop()
 
 # ============================================================
-# Cutoff + KPIs
+# Calibration + Wave-2 decay (Sensitivity mode)
 # ============================================================
-# EP>0 cutoff should EXCLUDE first non-positive row
-if (df["expected_profit_nn"] <= 0).any():
-    first_nonpos_rank = int(df.loc[df["expected_profit_nn"] <= 0, "rank"].iloc[0])
-    profit_cutoff_rank = max(1, first_nonpos_rank - 1)
-else:
-    profit_cutoff_rank = int(df["rank"].max())
+calibration_method = CALIBRATION_METHODS[calibration]
+decay_stats = None
+if calibration_method and uploaded_csv:
+    st.warning("Calibration is fitted on the bundled holdout scores; it is skipped for uploaded files.")
+elif calibration_method:
+    calibrator, reliability = load_calibrator(MODEL_SUFFIX, calibration_method)
+    df_raw = df_raw.with_columns(pl.Series("p_nn", calibrator(df_raw["p_nn"].to_numpy())))
+
+if wave2_csv is not None and "p_nn" in df_raw.columns:
+    try:
+        responses = read_wave2_responses(wave2_csv.getvalue())
+    except ValueError as exc:
+        st.error(str(exc))
+        st.stop()
+    attributes = load_customer_attributes().select("id", decay_column)
+    mailed = responses.join(df_raw.select("id", "p_nn"), on="id").join(attributes, on="id")
+    if mailed.height == 0:
+        st.warning("None of the Wave-2 response ids are in the ranked list; using the flat multiplier.")
+    else:
+        wave2_decay, decay_stats = estimate_segment_decay(
+            mailed[decay_column],
+            mailed["p_nn"].to_numpy(),
+            mailed["responded"].to_numpy(),
+            default=WAVE2_RESPONSE_MULT,
+            column=decay_column,
+        )
+        segments = df_raw.select("id").join(attributes, on="id", how="left")[decay_column]
+        df_raw = df_raw.with_columns(pl.Series("wave2_mult", wave2_decay.factors(segments)))
+
+if (calibration_method and not uploaded_csv) or decay_stats is not None:
+    with st.expander("Calibration & Wave-2 decay", expanded=False):
+        if calibration_method and not uploaded_csv:
+            st.markdown(f"**{calibration}**: mean predicted vs observed Wave-1 response by score decile.")
+            st.dataframe(reliability, hide_index=True, use_container_width=True)
+        if decay_stats is not None:
+            st.markdown(
+                f"**Wave-2 decay by `{decay_column}`** (observed / expected responses, "
+                f"shrunk toward {WAVE2_RESPONSE_MULT:.2f})."
+            )
+            st.dataframe(decay_stats, hide_index=True, use_container_width=True)
+
+df_segment = df_raw
+if segment_filter.strip():
+    segment_index = load_segment_index()
+    try:
+        segment_bits = segment_index.query(segment_filter)
+    except (ValueError, KeyError) as exc:
+        st.error(f"Invalid segment filter: {exc}")
+        st.stop()
+    in_segment = segment_index.contains(segment_bits, df_raw["id"].to_numpy())
+    df_segment = df_raw.filter(pl.Series(in_segment))
+    st.caption(
+        f"Segment filter `{segment_filter}`: {df_segment.height:,} of "
+        f"{df_raw.height:,} ranked customers match."
+    )
+    if df_segment.height == 0:
+        st.error("No ranked customers match the segment filter.")
+        st.stop()
 
-peak_idx = int(df["cumulative_profit"].idxmax())
-peak_rank = int(df.loc[peak_idx, "rank"])
-peak_profit = float(df.loc[peak_idx, "cumulative_profit"])
+# Everything the ranked table depends on (suppression is applied on top of it):
+# the scored data, then the economics Sensitivity mode recomputes on the fly
+table_key = (
+    (
+        uploaded_csv.file_id if uploaded_csv else MODEL_SUFFIX,
+        load_online_scoring().version if MODEL_SUFFIX == "online" and not uploaded_csv else None,
+        calibration,
+        wave2_csv.file_id if wave2_csv else None,
+        decay_column,
+        segment_filter.strip(),
+        lock,
+    ),
+    (MAIL_COST, MARGIN_PER_RESPONDER, WAVE2_RESPONSE_MULT),
+)
 
-if cutoff_rule == "Mail while Expected Profit > 0":
-    cutoff_rank = profit_cutoff_rank
-elif cutoff_rule == "Mail until Peak Cumulative Profit":
-    cutoff_rank = peak_rank
-else:
-    cutoff_rank = int(top_n)
 
-profit_at_cutoff = float(df.loc[df["rank"] == cutoff_rank, "cumulative_profit"].iloc[0])
+# Bundled scores under plain economics: the same ranked table the other pages quote
+shared_table = (
+    not uploaded_csv
+    and MODEL_SUFFIX in DAG_MODELS
+    and calibration_method is None
+    and decay_stats is None
+    and not segment_filter.strip()
+)
+graph_params = dict(
+    model=MODEL_SUFFIX,
+    mail_cost=MAIL_COST,
+    margin=MARGIN_PER_RESPONDER,
+    mult=WAVE2_RESPONSE_MULT,
+)
+
 
-m1, m2, m3 = st.columns([1, 1, 1])
-m1.metric("Recommended mails", f"{cutoff_rank:,}")
-m2.metric("Profit @ cutoff", f"${profit_at_cutoff:,.0f}")
-m3.metric("Peak cumulative profit", f"${peak_profit:,.0f}")
+def profit_job(df_segment: pl.DataFrame, ep: pl.Expr, shared: bool, params: dict, tag: str):
+    """Ranked table plus the course-view charts, built on the session's worker thread."""
+
+    def job(token: CancelToken):
+        graph = dashboard_graph()
+        if shared:
+            table = graph.get("ranked", **params)
+            token.check()
+            return table, graph.get("charts", **params)
+        # Session-specific data: nothing to share, but it queues for a slot like the graph
+        with graph.flight.slot():
+            table = rank_by_profit(df_segment.with_columns(ep))
+        token.check()
+        ranked_pd = table.to_pandas()
+        cutoff = int((table["expected_profit_nn"] > 0).sum())
+        token.check()
+        with graph.flight.slot():
+            png1 = render_png(profit_by_rank(ranked_pd, cutoff, tag))
+        token.check()
+        with graph.flight.slot():
+            png2 = render_png(cumulative_profit(ranked_pd, cutoff, tag))
+        return table, (png1, png2)
+
+    return job
+
+
+def preview_section(df_segment: pl.DataFrame, ep: pl.Expr) -> None:
+    """Curves and KPIs estimated from a sample, shown until the exact table is ready."""
+    positions = sample_indices(df_segment.height)
+    ep_sample = df_segment[positions].select(ep)["expected_profit_nn"].to_numpy()
+    preview = profit_preview(ep_sample, df_segment.height)
+    band = f"{preview.level:.0%} band"
 
-st.markdown('<div style="height:.45rem"></div>', unsafe_allow_html=True)
+    st.info(
+        f"Ranking all {preview.population:,} customers. Meanwhile these are estimates from a "
+        f"sample of {preview.sample:,}, with {band}s; the exact results replace them automatically."
+    )
+    m1, m2, m3 = st.columns([1, 1, 1])
+    for col, label, value, fmt in [
+        (m1, "Recommended mails (est.)", preview.mails, "{:,.0f}"),
+        (m2, "Profit @ cutoff (est.)", preview.profit_at_cutoff, "${:,.0f}"),
+        (m3, "Peak cumulative profit (est.)", preview.peak_profit, "${:,.0f}"),
+    ]:
+        col.metric(label, fmt.format(value.estimate))
+        col.caption(f"{band}: {fmt.format(value.low)} – {fmt.format(value.high)}")
+
+    # Native charts: plotnine would cost more than the preview is meant to save
+    c1, c2 = st.columns(2)
+    for col, title, values in [
+        (c1, f"Expected Profit by Customer Rank ({MODEL_TAG}, est.)", preview.profit),
+        (c2, f"Cumulative Expected Profit vs Mailing Depth ({MODEL_TAG}, est.)", preview.cumulative),
+    ]:
+        with col:
+            st.markdown(f"**{title}**")
+            st.line_chart(
+                pl.DataFrame(
+                    {
+                        "rank": preview.rank,
+                        "estimate": values[0],
+                        f"low ({band})": values[1],
+                        f"high ({band})": values[2],
+                    }
+                ),
+                x="rank",
+                x_label="Customers mailed (by EP rank)",
+                y_label="Expected Profit ($)",
+            )
+
+
+def get_profit_table(df_segment: pl.DataFrame) -> tuple:
+    """
+    (key, ranked table, course-view charts or None) shown this run, reused while
+    the inputs are unchanged. In Sensitivity mode, and for large lists in Report
+    mode, the table is rebuilt on the session's worker thread: after an
+    economics change the previous result is returned (its key differs from
+    table_key) until the new one is ready; a large new list shows a sampled
+    preview and stops the script until then.
+    """
+    cached = st.session_state.get("profit_table")
+    if cached is not None and cached[0] == table_key:
+        return cached
+
+    ep = profit_expression(df_segment.columns, lock_report=lock)
+    large = not shared_table and df_segment.height >= PREVIEW_MIN_ROWS
+    if lock and not large:
+        graph = dashboard_graph()
+        if shared_table:
+            table = graph.get("ranked", **graph_params)
+        else:
+            with graph.flight.slot():
+                table = rank_by_profit(df_segment.with_columns(ep))
+        cached = (table_key, table, None)
+    else:
+        recompute = st.session_state.setdefault("recompute", Recomputer())
+        job = profit_job(df_segment, ep, shared_table, graph_params, MODEL_TAG)
+        same_data = cached is not None and cached[0][0] == table_key[0]
+        error = recompute.error(table_key)
+        if error:
+            # Retry a failed key once (submit clears its error); stop if it fails again
+            if st.session_state.get("recompute_retried") == table_key:
+                st.error(f"Recomputing the profit table failed: {error}")
+                st.stop()
+            st.session_state["recompute_retried"] = table_key
+        if large and not same_data and recompute.result(table_key) is None:
+            # A large new list: draw the sampled preview before the worker competes
+            # for the CPU, then wait for the exact table in the background
+            preview_section(df_segment, ep)
+            recompute.submit(table_key, job)
+            await_recompute()
+            st.stop()
+
+        recompute.submit(table_key, job)
+        # Only an economics change may show the previous table; new data waits
+        recompute.wait(table_key, timeout=STALE_AFTER_SECONDS if same_data else None)
+        error = recompute.error(table_key)
+        if error:
+            st.error(f"Recomputing the profit table failed: {error}")
+            st.stop()
+        value = recompute.result(table_key)
+        if value is None:
+            return cached
+        cached = (table_key, *value)
+        st.session_state.pop("recompute_retried", None)
+    st.session_state["profit_table"] = cached
+    return cached
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def await_recompute() -> None:
+    """Rerun the page once the worker has the table for the current inputs."""
+    recompute = st.session_state["recompute"]
+    if recompute.result(table_key) is not None or recompute.error(table_key) or not recompute.busy:
+        st.rerun()
+
+
+shown_key, df_pl, shown_charts = get_profit_table(df_segment)
+stale = shown_key != table_key
+# Graph parameters of the table on screen (the economics may lag while recomputing)
+shown_params = dict(
+    graph_params, **dict(zip(["mail_cost", "margin", "mult"], shown_key[1]))
+)
+if stale:
+    st.info(
+        "Recomputing for the new assumptions. Showing the result for mail cost "
+        f"${shown_key[1][0]:.2f}, margin ${shown_key[1][1]:.0f} and multiplier "
+        f"{shown_key[1][2]:.2f} until it is ready."
+    )
+    await_recompute()
 
 
 # ============================================================
-# Explanation cards
+# Suppression list (kept per session, updated incrementally)
 # ============================================================
-info_card(
-    "1. What these charts show",
-    f"""
-    We rank customers by expected profit and visualize:
-    <ul>
-      <li><b>Expected Profit by rank</b>: incremental profit per additional customer mailed.</li>
-      <li><b>Cumulative Expected Profit</b>: total profit as mailing depth increases.</li>
-    </ul>
-    Expected Profit:
-    <br><br>
-    <code>EP = {MARGIN_PER_RESPONDER:.0f} × (p̂ × {WAVE2_RESPONSE_MULT:.2f}) − {MAIL_COST:.2f}</code>
-    """,
-    icon="📌",
-)
+def get_suppression_index(table: pl.DataFrame) -> SuppressionIndex:
+    """Reuse the session's index while the ranked table is unchanged."""
+    cached = st.session_state.get("suppression_index")
+    if cached is None or cached[0] != shown_key:
+        index = SuppressionIndex(
+            table["id"].to_numpy(), table["expected_profit_nn"].to_numpy()
+        )
+        cached = (shown_key, index)
+        st.session_state["suppression_index"] = cached
+    return cached[1]
 
-info_card(
-    "2. Interpreting the profit peak (the “sweet spot”)",
-    f"""
-    The cumulative curve rises fast for top-ranked customers and then flattens.
-    The <b>peak</b> is the depth that maximizes total profit.
-    <br><br>
-    <b>Peak at:</b> rank <b>{peak_rank:,}</b>, cumulative profit <b>${peak_profit:,.0f}</b>.
-    """,
-    icon="🏔️",
-)
 
-info_card(
-    "3. Wave-2 decision rule",
-    f"""
-    Selected rule: <b>{cutoff_rule}</b>.
-    <br><br>
-    Recommended mailing depth: <b>{cutoff_rank:,}</b>.
-    Profit at cutoff: <b>${profit_at_cutoff:,.0f}</b>.
-    """,
-    icon="🧭",
+suppressed_ids = (
+    read_suppression_ids(suppression_csv.getvalue()) if suppression_csv else []
 )
+sup_index = get_suppression_index(df_pl)
+sup_index.sync(suppressed_ids)
 
-st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+if sup_index.n_active == 0:
+    st.error("The suppression list removes every customer in the ranked list.")
+    st.stop()
+
+if sup_index.n_suppressed:
+    # Plot data only: drop suppressed rows and renumber ranks for the curves
+    df = (
+        df_pl.filter(pl.Series(sup_index.active))
+        .drop("rank")
+        .with_row_index(name="rank", offset=1)
+        .with_columns(
+            pl.col("expected_profit_nn").cum_sum().alias("cumulative_profit")
+        )
+        .to_pandas()
+    )
+else:
+    df = df_pl.to_pandas()
+
+
+# Suppression summary depends on the sidebar only, so it stays outside the fragments
+if suppression_csv:
+    st.caption(
+        f"Suppression list: {sup_index.n_suppressed:,} of {len(suppressed_ids):,} "
+        "listed customers matched the ranked list and were removed."
+    )
 
 
 # ============================================================
-# Charts (smaller + centered column so it doesn't stretch)
+# Sections as fragments: a widget inside one reruns only that section.
+# Sidebar changes (data, assumptions) still rebuild the ranked table; the
+# cutoff controls rerun KPIs, cards, charts and export; the cutoff-line
+# toggle redraws only the charts.
 # ============================================================
-st.markdown("### Plot 1: Expected Profit by Rank")
-
-left, mid, right = st.columns([1, 2, 1])  # put chart in middle column (narrower)
-with mid:
-    p1 = (
-        ggplot(df, aes(x="rank", y="expected_profit_nn"))
-        + geom_line()
-        + geom_hline(yintercept=0)
-        + (geom_vline(xintercept=cutoff_rank) if show_cutoff_line else 0)
-        + labs(
-            title="Expected Profit by Customer Rank (NN)",
-            x="Rank (higher EP first)",
-            y="Expected Profit ($)",
-        )
-        + theme_minimal()
-        + theme(
-            figure_size=(3.6, 3.1),  # ✅ smaller
-            text=element_text(size=8),  # ✅ smaller font
-        )
+@st.fragment
+def charts_section(df, cutoff_rank: int, course_view: bool) -> None:
+    show_cutoff_line = st.checkbox("Show cutoff line on charts", value=True, key="show_cutoff_line")
+    line_at = cutoff_rank if show_cutoff_line else None
+
+    # The course view comes pre-rendered: from the recompute worker in Sensitivity
+    # mode, from the shared graph for the bundled ranking in Report mode
+    pre_rendered = None
+    if course_view and show_cutoff_line:
+        if shown_charts is not None:
+            pre_rendered = shown_charts
+        elif shared_table:
+            pre_rendered = dashboard_graph().get("charts", **shown_params)
+
+    st.markdown("### Plot 1: Expected Profit by Rank")
+
+    left, mid, right = st.columns([1, 2, 1])  # put chart in middle column (narrower)
+    with mid:
+        st.image(pre_rendered[0] if pre_rendered else render_png(profit_by_rank(df, line_at, MODEL_TAG)))
+
+    st.markdown("### Plot 2: Cumulative Expected Profit")
+
+    left2, mid2, right2 = st.columns([1, 2, 1])
+    with mid2:
+        st.image(pre_rendered[1] if pre_rendered else render_png(cumulative_profit(df, line_at, MODEL_TAG)))
+
+
+@st.fragment
+def decision_section(
+    df_raw: pl.DataFrame, df_pl: pl.DataFrame, df, sup_index: SuppressionIndex
+) -> None:
+    # EP>0 cutoff should EXCLUDE first non-positive row
+    profit_cutoff_rank = sup_index.profit_cutoff_rank()
+    peak_rank, peak_profit = sup_index.peak()
+
+    c1, c2 = st.columns([2, 1])
+    cutoff_rule = c1.radio(
+        "Cutoff rule", CUTOFF_RULES, index=0, horizontal=True, disabled=lock, key="cutoff_rule"
     )
-    st.pyplot(p1.draw(), clear_figure=True, use_container_width=False)
-
-st.markdown("### Plot 2: Cumulative Expected Profit")
-
-left2, mid2, right2 = st.columns([1, 2, 1])
-with mid2:
-    p2 = (
-        ggplot(df, aes(x="rank", y="cumulative_profit"))
-        + geom_line()
-        + (geom_vline(xintercept=cutoff_rank) if show_cutoff_line else 0)
-        + labs(
-            title="Cumulative Expected Profit vs Mailing Depth (NN)",
-            x="Customers mailed (by EP rank)",
-            y="Cumulative Expected Profit ($)",
-        )
-        + theme_minimal()
-        + theme(
-            figure_size=(3.6, 3.1),  # ✅ smaller
-            text=element_text(size=8),  # ✅ smaller font
+    if lock:
+        cutoff_rule = COURSE_RULE
+
+    if cutoff_rule == "Mail while Expected Profit > 0":
+        cutoff_rank = profit_cutoff_rank
+    elif cutoff_rule == "Mail until Peak Cumulative Profit":
+        cutoff_rank = peak_rank
+    else:
+        top_n = c2.slider(
+            "Top N to mail", min_value=100, max_value=22500, value=3500, step=100, key="top_n"
         )
+        cutoff_rank = min(int(top_n), sup_index.n_active)
+
+    profit_at_cutoff = sup_index.cumulative_at_rank(cutoff_rank)
+
+    m1, m2, m3 = st.columns([1, 1, 1])
+    m1.metric("Recommended mails", f"{cutoff_rank:,}")
+    m2.metric("Profit @ cutoff", f"${profit_at_cutoff:,.0f}")
+    m3.metric("Peak cumulative profit", f"${peak_profit:,.0f}")
+
+    st.markdown('<div style="height:.45rem"></div>', unsafe_allow_html=True)
+
+    # Explanation cards
+    info_card(
+        "1. What these charts show",
+        f"""
+        We rank customers by expected profit and visualize:
+        <ul>
+          <li><b>Expected Profit by rank</b>: incremental profit per additional customer mailed.</li>
+          <li><b>Cumulative Expected Profit</b>: total profit as mailing depth increases.</li>
+        </ul>
+        Expected Profit:
+        <br><br>
+        <code>EP = {shown_params["margin"]:.0f} × (p̂ × {shown_params["mult"]:.2f}) − {shown_params["mail_cost"]:.2f}</code>
+        """,
+        icon="📌",
     )
-    st.pyplot(p2.draw(), clear_figure=True, use_container_width=False)
 
-st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+    info_card(
+        "2. Interpreting the profit peak (the “sweet spot”)",
+        f"""
+        The cumulative curve rises fast for top-ranked customers and then flattens.
+        The <b>peak</b> is the depth that maximizes total profit.
+        <br><br>
+        <b>Peak at:</b> rank <b>{peak_rank:,}</b>, cumulative profit <b>${peak_profit:,.0f}</b>.
+        """,
+        icon="🏔️",
+    )
 
+    info_card(
+        "3. Wave-2 decision rule",
+        f"""
+        Selected rule: <b>{cutoff_rule}</b>.
+        <br><br>
+        Recommended mailing depth: <b>{cutoff_rank:,}</b>.
+        Profit at cutoff: <b>${profit_at_cutoff:,.0f}</b>.
+        """,
+        icon="🧭",
+    )
 
-# ============================================================
-# Export
-# ============================================================
-st.markdown("### Export: Wave-2 Mailing List")
+    st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+    course_view = cutoff_rule == COURSE_RULE and not sup_index.n_suppressed
+    charts_section(df, cutoff_rank, course_view)
+    st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
 
-if "id" not in df_pl.columns:
-    st.error("The results file must contain an 'id' column.")
-    st.write("Columns found:", df_pl.columns)
-    st.stop()
+    st.markdown("### Export: Wave-2 Mailing List")
 
-wave2 = (
-    df_pl.select(["id", "rank"])
-    .with_columns((pl.col("rank") <= pl.lit(cutoff_rank)).alias("mailto_wave2"))
-    .select(["id", "mailto_wave2"])
-)
+    wave2 = mailing_list(df_raw, df_pl, sup_index, cutoff_rank)
 
-st.caption("Output format: exactly two columns (`id`, `mailto_wave2`).")
+    st.caption(
+        "Output format: exactly two columns (`id`, `mailto_wave2`). "
+        "Suppressed customers and customers outside the segment filter are exported as `False`."
+    )
 
-st.download_button(
-    "Download Wave-2 mailing list (CSV)",
-    data=wave2.write_csv(),
-    file_name="wave2_mailing_list.csv",
-    mime="text/csv",
-)
+    st.download_button(
+        "Download Wave-2 mailing list (CSV)",
+        data=wave2.write_csv(),
+        file_name="wave2_mailing_list.csv",
+        mime="text/csv",
+        disabled=stale,
+        help="Available once the profit table matches the current assumptions." if stale else None,
+    )
+
+
+@st.fragment
+def segment_section(df, shared_view: bool) -> None:
+    st.markdown("### Segment breakdown: optimal depth by group")
+
+    breakdown_col = st.selectbox(
+        "Break out by",
+        options=["zip_bins", "version1", "sex"],
+        index=0,
+    )
+
+    df_breakdown = (
+        load_customer_table()
+        .gather(df["id"].to_numpy(), [breakdown_col])
+        .with_columns(pl.Series("expected_profit_nn", df["expected_profit_nn"].to_numpy()))
+        .drop_nulls(breakdown_col)
+    )
+
+    if df_breakdown.height == 0:
+        st.info("No ranked customers could be matched to customer attributes.")
+    else:
+        if shared_view:
+            # Same customers in the same order as the shared graph's ranking
+            seg_curves, seg_summary = dashboard_graph().get(
+                "segments", breakdown=breakdown_col, **shown_params
+            )
+        else:
+            seg_curves, seg_summary = segment_profit_curves(
+                df_breakdown[breakdown_col].to_numpy(),
+                df_breakdown["expected_profit_nn"].to_numpy(),
+            )
+
+        s1, s2, s3 = st.columns([1, 1, 1])
+        s1.metric("Segments", f"{seg_summary.height:,}")
+        s2.metric("Mails (sum of segment peaks)", f"{int(seg_summary['peak_rank'].sum()):,}")
+        s3.metric("Profit (sum of segment peaks)", f"${seg_summary['peak_profit'].sum():,.0f}")
+
+        st.dataframe(
+            seg_summary.rename(
+                {
+                    "segment": breakdown_col,
+                    "customers": "Customers",
+                    "breakeven_rank": "Break-even rank (EP > 0)",
+                    "peak_rank": "Optimal depth",
+                    "peak_profit": "Peak profit ($)",
+                    "depth_pct": "Depth (%)",
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+        if shared_view:
+            st.image(dashboard_graph().get("segment_chart", breakdown=breakdown_col, **shown_params))
+        else:
+            st.image(render_png(segment_curves(seg_curves.to_pandas(), breakdown_col, seg_summary.height)))
+
+        # --------------------------------------------------------
+        # Constrained allocation across the same segments
+        # --------------------------------------------------------
+        with st.expander("Quota-constrained allocation", expanded=False):
+            st.caption(
+                "Pick the profit-maximizing mailing set under a print budget and "
+                f"per-{breakdown_col} minimum/maximum quotas. Leave a value at 0 for no limit."
+            )
+            q1, q2, q3 = st.columns([1, 1, 1])
+            print_budget = q1.number_input(
+                "Print budget ($)", min_value=0.0, value=0.0, step=500.0, format="%.0f"
+            )
+            default_min = q2.number_input(
+                "Min pieces per segment", min_value=0, value=0, step=100
+            )
+            default_max = q3.number_input(
+                "Max pieces per segment", min_value=0, value=0, step=500
+            )
+
+            quota_table = st.data_editor(
+                seg_summary.select(
+                    pl.col("segment"),
+                    pl.lit(int(default_min)).alias("min"),
+                    pl.lit(int(default_max)).alias("max"),
+                ).to_pandas(),
+                disabled=["segment"],
+                hide_index=True,
+                key=f"quota_table_{breakdown_col}",
+            )
+            quotas = {
+                row.segment: (int(row.min) or None, int(row.max) or None)
+                for row in quota_table.itertuples()
+            }
+            max_pieces = int(print_budget // MAIL_COST) if print_budget > 0 and MAIL_COST > 0 else None
+
+            try:
+                plan = allocate(
+                    df_breakdown[breakdown_col].to_numpy(),
+                    df_breakdown["expected_profit_nn"].to_numpy(),
+                    max_total=max_pieces,
+                    quotas=quotas,
+                )
+            except ValueError as exc:
+                st.error(f"Constraints cannot be met: {exc}")
+            else:
+                a1, a2, a3 = st.columns([1, 1, 1])
+                a1.metric("Planned mails", f"{plan.total_mailed:,}")
+                a2.metric("Planned profit", f"${plan.total_profit:,.0f}")
+                a3.metric("Print spend", f"${plan.total_mailed * MAIL_COST:,.0f}")
+                st.dataframe(plan.summary, hide_index=True, use_container_width=True)
+
+                planned_ids = df_breakdown.filter(pl.Series(plan.selected))["id"]
+                st.download_button(
+                    "Download constrained mailing list (CSV)",
+                    data=df_raw.select("id")
+                    .with_columns(
+                        pl.col("id").is_in(planned_ids.implode()).alias("mailto_wave2")
+                    )
+                    .write_csv(),
+                    file_name="wave2_mailing_list_constrained.csv",
+                    mime="text/csv",
+                )
+
+
+@st.fragment
+def lookup_section(df, sup_index: SuppressionIndex) -> None:
+    st.markdown("### Customer lookup")
+
+    lookup_id = st.number_input(
+        "Customer id",
+        min_value=0,
+        value=int(df.loc[0, "id"]),
+        step=1,
+        help="Shows the customer's rank in the current list, both model scores and the inputs.",
+    )
+
+    customer = load_customer_table().row(int(lookup_id))
+    lookup_pos = sup_index.positions_of([int(lookup_id)])
+
+    l1, l2, l3 = st.columns([1, 1, 1])
+    if len(lookup_pos) and sup_index.active[lookup_pos[0]]:
+        l1.metric("Rank in current list", f"{sup_index.rank_of_position(int(lookup_pos[0])):,}")
+        l2.metric(f"Expected profit ({MODEL_TAG})", f"${sup_index.expected_profit[lookup_pos[0]]:,.2f}")
+    elif len(lookup_pos):
+        l1.metric("Rank in current list", "Suppressed")
+    else:
+        l1.metric("Rank in current list", "Not in list")
+
+    if customer is None:
+        st.caption("This id is not in the customer table.")
+    else:
+        if customer.get("p_logit") is not None and customer.get("p_nn") is not None:
+            l3.metric(
+                "p̂ logit / NN / GBT",
+                f"{customer['p_logit']:.3f} / {customer['p_nn']:.3f} / {customer['p_gbt']:.3f}",
+            )
+        st.dataframe(
+            pl.DataFrame(
+                {
+                    "field": list(customer),
+                    "value": [str(v) if v is not None else "—" for v in customer.values()],
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+decision_section(df_raw, df_pl, df, sup_index)
+st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+segment_section(df, shared_table and not sup_index.n_suppressed)
+st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+lookup_section(df, sup_index)
@@ -1,6 +1,31 @@
 import streamlit as st
+import tempfile
 import textwrap
 
+import polars as pl
+
+from analytics.bundle import load_bundle
+from analytics.cv import cross_validate
+from analytics.dag import dashboard_graph
+from analytics.drift import (
+    DRIFT_COLUMNS,
+    PSI_MAJOR,
+    PSI_MODERATE,
+    SCORE_COLUMN,
+    default_jobs,
+    drift_report,
+    merge_profiles,
+    profile_frame,
+    profile_parquet,
+)
+from analytics.logit import (
+    LOGIT_CATEGORICAL,
+    LOGIT_NUMERIC,
+    LOGIT_TARGET,
+    design_levels,
+    design_matrix,
+)
+
 st.set_page_config(
     page_title="Modeling & Performance Analysis",
     page_icon="📊",
@@ -125,18 +150,25 @@ def info_card(title: str, body_html: str, icon: str = "📌"):
 
 
 # ----------------------------
-# Numbers (UPDATED)
+# Numbers (live, from the shared computation graph)
 # ----------------------------
-AUC_LR = 0.7470
-BREAKEVEN_PROB = 0.0235
+graph = dashboard_graph()
+lr_cutoff = graph.get("cutoff", model="logit")
+mlp_cutoff = graph.get("cutoff", model="nn")
+
+AUC_LR = graph.get("metrics", model="logit").auc
+BREAKEVEN_PROB = graph.get("breakeven")
+
+PROFIT_LR = lr_cutoff.peak_profit
+PROFIT_MLP = mlp_cutoff.peak_profit
+LIFT_MLP = graph.get("metrics", model="nn").lift
 
-PROFIT_LR = 7129.78
-PROFIT_MLP = 14718
-LIFT_MLP = 3.74
+# Mailing the whole list with the LR ranking
+PROFIT_ALL_LR = graph.get("ranked", model="logit")["cumulative_profit"][-1]
 
-# User correction
-MAIL_LR = 0.289  # 28.9%
-MAIL_MLP = 0.155  # 15.5%
+# Share of the mailable holdout list with EP > 0
+MAIL_LR = lr_cutoff.depth
+MAIL_MLP = mlp_cutoff.depth
 
 
 # ----------------------------
@@ -230,7 +262,7 @@ info_card(
       </li>
       <li style="margin-top:.65rem;">
         <b>Neural Network Profit:</b> <b>~${PROFIT_MLP:,.0f}</b><br>
-        <i>Performance:</i> By capturing complex customer behaviors, the Neural Network <b>doubles</b> the expected profit compared to the baseline.
+        <i>Performance:</i> By capturing complex customer behaviors, the Neural Network earns <b>{PROFIT_MLP / PROFIT_LR:.1f}×</b> the expected profit of the baseline.
       </li>
     </ul>
     """,
@@ -253,7 +285,7 @@ info_card(
         <b>Efficiency (Lift):</b><br>
         <i>What it is:</i> How good is the model at putting the absolute best customers at the very top of the list?<br>
         <i>Result:</i> The Neural Network achieved a <b>Top-Decile Lift of {LIFT_MLP:.2f}</b>.
-        This means when we target the top 10% of our list, we are nearly <b>4× more likely</b> to find a buyer than if we mailed randomly.
+        This means when we target the top 10% of our list, we are <b>{LIFT_MLP:.1f}× more likely</b> to find a buyer than if we mailed randomly.
         This "precision targeting" is what drives the massive profit gap.
       </li>
     </ul>
@@ -263,12 +295,12 @@ info_card(
 
 info_card(
     '4. The "Diminishing Returns" Reality (From your Data)',
-    """
+    f"""
     Your analysis of the Logistic Regression mailing depths (5% to 100%) reveals a crucial business lesson:
     <b>More volume does not mean more profit.</b>
 
     <ul>
-      <li>As shown in your data, mailing 100% of the list actually leads to a <b>loss</b> (-$1,751).</li>
+      <li>As shown in your data, mailing 100% of the list actually leads to a <b>loss</b> (-${-PROFIT_ALL_LR:,.0f}).</li>
       <li>The models allow us to stop mailing exactly when the cost of the stamp (<b>$1.41</b>) outweighs the expected return, ensuring every dollar spent is an <b>investment</b>, not an expense.</li>
     </ul>
     """,
@@ -276,4 +308,147 @@ info_card(
 )
 
 st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+
+
+# ===========================
+# Cross-validated comparison
+# ===========================
+@st.cache_data(show_spinner="Running stratified k-fold cross-validation...")
+def run_cross_validation(k: int, models: tuple[str, ...]) -> pl.DataFrame:
+    df = load_bundle([*LOGIT_CATEGORICAL, *LOGIT_NUMERIC, LOGIT_TARGET])
+    X, _ = design_matrix(df, design_levels(df))
+    result = cross_validate(X, df[LOGIT_TARGET].to_numpy(), models=list(models), k=k)
+    fold_size = df.height // k
+    return result.summary.with_columns(pl.lit(fold_size).alias("fold_size"))
+
+
+with st.expander("Cross-validated comparison (stratified k-fold)", expanded=False):
+    st.markdown(
+        """
+        <div class="subtle">
+          The single 70/30 split gives one number per model. Here every model is refit on k stratified folds of
+          all 75,000 customers (in parallel worker processes) and scored on each held-out fold:
+          AUC, top-decile lift, and realized Wave-2 profit at that fold's best cutoff (mean ± sd across folds).
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    c1, c2, c3 = st.columns([1, 2, 1])
+    cv_k = c1.selectbox("Folds", [5, 10], index=1)
+    cv_models = c2.multiselect(
+        "Models", ["logit", "mlp"], default=["logit"], help="The MLP takes much longer per fold."
+    )
+    if c3.button("Run CV", disabled=not cv_models):
+        st.session_state["cv_request"] = (cv_k, tuple(cv_models))
+
+    def fmt(m: float, s: float, spec: str) -> str:
+        return f"{m:{spec}} ± {s:{spec}}"
+
+    if "cv_request" in st.session_state:
+        cv_summary = run_cross_validation(*st.session_state["cv_request"])
+        st.dataframe(
+            pl.DataFrame(
+                {
+                    "Model": cv_summary["model"],
+                    "AUC": [fmt(m, s, ".3f") for m, s in zip(cv_summary["auc_mean"], cv_summary["auc_sd"])],
+                    "Top-decile lift": [
+                        fmt(m, s, ".2f")
+                        for m, s in zip(cv_summary["top_decile_lift_mean"], cv_summary["top_decile_lift_sd"])
+                    ],
+                    "Best profit / fold": [
+                        fmt(m, s, ",.0f")
+                        for m, s in zip(cv_summary["best_profit_mean"], cv_summary["best_profit_sd"])
+                    ],
+                    "Mail depth": [
+                        fmt(m * 100, s * 100, ".1f") + "%"
+                        for m, s in zip(cv_summary["mail_depth_mean"], cv_summary["mail_depth_sd"])
+                    ],
+                }
+            ).to_pandas(),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.caption(
+            f"{st.session_state['cv_request'][0]} folds of ~{cv_summary['fold_size'][0]:,} customers; "
+            "profit = $60 × 0.5 × responders − $1.41 × mailed."
+        )
+
+st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+
+
+# ===========================
+# Drift monitor
+# ===========================
+@st.cache_resource(show_spinner="Sketching the training reference...")
+def load_reference_profile() -> dict:
+    """Feature sketches from the training rows; score sketch from the holdout (where p_nn exists)."""
+    df = load_bundle(["training", *DRIFT_COLUMNS, SCORE_COLUMN])
+    reference = profile_frame(df.filter(pl.col("training") == 1), DRIFT_COLUMNS)
+    scores = profile_frame(df.filter(pl.col(SCORE_COLUMN).is_not_null()), [SCORE_COLUMN])
+    return merge_profiles([reference, scores])
+
+
+@st.cache_data(show_spinner="Streaming the new file through the drift sketches...")
+def run_drift_check(data: bytes | None, name: str) -> pl.DataFrame:
+    columns = [*DRIFT_COLUMNS, SCORE_COLUMN]
+    if data is None:
+        # No upload: the holdout customers against the training reference (should read "stable")
+        df = load_bundle(["training", *columns]).filter(pl.col("training") == 0)
+        current = profile_frame(df, columns, seed=1)
+    elif name.endswith(".parquet"):
+        with tempfile.NamedTemporaryFile(suffix=".parquet") as f:
+            f.write(data)
+            f.flush()
+            current = profile_parquet(f.name, columns, n_jobs=default_jobs(), seed=1)
+    else:
+        df = pl.read_csv(data)
+        current = profile_frame(df, [c for c in columns if c in df.columns], seed=1)
+    return drift_report(load_reference_profile(), current)
+
+
+with st.expander("Drift monitor: is the new customer base still like the training data?", expanded=False):
+    st.markdown(
+        f"""
+        <div class="subtle">
+          Each feature (and the NN score <code>{SCORE_COLUMN}</code>, when the file has it) is summarized by a
+          mergeable quantile sketch, streamed in chunks so multi-million-row files stay in constant memory.
+          PSI uses the training deciles as bins; KS is the largest gap between the two CDFs.
+          PSI ≥ {PSI_MODERATE:.2f} is a moderate shift and ≥ {PSI_MAJOR:.2f} a major one: rescore or retrain before mailing.
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    drift_file = st.file_uploader(
+        "New customer file (parquet or CSV)",
+        type=["parquet", "csv"],
+        help="Needs some of: " + ", ".join([*DRIFT_COLUMNS, SCORE_COLUMN]) + ". Without a file the holdout is checked.",
+    )
+    drift = run_drift_check(
+        drift_file.getvalue() if drift_file else None, drift_file.name if drift_file else "holdout"
+    )
+    if drift.height == 0:
+        st.warning("None of the monitored columns were found in the file.")
+    else:
+        st.dataframe(
+            drift.select(
+                pl.col("column").alias("Column"),
+                pl.col("current_rows").alias("Rows"),
+                pl.col("reference_median").round(3).alias("Median (train)"),
+                pl.col("current_median").round(3).alias("Median (new)"),
+                pl.col("psi").round(4).alias("PSI"),
+                pl.col("ks").round(4).alias("KS"),
+                pl.col("status").alias("Status"),
+            ).to_pandas(),
+            use_container_width=True,
+            hide_index=True,
+        )
+        shifted = drift.filter(pl.col("psi") >= PSI_MODERATE)["column"].to_list()
+        if shifted:
+            st.warning("Distribution shift in: " + ", ".join(shifted))
+        st.caption(
+            f"Compared against {drift['reference_rows'][0]:,} training customers"
+            + (" (holdout, no file uploaded)." if drift_file is None else f" · {drift_file.name}.")
+        )
+
+st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
 st.caption("Section 4 — Modeling & Performance Analysis")
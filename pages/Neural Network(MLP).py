@@ -1,6 +1,8 @@
 import streamlit as st
 import textwrap
 
+from analytics.dag import dashboard_graph
+
 # =========================
 # Page config
 # =========================
@@ -196,13 +198,28 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Metrics (your values)
+# Metrics (live, from the shared computation graph)
+graph = dashboard_graph()
+mlp_metrics = graph.get("metrics", model="nn")
+projection = graph.get("projection", model="nn")
+
 MLP_ARCH = "(64, 32, 16)"
-MLP_LIFT_TOP10 = 3.74
-MLP_TEST_PROFIT = 14718
-WAVE2_ELIGIBLE = 118_000
-WAVE2_SELECTED_APPROX = 18_000
-AUC = 0.780  # <-- your AUC
+MLP_LIFT_TOP10 = mlp_metrics.lift
+MLP_TEST_PROFIT = graph.get("cutoff", model="nn").peak_profit
+WAVE2_ELIGIBLE = projection.pool_size
+WAVE2_SELECTED_APPROX = int(round(projection.mails, -3))
+AUC = mlp_metrics.auc
+AUC_LR = graph.get("metrics", model="logit").auc
+DEPTH = graph.get("cutoff", model="nn").depth
+
+# Comparisons follow the live numbers rather than fixed copy
+if abs(AUC - AUC_LR) < 0.005:
+    AUC_VS_LR = f"about the same holdout AUC as the logit ({AUC:.3f} vs {AUC_LR:.3f})"
+else:
+    AUC_VS_LR = (
+        f"a {'higher' if AUC > AUC_LR else 'lower'} holdout AUC than the logit "
+        f"({AUC:.3f} vs {AUC_LR:.3f})"
+    )
 
 m1, m2, m3, m4 = st.columns(4)
 m1.metric("Architecture", MLP_ARCH)
@@ -225,8 +242,8 @@ exec_html = (
     f'  <div class="card-title"><span class="icon">✅</span><div>Executive Summary</div></div>'
     f'  <div class="card-body">'
     f"    <ul>"
-    f"      <li><b>Heavy hitter:</b> MLP captures non-linear patterns and interaction effects missed by linear models.</li>"
-    f"      <li><b>Top-decile focus:</b> High concentration in the top 10% reduces mailing waste and increases ROI.</li>"
+    f"      <li><b>Ranking quality:</b> The MLP has {AUC_VS_LR}.</li>"
+    f"      <li><b>Top-decile focus:</b> The top 10% respond at {MLP_LIFT_TOP10:.2f}× the average rate.</li>"
     f"      <li><b>Profit-first validation:</b> Evaluated by Expected Profit, not just accuracy.</li>"
     f"    </ul>"
     f'    <div class="subtle" style="margin-top:0.5rem;">'
@@ -241,11 +258,11 @@ st.markdown(exec_html, unsafe_allow_html=True)
 
 with st.expander("Implementation notes", expanded=False):
     st.markdown(
-        """
+        f"""
         If desired, we can include:
         - Coefficient-like feature importances,
         - Top-decile precision/recall slices,
-        - Uplift or incremental profit slices for the selected ~18k leads.
+        - Uplift or incremental profit slices for the selected ~{WAVE2_SELECTED_APPROX / 1000:.0f}k leads.
 
         These outputs help translate model outputs into concrete campaign rules and A/B test designs.
         """
@@ -267,7 +284,7 @@ with left:
         <p><b>Architecture:</b> {MLP_ARCH} — a tapering three-layer MLP that funnels broad signals into focused upgrade predictors.</p>
         <p><b>Top-Decile Lift:</b> {MLP_LIFT_TOP10:.2f} — the top 10% of scored customers are ~{MLP_LIFT_TOP10:.2f}× more likely to respond than random.</p>
         <p><b>Expected Profit (Test):</b> ${MLP_TEST_PROFIT:,.0f} — estimated net profit from the test partition.</p>
-        <p><b>Wave-2 Eligible Pool:</b> {WAVE2_ELIGIBLE:,} (Selected: ~{WAVE2_SELECTED_APPROX:,}) — precision targeting reduces mailing costs while preserving profit potential.</p>
+        <p><b>Wave-2 Eligible Pool:</b> {WAVE2_ELIGIBLE:,} (Selected: ~{WAVE2_SELECTED_APPROX:,}, {DEPTH * 100:.1f}% of the pool) — every customer with positive expected profit is mailed.</p>
         """,
         icon="📈",
     )
@@ -363,13 +380,13 @@ with left:
 
     info_card(
         "Wave-2 Mailing Strategy",
-        """
+        f"""
         <div>
           <p>Pipeline steps:</p>
           <ol style="margin:.35rem 0 0 1.15rem;">
             <li>Score all non-respondents with the trained MLP.</li>
             <li>Apply a conservative 50% Wave-2 decay and economic filter (mail cost $1.41) to compute expected incremental profit.</li>
-            <li>Select the top leads that pass the profitability threshold — final selection ≈ 18,000 leads from the 118,000 eligible.</li>
+            <li>Select the top leads that pass the profitability threshold — final selection ≈ {WAVE2_SELECTED_APPROX:,} leads from the {WAVE2_ELIGIBLE:,} eligible.</li>
           </ol>
         </div>
         """,
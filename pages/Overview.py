@@ -1,6 +1,8 @@
 import streamlit as st
 import textwrap  # <- 新增這行
 
+from analytics.dag import dashboard_graph
+
 st.set_page_config(
     page_title="Intuit QuickBooks Upgrade Strategy",
     layout="wide",
@@ -90,8 +92,15 @@ st.markdown(
     unsafe_allow_html=True,
 )
 # ===== Executive Summary card (SIMPLIFIED + CLEAR) =====
+graph = dashboard_graph()
+depth = graph.get("cutoff").depth
+projection = graph.get("projection")
+nn_peak = graph.get("cutoff").peak_profit
+logit_peak = graph.get("cutoff", model="logit").peak_profit
+best_model = "Neural Network" if nn_peak >= logit_peak else "Logistic Regression"
+
 st.markdown(
-    """
+    f"""
     <div class="card">
       <h3 style="margin-top:0;">1. Executive Summary</h3>
 
@@ -110,9 +119,10 @@ st.markdown(
       <p>
         Profit is evaluated using the case assumptions:
         <b>$60 margin per responder</b> and <b>$1.41 cost per mail</b>.
-        After comparing Logistic Regression and a Neural Network (MLP), the <b>Neural Network</b> produces the highest expected profit.
-        It recommends mailing to about the top <b>15.5%</b> of remaining non-responders, which is projected to generate
-        <b>over $475,000</b> in incremental profit when scaled to the full eligible population.
+        After comparing Logistic Regression and a Neural Network (MLP), the <b>{best_model}</b> produces the higher expected profit
+        (${max(nn_peak, logit_peak):,.0f} vs ${min(nn_peak, logit_peak):,.0f} on the test set).
+        The Neural Network ranking mails about the top <b>{depth * 100:.1f}%</b> of remaining non-responders, which is projected to generate
+        about <b>${projection.profit:,.0f}</b> in incremental profit when scaled to the full eligible population.
       </p>
 
       <div class="subtle" style="margin-top:.45rem;">
@@ -1,6 +1,8 @@
 import streamlit as st
 import textwrap
 
+from analytics.dag import COURSE_DEFAULTS, dashboard_graph
+
 st.set_page_config(
     page_title="Strategic Recommendations",
     page_icon="🧭",
@@ -143,15 +145,35 @@ st.markdown(
 )
 
 # ----------------------------
-# Optional metrics (kept consistent with your style)
+# Optional metrics (kept consistent with your style), from the shared computation graph
 # ----------------------------
-TEST_SET_N = 22500
-FULL_POOL_N = 118000
-TARGET_DEPTH = 0.155
-RECOMMENDED_MAILS_TEST = 3489
-PEAK_PROFIT_TEST = 14718
-PROJECTED_MAILS_FULL = 18300
-SAVINGS_FULL = 140000
+graph = dashboard_graph()
+cutoff = graph.get("cutoff")
+projection = graph.get("projection")
+baseline = graph.get("cutoff", model="logit")
+
+TEST_SET_N = graph.get("metrics").n_holdout
+MAILABLE_N = cutoff.eligible
+FULL_POOL_N = projection.pool_size
+TARGET_DEPTH = cutoff.depth
+RECOMMENDED_MAILS_TEST = cutoff.mails
+PEAK_PROFIT_TEST = cutoff.peak_profit
+PROFIT_VS_BASELINE = PEAK_PROFIT_TEST / baseline.peak_profit
+MAIL_COST = COURSE_DEFAULTS["mail_cost"]
+PROJECTED_MAILS_FULL = projection.mails
+SAVINGS_FULL = projection.avoided_cost
+AUC_MLP = graph.get("metrics").auc
+AUC_LR = graph.get("metrics", model="logit").auc
+
+# Comparisons follow the live numbers rather than fixed copy
+if abs(AUC_MLP - AUC_LR) < 0.005:
+    AUC_VS_LR = f"about the same as the logit's {AUC_LR:.3f}"
+else:
+    AUC_VS_LR = (
+        f"{abs(AUC_MLP - AUC_LR):.3f} {'higher' if AUC_MLP > AUC_LR else 'lower'} "
+        f"than the logit's {AUC_LR:.3f}"
+    )
+PROFIT_VS_LR = "more" if PROFIT_VS_BASELINE > 1 else "less"
 
 m1, m2, m3, m4 = st.columns([1, 1, 1, 1])
 m1.metric("Test set size", f"{TEST_SET_N:,}")
@@ -169,7 +191,7 @@ st.markdown(
     <div class="card" id="exec-summary-top">
       <div class="card-title">✅ <div>Executive Summary</div></div>
       <ul>
-        <li><b>Deploy MLP (Neural Network):</b> Best at concentrating the most profitable responders at the top of the list.</li>
+        <li><b>Deploy MLP (Neural Network):</b> Its ranking yields <b>${PEAK_PROFIT_TEST:,.0f}</b> peak expected profit on the test set, {PROFIT_VS_BASELINE:.1f}× the logit baseline.</li>
         <li><b>Stop at the profit peak:</b> Mail only the top <b>{TARGET_DEPTH * 100:.1f}%</b> of customers (≈ <b>{RECOMMENDED_MAILS_TEST:,}</b> in the test set).</li>
         <li><b>Scale efficiently:</b> Apply the same threshold to <b>{FULL_POOL_N:,}</b> eligible customers (≈ <b>{PROJECTED_MAILS_FULL:,}</b> mailings).</li>
         <li><b>Business outcome:</b> Maintain high ROI while avoiding low-probability spend (≈ <b>${SAVINGS_FULL:,.0f}</b> savings vs full-pool blast).</li>
@@ -201,19 +223,19 @@ info_card(
     "1. Immediate Deployment: The Neural Network Model",
     f"""
     <b>Recommendation:</b> Use the <b>Multi-Layer Perceptron (MLP)</b> model to select the Wave-2 mailing list.<br><br>
-    <b>Why:</b> Our analysis shows the MLP is markedly better at “identifying the needle in the haystack.”
-    By capturing complex, non-linear customer behaviors, it generated <b>${PEAK_PROFIT_TEST:,.0f}</b> profit in the test set—<b>more than double</b>
-    the Logistic Regression baseline. This is not about maximizing response volume; it is about maximizing <b>profit per mailed customer</b>.
+    <b>Why:</b> On ranking quality, the MLP's holdout AUC is <b>{AUC_MLP:.3f}</b>, {AUC_VS_LR}.
+    Ranked by expected profit, its list generated <b>${PEAK_PROFIT_TEST:,.0f}</b> peak profit in the test set, {PROFIT_VS_LR} than the
+    Logistic Regression baseline (<b>{PROFIT_VS_BASELINE:.1f}×</b>). This is not about maximizing response volume; it is about maximizing <b>total expected profit</b>.
     """,
     icon="🚀",
 )
 
 info_card(
-    "2. Optimal Targeting Depth (The 15.5% Rule)",
+    f"2. Optimal Targeting Depth (The {TARGET_DEPTH * 100:.1f}% Rule)",
     f"""
-    <b>Recommendation:</b> Set the mailing cutoff at the <b>{TARGET_DEPTH * 100:.1f}% depth</b> (top-tier prospects).<br><br>
-    <b>The logic:</b> In the test group of <b>{TEST_SET_N:,}</b>, this corresponds to <b>{RECOMMENDED_MAILS_TEST:,}</b> recommended mailings.<br><br>
-    <b>Why we stop here:</b> Beyond this point, we see <b>diminishing returns</b>—the expected incremental revenue falls below the mailing cost (e.g., <code>$1.41</code>),
+    <b>Recommendation:</b> Set the mailing cutoff at the <b>{TARGET_DEPTH * 100:.1f}% depth</b> (every customer with positive expected profit).<br><br>
+    <b>The logic:</b> Among the <b>{MAILABLE_N:,}</b> mailable customers in the test group of <b>{TEST_SET_N:,}</b>, this corresponds to <b>{RECOMMENDED_MAILS_TEST:,}</b> recommended mailings.<br><br>
+    <b>Why we stop here:</b> Beyond this point, we see <b>diminishing returns</b>—the expected incremental revenue falls below the mailing cost (e.g., <code>${MAIL_COST:.2f}</code>),
     meaning additional mailings start to reduce total profit. Stopping at the peak ensures <b>no budget is wasted</b> on low-probability prospects.
     """,
     icon="🎯",
@@ -224,8 +246,8 @@ info_card(
     f"""
     <b>Recommendation:</b> Apply the <b>{TARGET_DEPTH * 100:.1f}% threshold</b> to the entire eligible Wave-2 universe of <b>{FULL_POOL_N:,}</b> businesses.<br><br>
     <b>Projected scale:</b> Target approximately <b>{PROJECTED_MAILS_FULL:,}</b> high-value leads.<br><br>
-    <b>Business impact:</b> This focused plan captures the majority of potential upgrades while avoiding low-yield mailings—saving
-    <b>over ${SAVINGS_FULL:,.0f}</b> in unnecessary mailing and operational costs compared to a full-pool blast.
+    <b>Business impact:</b> This plan mails only customers whose expected profit covers the mailing cost—saving
+    about <b>${SAVINGS_FULL:,.0f}</b> in mailing costs compared to a full-pool blast.
     """,
     icon="📦",
 )
@@ -1,6 +1,16 @@
+import os
 import streamlit as st
 import textwrap
 
+from plotnine import aes, element_text, geom_line, ggplot, labs, theme, theme_minimal
+
+from analytics.bitmap_index import SEGMENT_COLUMNS
+from analytics.bundle import load_bundle
+from analytics.charts import render_png
+from analytics.dag import COURSE_DEFAULTS, dashboard_graph
+from analytics.events import EVENTS_PATH
+from analytics.tracking import CampaignTracker
+
 st.set_page_config(
     page_title="Targeting Strategy & Financial Impact",
     page_icon="💰",
@@ -125,33 +135,37 @@ def info_card(title: str, body_md: str, icon: str = "📌"):
 
 
 # ----------------------------
-# Key numbers (stars of the page)
+# Key numbers (stars of the page), from the shared computation graph
 # ----------------------------
-RECOMMENDED_MAILS = 3489
-PEAK_CUM_PROFIT = 14718
-PROFIT_AT_CUTOFF = 14718
+graph = dashboard_graph()
+cutoff = graph.get("cutoff")
+projection = graph.get("projection")
+
+RECOMMENDED_MAILS = cutoff.mails
+PEAK_CUM_PROFIT = cutoff.peak_profit
+PROFIT_AT_CUTOFF = cutoff.profit
 
-TEST_SET_SIZE = 22500
-MAILING_DEPTH = RECOMMENDED_MAILS / TEST_SET_SIZE  # 15.5%
+TEST_SET_SIZE = cutoff.eligible  # mailable holdout customers
+MAILING_DEPTH = cutoff.depth
 
-MAIL_COST = 1.41
-MARGIN = 60
-DECAY = 0.50
+MAIL_COST = COURSE_DEFAULTS["mail_cost"]
+MARGIN = COURSE_DEFAULTS["margin"]
+DECAY = COURSE_DEFAULTS["mult"]
 REWARD_WAVE2 = DECAY * MARGIN  # $30
-BREAKEVEN = MAIL_COST / REWARD_WAVE2  # 4.7%
+BREAKEVEN = graph.get("breakeven")  # 4.7%
 
-FULL_ELIGIBLE_POOL = 118000
-FULL_RECOMMENDED = int(round(FULL_ELIGIBLE_POOL * MAILING_DEPTH))  # ~18,300
+FULL_ELIGIBLE_POOL = projection.pool_size
+FULL_RECOMMENDED = projection.mails
 
-NOT_MAILED = FULL_ELIGIBLE_POOL - FULL_RECOMMENDED
-AVOIDED_COST = NOT_MAILED * MAIL_COST  # should be > $140k
+NOT_MAILED = projection.not_mailed
+AVOIDED_COST = projection.avoided_cost
 
 
 # ----------------------------
 # Header + Metrics row
 # ----------------------------
 st.markdown(
-    """
+    f"""
     <div style="display:flex; justify-content:space-between; align-items:flex-start; gap:1rem; flex-wrap:wrap;">
       <div>
         <div class="tag">💰 Section 6</div>
@@ -159,7 +173,7 @@ st.markdown(
         <h1>Targeting Strategy &amp; Financial Impact: Precision at Scale</h1>
         <div class="subtle">
           The “stars” of this page are the exact cutoff and profit peak that prove the model is working:
-          we mail the <b>3,489</b> customers that maximize profit at <b>$14,718</b>.
+          we mail the <b>{RECOMMENDED_MAILS:,}</b> customers that maximize profit at <b>${PEAK_CUM_PROFIT:,.0f}</b>.
         </div>
       </div>
     </div>
@@ -184,10 +198,10 @@ st.markdown(
     <div class="card" id="exec-summary-top">
       <div class="card-title">✅ <div>Executive Summary</div></div>
       <ul>
-        <li><b>Proof the model works:</b> We don’t mail 15.5% randomly—we mail the exact <b>{RECOMMENDED_MAILS:,}</b> customers that maximize profit.</li>
+        <li><b>Proof the model works:</b> We don’t mail {MAILING_DEPTH * 100:.1f}% randomly—we mail the exact <b>{RECOMMENDED_MAILS:,}</b> customers that maximize profit.</li>
         <li><b>Peak profit achieved:</b> Cumulative profit peaks at <b>${PEAK_CUM_PROFIT:,.0f}</b>, and we stop exactly at that point.</li>
         <li><b>Breakeven filter:</b> Any customer below <b>{BREAKEVEN * 100:.1f}%</b> purchase probability is automatically excluded.</li>
-        <li><b>Rollout logic:</b> Scaling the same 15.5% strategy to <b>{FULL_ELIGIBLE_POOL:,}</b> yields ~<b>{FULL_RECOMMENDED:,}</b> targets while avoiding major wasted spend.</li>
+        <li><b>Rollout logic:</b> Scaling the same {MAILING_DEPTH * 100:.1f}% strategy to <b>{FULL_ELIGIBLE_POOL:,}</b> yields ~<b>{FULL_RECOMMENDED:,}</b> targets while avoiding major wasted spend.</li>
       </ul>
     </div>
     """,
@@ -198,7 +212,7 @@ with st.expander("Implementation notes", expanded=False):
     st.markdown(
         f"""
         <div class="subtle">
-          <b>Expected Profit rule:</b> (Probability of Buying × ${MARGIN}) − ${MAIL_COST}<br>
+          <b>Expected Profit rule:</b> (Probability of Buying × ${MARGIN:.0f}) − ${MAIL_COST}<br>
           <b>Wave-2 decay:</b> We conservatively adjust expected revenue by 50%, so reward becomes ${REWARD_WAVE2:.0f} per responder.<br>
           <b>Breakeven:</b> ${MAIL_COST:.2f} ÷ ${REWARD_WAVE2:.0f} = {BREAKEVEN * 100:.1f}%<br>
         </div>
@@ -221,7 +235,7 @@ info_card(
     <ul>
       <li><b>The Decision Rule:</b> We only mail a customer if their <b>Expected Profit is greater than $0</b>.</li>
       <li><b>The Calculation:</b> For every customer, we calculate:<br>
-        <code>(Probability of Buying × ${MARGIN}) − ${MAIL_COST} Mailing Cost</code>
+        <code>(Probability of Buying × ${MARGIN:.0f}) − ${MAIL_COST} Mailing Cost</code>
       </li>
       <li><b>The Goal:</b> Find the “Sweet Spot” (the cutoff) where we stop mailing just before we start losing money on low-probability leads.</li>
     </ul>
@@ -237,7 +251,7 @@ info_card(
 
     <ul>
       <li><b>The Cost:</b> ${MAIL_COST:.2f} per mailer.</li>
-      <li><b>The Reward:</b> ${REWARD_WAVE2:.0f} expected revenue per responder (This is the ${MARGIN} margin adjusted for the 50% “Wave-2 decay”).</li>
+      <li><b>The Reward:</b> ${REWARD_WAVE2:.0f} expected revenue per responder (This is the ${MARGIN:.0f} margin adjusted for the 50% “Wave-2 decay”).</li>
       <li><b>The Breakeven Point:</b> <b>{BREAKEVEN * 100:.1f}%</b> (${MAIL_COST:.2f} ÷ ${REWARD_WAVE2:.0f}).</li>
       <li><b>Strategic Implication:</b> Our model identifies and automatically filters out any customer with a purchase probability below <b>{BREAKEVEN * 100:.1f}%</b>.</li>
     </ul>
@@ -288,4 +302,79 @@ info_card(
 )
 
 st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
+
+
+# ===========================
+# Campaign tracking: realized vs expected
+# ===========================
+@st.cache_resource(show_spinner="Loading the campaign tracker...")
+def load_tracker() -> CampaignTracker:
+    """One tracker per server process; each rerun only ingests newly appended events."""
+    ranked = (
+        graph.get("ranked")
+        .select("id", "p_wave2_nn", "expected_profit_nn")
+        .rename({"p_wave2_nn": "p_wave2", "expected_profit_nn": "expected_profit"})
+    )
+    return CampaignTracker(
+        ranked, load_bundle(["id", *SEGMENT_COLUMNS]), margin=MARGIN, mail_cost=MAIL_COST
+    )
+
+
+st.markdown("### Campaign tracking: realized vs expected")
+tracker = load_tracker()
+tracker.sync()
+
+if tracker.n_mailed == 0:
+    st.info(
+        f"No Wave-2 campaign events yet. Events are read from `{os.path.relpath(EVENTS_PATH)}`; "
+        "record them with `python -m analytics.events mailed|responded|no_response ID ...`."
+    )
+else:
+    t1, t2, t3, t4 = st.columns([1, 1, 1, 1])
+    t1.metric("Mailed", f"{tracker.n_mailed:,}")
+    expected_responses = tracker.groups["decile"].expected_responses.sum()
+    t2.metric(
+        "Responses",
+        f"{tracker.n_responded:,}",
+        f"{tracker.n_responded - expected_responses:+,.0f} vs expected",
+    )
+    t3.metric("Realized profit", f"${tracker.realized_profit():,.0f}")
+    t4.metric(
+        "Expected profit (mailed)",
+        f"${tracker.expected_profit():,.0f}",
+        f"plan ${PEAK_CUM_PROFIT:,.0f}",
+        delta_color="off",
+    )
+
+    curves = tracker.cumulative_curves().unpivot(
+        index="rank", on=["realized", "expected"], variable_name="series", value_name="profit"
+    )
+    left, mid, right = st.columns([1, 2, 1])
+    with mid:
+        p = (
+            ggplot(curves, aes(x="rank", y="profit", color="series"))
+            + geom_line()
+            + labs(
+                title="Cumulative profit along the ranked list",
+                x="Rank (higher EP first)",
+                y="Cumulative profit ($)",
+                color="",
+            )
+            + theme_minimal()
+            + theme(figure_size=(4.2, 3.1), text=element_text(size=8))
+        )
+        st.image(render_png(p))
+
+    tab_decile, tab_segment = st.tabs(["By rank decile", "By segment"])
+    with tab_decile:
+        st.dataframe(tracker.table("decile"), hide_index=True, use_container_width=True)
+    with tab_segment:
+        segment_col = st.selectbox("Segment", SEGMENT_COLUMNS, index=SEGMENT_COLUMNS.index("zip_bins"))
+        st.dataframe(tracker.table(segment_col), hide_index=True, use_container_width=True)
+    st.caption(
+        f"{tracker.n_events:,} events ingested. Realized = ${MARGIN:.0f} × responders − ${MAIL_COST} × mailed; "
+        "pending = mailed customers whose response window is still open."
+    )
+
+st.markdown('<hr class="hr"/>', unsafe_allow_html=True)
 st.caption("Targeting Strategy & Financial Impact")